@@ -0,0 +1,249 @@
+import os
+import math
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Analysis pool configuration from environment variables. ANALYSIS_WORKERS=0
+# runs analysis inline in the calling thread.
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 1))
+ANALYSIS_MAX_PENDING = int(os.environ.get("ANALYSIS_MAX_PENDING", 2 * max(ANALYSIS_WORKERS, 1)))
+ANALYSIS_START_METHOD = os.environ.get("ANALYSIS_START_METHOD", "forkserver")
+ANALYSIS_RETRY_AFTER = int(os.environ.get("ANALYSIS_RETRY_AFTER", 5))
+
+# Models every analysis worker loads before taking work
+ANALYSIS_PRELOAD_MODELS = ['spacy', 'stopwords', 'lemmatizer', 'sentiment', 'tokenizer', 'regex_tokenizer']
+
+# Models request threads still use when analysis runs on the pool (stop
+# words, for voice commands)
+REQUEST_THREAD_MODELS = ['stopwords']
+
+class AnalysisPoolFullError(Exception):
+    """
+    Raised when analysis is requested while every pool slot is taken
+
+    Attributes:
+        retry_after: Suggested seconds to wait before retrying
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _initialize_worker():
+    # Load the NLP models (and scikit-learn, through the topic model) once per
+    # worker process instead of on its first task
+    import nlp_models
+    import topic_model  # noqa: F401
+    import sklearn.decomposition  # noqa: F401
+    nlp_models.warm_up(ANALYSIS_PRELOAD_MODELS)
+
+def server_preload_models() -> Optional[List[str]]:
+    """
+    Return the models a web server process should load before serving
+
+    Analysis workers are started through forkserver and load their own
+    models, so with the pool enabled the server only needs those its request
+    threads use; spaCy loaded there would stay resident, unused, in every
+    web worker.
+
+    Returns:
+        Model names, or None for all models when analysis runs inline
+    """
+    return REQUEST_THREAD_MODELS if ANALYSIS_WORKERS > 0 else None
+
+def _run_measured(func: Callable[..., Any], args, kwargs) -> Tuple[Any, Dict[str, Any]]:
+    # A worker runs one task at a time, so the metrics it recorded since the
+    # last drain belong to this task; they are merged into the caller's registry
+    result = func(*args, **kwargs)
+    return result, metrics.registry.drain()
+
+def _unwrap_measured(inner: Future, outer: Future):
+    if inner.cancelled():
+        outer.set_exception(CancelledError())
+        return
+    error = inner.exception()
+    if error is not None:
+        outer.set_exception(error)
+        return
+    result, snapshot = inner.result()
+    metrics.registry.merge(snapshot)
+    outer.set_result(result)
+
+class AnalysisPool:
+    """
+    Runs CPU-heavy NLP analysis in worker processes
+
+    At most max_pending tasks may be running or queued at once. Callers that
+    cannot wait get AnalysisPoolFullError with a Retry-After estimate when
+    the pool is saturated; blocking callers wait for a free slot instead.
+
+    Tasks and their arguments must be picklable (module-level functions).
+    """
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS, max_pending: int = ANALYSIS_MAX_PENDING,
+                 start_method: str = ANALYSIS_START_METHOD):
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self.start_method = start_method
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = {
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'restarts': 0
+        }
+        # Moving average of the time from submission to result, used as the
+        # Retry-After estimate: by then the tasks in flight have mostly finished
+        self._average_latency = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                method = self.start_method if self.start_method in methods else 'spawn'
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(method),
+                                                     initializer=_initialize_worker)
+                logger.info(f"Started analysis pool with {self.workers} {method} workers")
+            return self._executor
+
+    def start(self) -> None:
+        """
+        Start the worker processes now instead of on the first task
+        """
+        if self.workers > 0:
+            executor = self._get_executor()
+            # Workers are started on demand; submitting one no-op per worker
+            # starts them all and waits until their models are loaded
+            for future in [executor.submit(time.time) for _ in range(self.workers)]:
+                future.result()
+
+    def submit(self, func: Callable[..., Any], *args, block: bool = False, **kwargs) -> Future:
+        """
+        Schedule func(*args, **kwargs) on a worker process
+
+        Args:
+            func: Module-level function to run
+            block: Wait for a free slot instead of failing when the pool is saturated
+
+        Returns:
+            Future of the result
+
+        Raises:
+            AnalysisPoolFullError: If block is false and max_pending tasks are in flight
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise AnalysisPoolFullError(f"Analysis pool is busy ({self.max_pending} tasks in flight)",
+                                        self.retry_after())
+
+        started = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+        executor = None
+        try:
+            if self.workers > 0:
+                executor = self._get_executor()
+                inner = executor.submit(_run_measured, func, args, kwargs)
+                future = Future()
+                future.set_running_or_notify_cancel()
+                inner.add_done_callback(lambda done: _unwrap_measured(done, future))
+            else:
+                future = Future()
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+        except Exception:
+            self._release(None, executor, started)
+            raise
+        future.add_done_callback(lambda done: self._release(done, executor, started))
+        return future
+
+    def run(self, func: Callable[..., Any], *args, block: bool = False, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on a worker process and wait for its result
+
+        Raises:
+            AnalysisPoolFullError: If block is false and the pool is saturated
+        """
+        return self.submit(func, *args, block=block, **kwargs).result()
+
+    def retry_after(self) -> int:
+        """
+        Estimate how many seconds until the pool has free slots again
+        """
+        with self._lock:
+            if self._average_latency is None:
+                return ANALYSIS_RETRY_AFTER
+            return max(1, math.ceil(self._average_latency))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return pool size, occupancy and task counters
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                'workers': self.workers,
+                'maxPending': self.max_pending,
+                'pending': self._pending,
+                'averageLatency': round(self._average_latency, 4) if self._average_latency is not None else None,
+                'startMethod': self.start_method
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes, optionally after running queued tasks
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def _release(self, future: Optional[Future], executor: Optional[ProcessPoolExecutor], started: float):
+        latency = time.perf_counter() - started
+        if future is None or future.cancelled():
+            error = True
+        else:
+            error = future.exception()
+        with self._lock:
+            self._pending -= 1
+            if error is None:
+                self._counters['completed'] += 1
+                self._average_latency = latency if self._average_latency is None else \
+                    0.8 * self._average_latency + 0.2 * latency
+            else:
+                self._counters['failed'] += 1
+        self._slots.release()
+
+        if isinstance(error, BrokenProcessPool):
+            # A worker died (e.g. killed for memory); replace the pool unless
+            # another failed task already did
+            with self._executor_lock:
+                if self._executor is executor:
+                    logger.error("Analysis pool broke; starting a new one for the next task")
+                    self._executor = None
+                    with self._lock:
+                        self._counters['restarts'] += 1
+
+# Shared pool used by flask_server
+analysis_pool = AnalysisPool()
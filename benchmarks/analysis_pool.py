@@ -0,0 +1,72 @@
+"""
+Load test insight generation for N concurrent uploads: request threads
+analyzing inline (serialized by the GIL) against the process-backed
+analysis pool at increasing worker counts.
+
+Run from the repository root:
+    python -m benchmarks.analysis_pool --uploads 8 --rows 300
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from analysis_pool import AnalysisPool, AnalysisPoolFullError
+from benchmarks.survey_memory import make_survey_csv
+from data_processor import load_csv_survey
+from openai_service import generate_survey_insights
+from nlp_models import warm_up
+
+def concurrent_uploads(analyze, surveys: List) -> float:
+    """
+    Analyze every survey from its own request thread
+
+    Returns:
+        Uploads per second
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(surveys)) as threads:
+        list(threads.map(analyze, surveys))
+    return len(surveys) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.getLogger('analysis_pool').setLevel(logging.WARNING)
+
+    surveys = [load_csv_survey(make_survey_csv(args.rows, 2, seed=seed), 'Employee Survey', 'Q1 2024')
+               for seed in range(args.uploads)]
+    print(f"{args.uploads} concurrent uploads of {args.rows:,} responses, {os.cpu_count()} cores")
+
+    warm_up()
+    generate_survey_insights(surveys[0])
+    inline_rate = concurrent_uploads(generate_survey_insights, surveys)
+    print(f"inline threads:      {inline_rate:7.2f} uploads/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = AnalysisPool(workers=workers, max_pending=args.uploads)
+        pool.start()
+        rate = concurrent_uploads(lambda survey: pool.run(generate_survey_insights, survey, block=True), surveys)
+        pool.shutdown()
+        print(f"pool, {workers:2d} workers:    {rate:7.2f} uploads/s  ({rate / inline_rate:.2f}x)")
+        workers *= 2
+
+    # A saturated pool rejects callers that cannot wait
+    pool = AnalysisPool(workers=1, max_pending=2)
+    futures = [pool.submit(generate_survey_insights, survey) for survey in surveys[:2]]
+    try:
+        pool.submit(generate_survey_insights, surveys[2 % len(surveys)])
+    except AnalysisPoolFullError as e:
+        print(f"saturated pool: {e} (Retry-After {e.retry_after}s)")
+    for future in futures:
+        future.result()
+    pool.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare insights for every portfolio company in a quarter generated with
+one GET /generate-insights/<id> request per survey against a single
+POST /generate-insights/batch request, and check both return the same
+insights.
+
+Run from the repository root:
+    python -m benchmarks.batch_insights --companies 8 --rows 200
+"""
+import argparse
+import logging
+import os
+import time
+
+# In-memory surveys, no insight cache on disk and analysis inline, so both
+# paths do the same NLP work in this process
+os.environ.update({
+    "SURVEY_STORE_BACKEND": "memory",
+    "INSIGHT_CACHE_PATH": "",
+    "ANALYSIS_WORKERS": "0",
+})
+
+from benchmarks import synthetic
+
+def compare(client, insight_cache, name: str, survey_ids, body) -> None:
+    """
+    Time one GET per survey against a single batch POST and check they agree
+    """
+    insight_cache.clear()
+    start = time.perf_counter()
+    single = [client.get(f'/generate-insights/{survey_id}').get_json() for survey_id in survey_ids]
+    single_time = time.perf_counter() - start
+
+    insight_cache.clear()
+    start = time.perf_counter()
+    response = client.post('/generate-insights/batch', json=body)
+    batch_time = time.perf_counter() - start
+    document = response.get_json()
+    assert response.status_code == 200, document
+    assert [entry['insights'] for entry in document['surveys']] == single
+
+    print(name)
+    print(f"  one request per survey: {single_time:6.2f}s  {len(survey_ids) / single_time * 60:7.1f} surveys/minute")
+    print(f"  batch request:          {batch_time:6.2f}s  {len(survey_ids) / batch_time * 60:7.1f} surveys/minute  "
+          f"({single_time / batch_time:.2f}x, identical insights)")
+
+    start = time.perf_counter()
+    cached = client.post('/generate-insights/batch', json=body).get_json()
+    print(f"  batch request, cached:  {time.perf_counter() - start:6.2f}s  ({cached['stats']['cached']} cached)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--companies', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    from flask_server import app, survey_store
+    from insight_service import insight_cache
+    from data_processor import load_csv_survey
+    from nlp_models import warm_up
+    warm_up()
+
+    companies = [f"{name} {index}" for index, name in
+                 enumerate(synthetic.COMPANIES * (args.companies // len(synthetic.COMPANIES) + 1))][:args.companies]
+    uploaded, commented = [], []
+    for seed, company in enumerate(companies):
+        df = synthetic.employee_survey(args.rows, seed=seed)
+        columns = load_csv_survey(synthetic.to_csv(df), 'Employee Survey', 'Q1 2024')
+        uploaded.append(survey_store.create_survey('Employee Survey', 'Q1 2024', columns, company=company))
+        # Surveys with per-response comments, where comments repeat across companies
+        responses = [{'comments': row['comment 1'], 'score': row['1.01_agreement'], 'department': row['department']}
+                     for _, row in df.iterrows() if isinstance(row['comment 1'], str)]
+        commented.append(survey_store.create_survey('Employee Survey', 'Q2 2024', {'responses': responses},
+                                                    company=company))
+
+    client = app.test_client()
+    # Load the models outside the measurement
+    client.get(f'/generate-insights/{uploaded[0]}')
+    client.get(f'/generate-insights/{commented[0]}')
+
+    print(f"{len(companies)} companies, {args.rows} responses each")
+    compare(client, insight_cache, "uploaded CSV surveys, by company and period:", uploaded,
+            {'companies': companies, 'period': 'Q1 2024'})
+    compare(client, insight_cache, "surveys with response comments, by id:", commented, {'surveyIds': commented})
+
+if __name__ == '__main__':
+    main()
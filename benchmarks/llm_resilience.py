@@ -0,0 +1,129 @@
+"""
+Exercise the pooled LLM client against the local stub OpenAI server:
+connection reuse, retries on transient 5xx and 429 responses, request rate
+limiting and the circuit breaker falling back during an outage.
+
+Run from the repository root:
+    python -m benchmarks.llm_resilience --latency 0.05
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+from benchmarks.llm_stub_server import start_stub_server
+
+MESSAGES = [{"role": "user", "content": "Suggest three ways to improve strategic clarity"}]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--requests', type=int, default=40)
+    args = parser.parse_args()
+    for name in ('llm_client', 'httpx', 'httpx2'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    server = start_stub_server(latency=args.latency)
+    state = server.state
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ['SOLUTION_CACHE_PATH'] = ''
+
+    from llm_client import LLMClient, CircuitBreaker, LLMUnavailableError
+
+    def pooled_client(**kwargs) -> LLMClient:
+        kwargs.setdefault('backoff_base', 0.05)
+        return LLMClient(api_key='stub', base_url=base_url, **kwargs)
+
+    # A new client per call opens a new connection every time
+    connections = state.connections
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        OpenAI(api_key='stub', base_url=base_url, max_retries=0).chat.completions.create(
+            model='gpt-4o', messages=MESSAGES, max_tokens=50)
+    fresh_time = time.perf_counter() - start
+    fresh_connections = state.connections - connections
+
+    llm = pooled_client(requests_per_minute=1e6, tokens_per_minute=1e9)
+    connections = state.connections
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        llm.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50)
+    pooled_time = time.perf_counter() - start
+    print(f"{args.requests} sequential requests, stub latency {args.latency * 1000:.0f}ms")
+    print(f"client per call:     {fresh_time:6.2f}s  {fresh_connections:3d} connections")
+    print(f"pooled client:       {pooled_time:6.2f}s  {state.connections - connections:3d} connections")
+
+    # Transient server errors are retried with backoff
+    state.fail_next(2, status=503)
+    start = time.perf_counter()
+    llm.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50)
+    print(f"two 503s, then ok:   {time.perf_counter() - start:6.2f}s  ({llm.stats()['retries']} retries)")
+
+    # A 429 pauses every caller for the Retry-After the server sent
+    state.fail_next(1, status=429, retry_after=1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: llm.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50),
+                          range(4)))
+    print(f"429 Retry-After 1s:  {time.perf_counter() - start:6.2f}s  for 4 concurrent requests")
+
+    # The request bucket spreads a burst out to the configured rate
+    limited = pooled_client(requests_per_minute=300, burst_seconds=1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(lambda _: limited.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50),
+                          range(20)))
+    elapsed = time.perf_counter() - start
+    print(f"20 requests at 5/s:  {elapsed:6.2f}s  ({20 / elapsed:.1f} req/s, "
+          f"{limited.stats()['throttledSeconds']:.1f}s throttled)")
+
+    # During an outage the breaker opens and callers fail fast
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=1.0)
+    outage = pooled_client(breaker=breaker, max_retries=1)
+    state.error_rate = 1.0
+    failures = 0
+    for _ in range(5):
+        try:
+            outage.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50, timeout=2)
+        except Exception:
+            failures += 1
+    upstream = state.requests
+    start = time.perf_counter()
+    rejected = 0
+    for _ in range(100):
+        try:
+            outage.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50)
+        except LLMUnavailableError:
+            rejected += 1
+    rejected_time = (time.perf_counter() - start) / 100
+    print(f"outage:              breaker {breaker.state} after {failures} failed calls; {rejected}/100 rejected "
+          f"in {rejected_time * 1e6:.0f}us each, {state.requests - upstream} sent upstream")
+
+    # After the reset timeout one trial request closes the breaker again
+    state.error_rate = 0.0
+    time.sleep(breaker.reset_timeout)
+    outage.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50)
+    print(f"recovery:            breaker {breaker.state} after a successful trial request")
+
+    # The solution service falls back to the default solutions without waiting
+    import openai_solution_service as service
+    service.llm_client.api_key = 'stub'
+    service.llm_client.base_url = base_url
+    service.llm_client.breaker = breaker
+    state.error_rate = 1.0
+    for _ in range(breaker.failure_threshold):
+        try:
+            service.llm_client.chat_completion(model='gpt-4o', messages=MESSAGES, max_tokens=50, timeout=2)
+        except Exception:
+            pass
+    start = time.perf_counter()
+    solutions = service.generate_solutions_for_company("Acme", use_cache=False)
+    assert solutions == {category: service.DEFAULT_SOLUTIONS[category] for category in service.CATEGORIES}
+    print(f"triple threat, open: {(time.perf_counter() - start) * 1000:6.1f}ms  default solutions for all categories")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Local stand-in for the OpenAI chat completions API with simulated latency,
+streamed responses and injectable failures (429 with Retry-After, 5xx).
+
+Start it and point the OpenAI client at it:
+    python -m benchmarks.llm_stub_server --port 8765 --latency 0.8
+    python -m benchmarks.llm_stub_server --latency 0.4 --token-delay 0.03
+    python -m benchmarks.llm_stub_server --error-rate 0.3 --error-status 503
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+STUB_SOLUTIONS = [
+    "Publish a one-page strategy brief and review it in every monthly all-hands",
+    "Assign an owner and a weekly metric to each of the top three priorities",
+    "Run a 60-day pilot with quarterly retrospectives to measure adoption",
+]
+
+class StubState:
+    """
+    Shared configuration and counters for the stub server
+    """
+
+    def __init__(self, latency: float = 0.5, error_rate: float = 0.0, error_status: int = 500,
+                 token_delay: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.content = "\n".join(STUB_SOLUTIONS)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._scripted = deque()
+        self._failing_prompts = {}
+
+    def fail_next(self, count: int, status: int = 500, retry_after: Optional[float] = None):
+        """
+        Answer the next `count` requests with an error status
+        """
+        with self.lock:
+            self._scripted.extend([(status, retry_after)] * count)
+
+    def fail_prompts_containing(self, text: str, status: int = 500):
+        """
+        Answer every request whose messages mention `text` with an error status
+        """
+        with self.lock:
+            self._failing_prompts[text] = status
+
+    def next_failure(self, prompt: str = '') -> Optional[tuple]:
+        with self.lock:
+            for text, status in self._failing_prompts.items():
+                if text in prompt:
+                    return status, None
+            if self._scripted:
+                return self._scripted.popleft()
+        if self.error_rate and random.random() < self.error_rate:
+            return self.error_status, None
+        return None
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        with state.lock:
+            state.requests += 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            time.sleep(state.latency)
+            failure = state.next_failure(json.dumps(body.get('messages', [])))
+            if failure is not None:
+                status, retry_after = failure
+                with state.lock:
+                    state.errors += 1
+                headers = {'Retry-After': str(retry_after)} if retry_after is not None else None
+                self._send_json(status, {"error": {"message": f"Stub error {status}", "type": "stub_error"}},
+                                headers)
+                return
+            # Completion text is generated word by word after the first token
+            words = state.content.split(' ')
+            if body.get('stream'):
+                self._send_stream(body, words)
+                return
+            time.sleep(state.token_delay * len(words))
+            self._send_json(200, {
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": state.content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 120, "completion_tokens": 60, "total_tokens": 180}
+            })
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _send_stream(self, body: dict, words: list):
+        """
+        Send the completion as server-sent chunks, one word at a time
+        """
+        state = self.server.state
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None, usage: Optional[dict] = None) -> dict:
+            return {
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                "usage": usage
+            }
+
+        def send(data: str):
+            payload = data.encode('utf-8')
+            self.wfile.write(f"{len(payload):x}\r\n".encode('ascii') + payload + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            send(f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}))}\n\n")
+            for index, word in enumerate(words):
+                if index:
+                    time.sleep(state.token_delay)
+                text = word if index == 0 else f" {word}"
+                send(f"data: {json.dumps(chunk({'content': text}))}\n\n")
+            send(f"data: {json.dumps(chunk({}, 'stop'))}\n\n")
+            if (body.get('stream_options') or {}).get('include_usage'):
+                usage = {"prompt_tokens": 120, "completion_tokens": len(words), "total_tokens": 120 + len(words)}
+                send(f"data: {json.dumps(chunk(None, usage=usage))}\n\n")
+            send("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_json(self, status: int, payload, headers: Optional[dict] = None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (e.g. its timeout expired) before the reply
+            pass
+
+def start_stub_server(port: int = 0, latency: float = 0.5, error_rate: float = 0.0,
+                      error_status: int = 500, token_delay: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Start the stub server on a background thread
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency: Seconds to wait before answering each request (the time to first token)
+        error_rate: Fraction of requests answered with error_status
+        error_status: HTTP status of the random errors
+        token_delay: Seconds to generate each further word of the completion
+
+    Returns:
+        Running server; its base URL is http://127.0.0.1:<server_port>/v1
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(latency, error_rate, error_status, token_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.error_rate, args.error_status, args.token_delay)
+    print(f"Stub OpenAI API listening on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
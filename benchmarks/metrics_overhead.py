@@ -0,0 +1,54 @@
+"""
+Measure what the metrics instrumentation costs: one counter increment, one
+stage span, and a full Flask request with metrics on and off.
+
+Run from the repository root:
+    python -m benchmarks.metrics_overhead --iterations 200000
+"""
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault("SURVEY_STORE_BACKEND", "memory")
+
+from metrics import registry, span
+
+def per_call(func, iterations: int) -> float:
+    """
+    Return the average cost of func() in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    counter = registry.counter('benchmark_events_total', 'Benchmark counter', ('kind',))
+
+    def stage():
+        with span('benchmark', 'noop'):
+            pass
+
+    print(f"counter increment: {per_call(lambda: counter.inc(kind='a'), args.iterations):6.2f}us")
+    print(f"stage span:        {per_call(stage, args.iterations):6.2f}us")
+
+    from flask_server import app
+    client = app.test_client()
+    client.get('/jobs')
+    results = {}
+    for enabled in (False, True, False, True):
+        registry.enabled = enabled
+        results.setdefault(enabled, []).append(per_call(lambda: client.get('/jobs'), args.requests))
+    off, on = min(results[False]), min(results[True])
+    print(f"GET /jobs:         {off:6.1f}us without metrics, {on:6.1f}us with ({on - off:+.1f}us)")
+    print(f"/metrics render:   {per_call(registry.render, 200) / 1000:6.2f}ms")
+
+if __name__ == '__main__':
+    main()
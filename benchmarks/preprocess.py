@@ -0,0 +1,74 @@
+"""
+Benchmark preprocess_text against the previous implementation (two regex
+passes, Punkt word_tokenize and a WordNet lookup per token) on individual
+comments and on a whole survey's text, and check the output is identical.
+
+Run from the repository root:
+    python -m benchmarks.preprocess --comments 20000 --rows 2000
+"""
+import argparse
+import logging
+import re
+import time
+
+from benchmarks import synthetic
+from benchmarks.topic_model import make_comments
+from data_processor import load_csv_survey
+from nlp_models import get_word_tokenizer, get_regex_tokenizer, get_stop_words, get_lemmatizer, warm_up
+from openai_service import preprocess_text, preprocess_texts, _lemmatize
+
+def reference_preprocess(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    tokens = get_word_tokenizer()(text)
+    stop_words = get_stop_words()
+    filtered_tokens = [word for word in tokens if word not in stop_words]
+    lemmatizer = get_lemmatizer()
+    return ' '.join(lemmatizer.lemmatize(word) for word in filtered_tokens)
+
+def clear_caches() -> None:
+    _lemmatize.cache_clear()
+    get_regex_tokenizer().cache_clear()
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=20_000)
+    parser.add_argument('--rows', type=int, default=2000, help="Responses in the whole-survey text")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    warm_up(['stopwords', 'lemmatizer', 'tokenizer', 'regex_tokenizer'])
+
+    comments = make_comments(args.comments, seed=7)
+    print(f"{len(comments):,} comments, {len(set(comments)):,} distinct")
+    expected, reference_time = timed(lambda: [reference_preprocess(comment) for comment in comments])
+    clear_caches()
+    nltk_result, nltk_time = timed(lambda: [preprocess_text(comment, tokenizer='nltk') for comment in comments])
+    clear_caches()
+    regex_result, regex_time = timed(lambda: [preprocess_text(comment) for comment in comments])
+    clear_caches()
+    batch_result, batch_time = timed(lambda: list(preprocess_texts(comments)))
+    assert nltk_result == regex_result == batch_result == expected
+    print(f"previous implementation:        {reference_time:7.2f}s")
+    print(f"memoized lemmas, Punkt:         {nltk_time:7.2f}s  ({reference_time / nltk_time:.1f}x)")
+    print(f"memoized lemmas, regex:         {regex_time:7.2f}s  ({reference_time / regex_time:.1f}x)")
+    print(f"preprocess_texts generator:     {batch_time:7.2f}s  ({reference_time / batch_time:.1f}x, identical output)")
+
+    # generate_insights preprocesses a survey without comments as one text
+    df = synthetic.employee_survey(args.rows)
+    text = str(load_csv_survey(synthetic.to_csv(df), 'Employee Survey', 'Q1 2024').to_dict())
+    expected, reference_time = timed(lambda: reference_preprocess(text))
+    clear_caches()
+    result, fast_time = timed(lambda: preprocess_text(text))
+    assert result == expected
+    print(f"survey text ({len(text) / 1e6:.1f}M characters)")
+    print(f"previous implementation:        {reference_time:7.2f}s")
+    print(f"preprocess_text:                {fast_time:7.2f}s  ({reference_time / fast_time:.1f}x, identical output)")
+
+if __name__ == '__main__':
+    main()
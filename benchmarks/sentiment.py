@@ -0,0 +1,66 @@
+"""
+Benchmark per-comment analyze_sentiment calls against the batch
+sentiment API with department aggregation.
+
+The batch scores each distinct text once, so its cost follows the number
+of distinct comments, not the total: with the defaults 500k comments are
+drawn from 20k distinct texts. Free-text comments that are all different
+still cost one VADER call each; the estimate for that case is printed too.
+
+Run from the repository root:
+    python -m benchmarks.sentiment --comments 500000 --distinct 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.topic_model import make_comments
+from openai_service import analyze_sentiment, analyze_sentiment_batch, aggregate_sentiment, _polarity_scores
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=500_000)
+    parser.add_argument('--distinct', type=int, default=20_000,
+                        help="Size of the pool comments are drawn from")
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--loop-sample', type=int, default=20_000,
+                        help="Comments scored one by one to estimate the per-call loop")
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    pool = make_comments(args.distinct, seed=7)
+    texts = [pool[i] for i in rng.integers(0, len(pool), args.comments)]
+    departments = rng.integers(0, args.departments, args.comments)
+    print(f"{args.comments:,} comments drawn from {len(set(pool)):,} distinct texts")
+
+    # Load VADER before timing
+    analyze_sentiment(texts[0])
+    sample = texts[:args.loop_sample]
+    start = time.perf_counter()
+    for text in sample:
+        analyze_sentiment(text)
+    loop_time = (time.perf_counter() - start) * len(texts) / len(sample)
+
+    _polarity_scores.cache_clear()
+    start = time.perf_counter()
+    scores = analyze_sentiment_batch(texts, n_process=args.processes)
+    by_department = aggregate_sentiment(scores, departments)
+    cold_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = analyze_sentiment_batch(texts, n_process=args.processes)
+    aggregate_sentiment(scores, departments)
+    warm_time = time.perf_counter() - start
+
+    distinct = len(set(texts))
+    print(f"per-comment loop (estimated): {loop_time:8.2f}s")
+    print(f"batch, cold cache:            {cold_time:8.2f}s  ({distinct:,} distinct texts scored)")
+    print(f"batch, warm cache:            {warm_time:8.2f}s")
+    print(f"batch, all distinct (est.):   {cold_time / distinct * len(texts):8.2f}s  "
+          f"(one VADER call per comment)")
+    print(f"departments aggregated:       {len(by_department)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Measure the memory of the production server: the gunicorn master, its web
+workers and the analysis pool processes each web worker starts, reported
+per process as RSS, PSS (shared pages split between the processes sharing
+them) and USS (pages no other process shares).
+
+Run from the repository root:
+    python -m benchmarks.server_memory --web-workers 2 --analysis-workers 1
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+from benchmarks.survey_memory import make_survey_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def memory(pid: int) -> Dict[str, int]:
+    """
+    Return RSS, PSS and USS of a process in bytes
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'uss': values['Private_Clean'] + values['Private_Dirty']}
+
+def children(pid: int) -> List[int]:
+    # Children are listed per thread, and the pool is started from a request thread
+    found = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            found += [int(child) for child in f.read().split()]
+    return found
+
+def command(pid: int) -> str:
+    with open(f'/proc/{pid}/cmdline', 'rb') as f:
+        return f.read().replace(b'\0', b' ').decode(errors='replace')
+
+def process_tree(master: int) -> List[Dict[str, Any]]:
+    """
+    Label every process under the gunicorn master by its role
+    """
+    processes = [{'role': 'master', 'pid': master}]
+    for worker in children(master):
+        processes.append({'role': 'web worker', 'pid': worker})
+        for helper in children(worker):
+            if 'forkserver' in command(helper):
+                processes.append({'role': 'forkserver', 'pid': helper})
+                processes += [{'role': 'analysis worker', 'pid': pid} for pid in children(helper)]
+            elif 'resource_tracker' in command(helper):
+                processes.append({'role': 'resource tracker', 'pid': helper})
+            else:
+                processes.append({'role': 'analysis worker', 'pid': helper})
+    for process in processes:
+        process.update(memory(process['pid']))
+    return processes
+
+def request(url: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=300) as response:
+        return json.loads(response.read())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--web-workers', type=int, default=2)
+    parser.add_argument('--analysis-workers', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--no-gc-freeze', action='store_true', help="skip gc.freeze() before forking workers")
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    workdir = tempfile.mkdtemp(prefix='server-memory-')
+    env = {**os.environ, 'PYTHONPATH': ROOT, 'GUNICORN_BIND': f"127.0.0.1:{args.port}",
+           'WEB_CONCURRENCY': str(args.web_workers), 'ANALYSIS_WORKERS': str(args.analysis_workers),
+           'GUNICORN_ACCESS_LOG': os.devnull, 'GUNICORN_LOG_LEVEL': 'warning',
+           'GUNICORN_GC_FREEZE': 'false' if args.no_gc_freeze else 'true'}
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+                               'wsgi:app'], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, 'gunicorn.log'), 'w'))
+    try:
+        deadline = time.time() + 300
+        while True:
+            try:
+                request(f"{base}/analysis-pool")
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"gunicorn did not start, see {workdir}/gunicorn.log")
+                time.sleep(0.5)
+
+        # Requests land on any web worker; keep uploading until every worker
+        # has analyzed a survey, so each one's analysis pool is running. Each
+        # upload is a different survey so none is answered from the insight cache.
+        # Concurrent uploads spread over the workers more evenly than sequential ones.
+        upload = lambda seed: request(f"{base}/upload-csv", {'fileContent': make_survey_csv(args.rows, 2, seed=seed),
+                                                            'async': False})
+        with ThreadPoolExecutor(max_workers=args.web_workers) as threads:
+            for attempt in range(20):
+                tree = process_tree(server.pid)
+                started = sum(process['role'] == 'analysis worker' for process in tree)
+                if attempt and started >= args.web_workers * args.analysis_workers:
+                    break
+                seeds = range(attempt * args.web_workers, (attempt + 1) * args.web_workers)
+                list(threads.map(upload, seeds))
+
+        time.sleep(1)
+        tree = process_tree(server.pid)
+        print(f"{args.web_workers} web workers, ANALYSIS_WORKERS={args.analysis_workers}, "
+              f"gc.freeze {'off' if args.no_gc_freeze else 'on'}, "
+              f"after analyzing a {args.rows}-response survey on each")
+        print(f"{'role':>17} {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}")
+        for process in tree:
+            print(f"{process['role']:>17} {process['pid']:>7} {process['rss'] / 2**20:8.1f} "
+                  f"{process['pss'] / 2**20:8.1f} {process['uss'] / 2**20:8.1f}")
+        print(f"{'total':>17} {'':>7} {sum(p['rss'] for p in tree) / 2**20:8.1f} "
+              f"{sum(p['pss'] for p in tree) / 2**20:8.1f} {sum(p['uss'] for p in tree) / 2**20:8.1f}")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare peak memory and throughput of the JSON-body CSV upload path with
+chunked streaming ingestion on large survey files.
+
+Run from the repository root:
+    python -m benchmarks.streaming_ingestion --size-mb 120
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+QUESTIONS = [f"{section}.{question:02d}_agreement" for section in range(1, 6) for question in range(1, 5)]
+COMMENTS = np.array([
+    "Leadership communicates the strategy clearly",
+    "Too many competing priorities this quarter",
+    "Great collaboration across teams",
+    None, None, None,
+], dtype=object)
+
+def write_survey_csv(path: str, size_mb: int, seed: int = 42) -> int:
+    """
+    Write a synthetic survey CSV of at least size_mb megabytes
+
+    Returns:
+        Number of rows written
+    """
+    rng = np.random.default_rng(seed)
+    rows = 0
+    first = True
+    while not os.path.exists(path) or os.path.getsize(path) < size_mb * 1024 * 1024:
+        count = 100_000
+        chunk = pd.DataFrame({
+            'Company name': rng.choice([f"Company {i}" for i in range(20)], count),
+            'Role': rng.choice(["Executive", "Manager", "Individual Contributor"], count),
+            'department': rng.choice([f"Department {i}" for i in range(100)], count),
+            **{question: rng.integers(1, 6, count) for question in QUESTIONS},
+            'comments': COMMENTS[rng.integers(0, len(COMMENTS), count)],
+        })
+        chunk.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        first = False
+        rows += count
+    return rows
+
+def run_legacy(path: str):
+    from data_processor import process_csv_data
+    with open(path) as f:
+        body = json.dumps({'fileContent': f.read()})
+    data = json.loads(body)
+    return process_csv_data(data['fileContent'], 'Employee Survey', 'Q1 2024')
+
+def run_stream(path: str, chunk_size: int):
+    from data_processor import load_survey_stream
+    with open(path, 'rb') as f:
+        return load_survey_stream(f, 'Employee Survey', 'Q1 2024', chunk_size=chunk_size)
+
+def child(mode: str, path: str, chunk_size: int):
+    start = time.perf_counter()
+    result = run_legacy(path) if mode == 'legacy' else run_stream(path, chunk_size)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': elapsed,
+        'peakRssMb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'responses': result['total_responses'] if mode == 'legacy' else len(result)
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=120)
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    parser.add_argument('--child', choices=['legacy', 'stream'])
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.path, args.chunk_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'survey.csv')
+        rows = write_survey_csv(path, args.size_mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{size_mb:.0f} MB CSV, {rows:,} rows")
+
+        for mode in ('legacy', 'stream'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.streaming_ingestion', '--child', mode,
+                 '--path', path, '--chunk-size', str(args.chunk_size)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>7}: peak RSS {stats['peakRssMb']:8.0f} MB, "
+                  f"{stats['seconds']:6.1f}s, {size_mb / stats['seconds']:6.1f} MB/s")
+
+if __name__ == '__main__':
+    main()
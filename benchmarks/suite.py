@@ -0,0 +1,428 @@
+"""
+Benchmark suite: per-function microbenchmarks and in-process endpoint load
+tests on deterministic synthetic surveys, saved as JSON baselines that later
+runs are compared against.
+
+Run from the repository root:
+    python -m benchmarks.suite list
+    python -m benchmarks.suite run --output benchmarks/baselines/reference.json
+    python -m benchmarks.suite compare benchmarks/baselines/reference.json --threshold 0.2
+"""
+import os
+
+# Keep runs self-contained and deterministic: in-memory survey store, no
+# cache or job files on disk, analysis inline in the calling thread, and
+# uploads answered without starting background insight jobs
+os.environ.update({
+    "SURVEY_STORE_BACKEND": "memory",
+    "INSIGHT_CACHE_PATH": "",
+    "SOLUTION_CACHE_PATH": "",
+    "JOB_STORE_PATH": "",
+    "METRICS_DIR": "",
+    "ANALYSIS_WORKERS": "0",
+    "JOB_MAX_PENDING": "0",
+})
+
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Callable, Optional
+
+import numpy as np
+
+from benchmarks import synthetic
+
+DEFAULT_THRESHOLD = 0.2
+
+class Benchmark:
+    """
+    A registered benchmark
+
+    Micro benchmarks time `number` calls of the callable their setup returns,
+    `repeat` times. Endpoint benchmarks send `requests` requests from
+    `concurrency` threads, each with its own Flask test client, in `repeat`
+    rounds and keep the round with the lowest median latency.
+    """
+
+    def __init__(self, name: str, kind: str, setup: Callable, repeat: int = 5, number: int = 1,
+                 requests: int = 200, concurrency: int = 4):
+        self.name = name
+        self.kind = kind
+        self.setup = setup
+        self.repeat = repeat
+        self.number = number
+        self.requests = requests
+        self.concurrency = concurrency
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+def micro(name: str, repeat: int = 5, number: int = 1):
+    """
+    Register a microbenchmark; the decorated setup returns the callable to time
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, 'micro', setup, repeat=repeat, number=number)
+        return setup
+    return decorator
+
+def endpoint(name: str, requests: int = 200, concurrency: int = 4, repeat: int = 3):
+    """
+    Register an endpoint load test; the decorated setup returns a function
+    that sends one request with a given test client and returns the response
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, 'endpoint', setup, repeat=repeat, requests=requests,
+                                     concurrency=concurrency)
+        return setup
+    return decorator
+
+# Inputs shared by several benchmarks, built on first use
+
+_fixtures = {}
+
+def fixture(name: str, build: Callable[[], Any]) -> Any:
+    if name not in _fixtures:
+        _fixtures[name] = build()
+    return _fixtures[name]
+
+def employee_csv(rows: int) -> str:
+    return fixture(f"employee_csv_{rows}", lambda: synthetic.to_csv(synthetic.employee_survey(rows)))
+
+def employee_columns(rows: int):
+    from data_processor import load_csv_survey
+    return fixture(f"employee_columns_{rows}",
+                   lambda: load_csv_survey(employee_csv(rows), 'Employee Survey', 'Q1 2024'))
+
+def app_with_survey():
+    """
+    Return the Flask app with one analyzed survey stored as id 1
+    """
+    def build():
+        from flask_server import app
+        client = app.test_client()
+        response = client.post('/upload-csv', json={
+            'fileContent': synthetic.to_csv(synthetic.employee_survey(300)),
+            'surveyType': 'Employee Survey', 'period': 'Q1 2024', 'company': 'Northwind', 'async': False
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f"Seeding the benchmark survey failed: {response.get_json()}")
+        return app
+    return fixture('app', build)
+
+# Ingestion
+
+@micro('process_csv_data/employee_20k', repeat=5)
+def bench_process_csv_employee():
+    from data_processor import process_csv_data
+    csv = employee_csv(20_000)
+    return lambda: process_csv_data(csv, 'Employee Survey', 'Q1 2024')
+
+@micro('process_csv_data/customer_20k', repeat=5)
+def bench_process_csv_customer():
+    from data_processor import process_csv_data
+    csv = synthetic.to_csv(synthetic.customer_feedback(20_000))
+    return lambda: process_csv_data(csv, 'Customer Feedback', 'Q1 2024')
+
+@micro('load_csv_survey/employee_20k', repeat=5)
+def bench_load_csv_survey():
+    from data_processor import load_csv_survey
+    csv = employee_csv(20_000)
+    return lambda: load_csv_survey(csv, 'Employee Survey', 'Q1 2024')
+
+@micro('survey_columns/select_view_20k', repeat=5, number=20)
+def bench_select_view():
+    columns = employee_columns(20_000)
+    filters = {'company_name': 'Northwind', 'department': 'Engineering'}
+    return lambda: columns.select(filters).to_dict()
+
+@micro('survey_columns/to_dict_20k', repeat=5, number=5)
+def bench_to_dict():
+    columns = employee_columns(20_000)
+    return columns.to_dict
+
+@micro('calculate_survey_kpis/employee_20k', repeat=5, number=5)
+def bench_survey_kpis():
+    from data_processor import calculate_survey_kpis
+    columns = employee_columns(20_000)
+    return lambda: calculate_survey_kpis(columns)
+
+# NLP
+
+@micro('preprocess_text/comments_1k', repeat=5)
+def bench_preprocess_text():
+    from openai_service import preprocess_text
+    comments = [comment for comment in synthetic.make_comments(1000) if comment]
+    preprocess_text(comments[0])
+    return lambda: [preprocess_text(comment) for comment in comments]
+
+@micro('analyze_sentiment_batch/comments_20k', repeat=5)
+def bench_sentiment_batch():
+    from openai_service import analyze_sentiment_batch, _polarity_scores
+    comments = list(synthetic.make_comments(20_000, seed=11))
+
+    def run():
+        # Score every distinct comment, not just the cached ones
+        _polarity_scores.cache_clear()
+        analyze_sentiment_batch(comments)
+    return run
+
+@micro('generate_insights/employee_150', repeat=3)
+def bench_generate_insights():
+    from data_processor import process_csv_data
+    from openai_service import generate_insights
+    data = process_csv_data(synthetic.to_csv(synthetic.employee_survey(150)), 'Employee Survey', 'Q1 2024')
+    generate_insights(data)
+    return lambda: generate_insights(data)
+
+# Voice
+
+@micro('parse_intent/commands_2k', repeat=5)
+def bench_parse_intent():
+    from voice_processor import parse_intent
+    commands = synthetic.voice_commands(2000)
+    parse_intent(commands[0])
+    return lambda: [parse_intent(command) for command in commands]
+
+@micro('process_voice_command/commands_1k', repeat=5)
+def bench_process_voice_command():
+    from voice_processor import process_voice_command
+    # Popular commands repeat, as they do in practice
+    pool = synthetic.voice_commands(200, seed=5)
+    ranks = np.minimum(np.random.default_rng(5).zipf(1.3, 1000), len(pool)) - 1
+    commands = [pool[rank] for rank in ranks]
+    process_voice_command(commands[0])
+    return lambda: [process_voice_command(command) for command in commands]
+
+# Endpoints
+
+@endpoint('POST /process-voice', requests=400)
+def bench_process_voice_endpoint():
+    app_with_survey()
+    commands = synthetic.voice_commands(100, seed=9)
+    counter = itertools.count()
+    return lambda client: client.post('/process-voice', json={
+        'transcript': commands[next(counter) % len(commands)], 'context': {'currentView': 'dashboard'}
+    })
+
+@endpoint('GET /kpi-data', requests=400)
+def bench_kpi_endpoint():
+    app_with_survey()
+    return lambda client: client.get('/kpi-data/1?viewLevel=company&company=Northwind')
+
+@endpoint('GET /generate-insights (cached)', requests=400)
+def bench_insights_endpoint():
+    app_with_survey()
+    return lambda client: client.get('/generate-insights/1')
+
+@endpoint('GET /surveys', requests=400)
+def bench_surveys_endpoint():
+    app_with_survey()
+    return lambda client: client.get('/surveys?company=Northwind')
+
+@endpoint('POST /upload-csv (2k rows)', requests=40, concurrency=2, repeat=1)
+def bench_upload_endpoint():
+    app_with_survey()
+    csv = employee_csv(2000)
+    return lambda client: client.post('/upload-csv', json={
+        'fileContent': csv, 'surveyType': 'Employee Survey', 'period': 'Q2 2024', 'company': 'Contoso'
+    })
+
+# Running and comparing
+
+def run_micro(benchmark: Benchmark) -> Dict[str, Any]:
+    func = benchmark.setup()
+    func()
+    times = []
+    for _ in range(benchmark.repeat):
+        start = time.perf_counter()
+        for _ in range(benchmark.number):
+            func()
+        times.append((time.perf_counter() - start) / benchmark.number)
+    return {
+        'kind': 'micro',
+        'median': statistics.median(times),
+        'min': min(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'repeat': benchmark.repeat,
+        'number': benchmark.number
+    }
+
+def run_endpoint(benchmark: Benchmark) -> Dict[str, Any]:
+    app = app_with_survey()
+    send = benchmark.setup()
+    response = send(app.test_client())
+    if response.status_code >= 400:
+        raise RuntimeError(f"{benchmark.name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    rounds = [load_round(app, send, benchmark) for _ in range(benchmark.repeat)]
+    # Scheduler noise only ever adds latency, so the quietest round is the most comparable
+    return min(rounds, key=lambda result: result['median'])
+
+def load_round(app, send: Callable, benchmark: Benchmark) -> Dict[str, Any]:
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = -(-benchmark.requests // benchmark.concurrency)
+
+    def worker():
+        client = app.test_client()
+        local = []
+        failed = 0
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            response = send(client)
+            local.append(time.perf_counter() - start)
+            failed += response.status_code >= 400
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker) for _ in range(benchmark.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'kind': 'endpoint',
+        'median': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+        'p99': float(np.percentile(latencies, 99)),
+        'throughput': len(latencies) / elapsed,
+        'requests': len(latencies),
+        'concurrency': benchmark.concurrency,
+        'rounds': benchmark.repeat,
+        'errors': sum(errors)
+    }
+
+def select(patterns: Optional[List[str]]) -> List[Benchmark]:
+    if not patterns:
+        return list(BENCHMARKS.values())
+    return [benchmark for name, benchmark in BENCHMARKS.items() if any(pattern in name for pattern in patterns)]
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'commit': commit
+    }
+
+def run_suite(benchmarks: List[Benchmark]) -> Dict[str, Any]:
+    results = {}
+    for benchmark in benchmarks:
+        runner = run_micro if benchmark.kind == 'micro' else run_endpoint
+        try:
+            result = runner(benchmark)
+        except Exception as e:
+            print(f"  {benchmark.name:<42} FAILED: {e}")
+            continue
+        results[benchmark.name] = result
+        line = f"  {benchmark.name:<42} {format_seconds(result['median']):>10}"
+        if result['kind'] == 'endpoint':
+            line += f"  p95 {format_seconds(result['p95']):>9}  {result['throughput']:8.1f} req/s"
+        print(line, flush=True)
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'results': results
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print median changes per benchmark and return the names that regressed
+    """
+    if baseline.get('environment', {}).get('machine') != current['environment']['machine'] or \
+            baseline.get('environment', {}).get('cpus') != current['environment']['cpus']:
+        print("warning: the baseline was recorded on a different machine; timings may not be comparable")
+
+    regressions = []
+    print(f"  {'benchmark':<42} {'baseline':>10} {'current':>10}  change")
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"  {name:<42} {'-':>10} {format_seconds(result['median']):>10}  new")
+            continue
+        change = result['median'] / before['median'] - 1
+        if change > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = ""
+        print(f"  {name:<42} {format_seconds(before['median']):>10} {format_seconds(result['median']):>10}  "
+              f"{change:+7.1%} {status}")
+    return regressions
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List the registered benchmarks")
+
+    run_parser = commands.add_parser('run', help="Run benchmarks and save the results as a baseline")
+    run_parser.add_argument('--output', default='benchmarks/baselines/latest.json')
+    run_parser.add_argument('--filter', nargs='*', help="Only run benchmarks whose name contains one of these")
+
+    compare_parser = commands.add_parser('compare', help="Compare against a baseline, exiting 1 on regressions")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current', nargs='?', help="Saved results to compare (runs the suite if omitted)")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative slowdown of the median that counts as a regression")
+    compare_parser.add_argument('--filter', nargs='*')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    if args.command == 'list':
+        for benchmark in BENCHMARKS.values():
+            print(f"{benchmark.kind:<9} {benchmark.name}")
+        return
+
+    if args.command == 'run':
+        results = run_suite(select(args.filter))
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {len(results['results'])} results to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_suite([benchmark for benchmark in select(args.filter) if benchmark.name in baseline['results']])
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"no regressions above {args.threshold:.0%}")
+
+if __name__ == '__main__':
+    main()
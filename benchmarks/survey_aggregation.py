@@ -0,0 +1,148 @@
+"""
+Benchmark the grouped department aggregation in process_employee_survey
+against the original per-department filter loop.
+
+Run from the repository root:
+    python -m benchmarks.survey_aggregation --rows 1000000 --departments 500
+"""
+import argparse
+import time
+from typing import Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from data_processor import process_employee_survey
+
+
+def make_employee_survey(rows: int, departments: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a synthetic employee survey with Likert and free-text columns
+    
+    Args:
+        rows: Number of responses
+        departments: Number of distinct departments
+        seed: Random seed for reproducibility
+        
+    Returns:
+        DataFrame with cleaned column names, as process_csv_data produces
+    """
+    rng = np.random.default_rng(seed)
+    dept_names = np.array([f"Department {i}" for i in range(departments)], dtype=object)
+    comments = np.array([
+        "Great team and clear goals",
+        "Communication could be better",
+        "Too many meetings",
+        "Leadership is supportive",
+        None,
+    ], dtype=object)
+    
+    return pd.DataFrame({
+        'department': dept_names[rng.integers(0, departments, rows)],
+        'strategic_clarity': rng.integers(1, 6, rows),
+        'relentless_focus': rng.integers(1, 6, rows),
+        'disciplined_execution': rng.integers(1, 6, rows),
+        'scalable_talent': rng.integers(1, 6, rows),
+        'energized_culture': rng.integers(1, 6, rows),
+        'comments': comments[rng.integers(0, len(comments), rows)],
+        'suggestions': comments[rng.integers(0, len(comments), rows)],
+    })
+
+
+def process_employee_survey_loop(df: pd.DataFrame, period: str) -> Dict[str, Any]:
+    """
+    Original implementation that re-filters the frame for every department
+    """
+    departments = df['department'].unique().tolist() if 'department' in df.columns else ['Unspecified']
+    
+    total_responses = len(df)
+    avg_scores = {}
+    department_data = {}
+    
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    
+    for col in numeric_cols:
+        avg_scores[col] = df[col].mean()
+    
+    for dept in departments:
+        dept_df = df[df['department'] == dept] if 'department' in df.columns else df
+        
+        dept_data = {
+            'responses': len(dept_df),
+            'averages': {}
+        }
+        
+        for col in numeric_cols:
+            dept_data['averages'][col] = dept_df[col].mean()
+        
+        text_cols = df.select_dtypes(include=['object']).columns
+        text_cols = [col for col in text_cols if col != 'department']
+        
+        if text_cols:
+            dept_data['text_responses'] = {}
+            for col in text_cols:
+                dept_data['text_responses'][col] = dept_df[col].dropna().tolist()
+        
+        department_data[dept] = dept_data
+    
+    return {
+        'survey_type': 'Employee Survey',
+        'period': period,
+        'total_responses': total_responses,
+        'departments': departments,
+        'overall_averages': avg_scores,
+        'department_data': department_data
+    }
+
+
+def assert_same_result(expected: Dict[str, Any], actual: Dict[str, Any]) -> None:
+    """
+    Check that both implementations produced the same output
+    """
+    assert expected['departments'] == actual['departments']
+    assert expected['total_responses'] == actual['total_responses']
+    for dept, dept_data in expected['department_data'].items():
+        other = actual['department_data'][dept]
+        assert dept_data['responses'] == other['responses'], dept
+        for col, value in dept_data['averages'].items():
+            assert np.isclose(value, other['averages'][col], equal_nan=True), (dept, col)
+        assert dept_data.get('text_responses') == other.get('text_responses'), dept
+
+
+def time_call(func, *args, repeat: int = 1) -> float:
+    """
+    Return the best wall-clock time over a number of runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--departments', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+    
+    df = make_employee_survey(args.rows, args.departments)
+    print(f"Synthetic survey: {args.rows:,} rows, {args.departments} departments")
+    
+    assert_same_result(
+        process_employee_survey_loop(df.head(10_000), 'Q1 2024'),
+        process_employee_survey(df.head(10_000), 'Q1 2024')
+    )
+    
+    loop_time = time_call(process_employee_survey_loop, df, 'Q1 2024', repeat=args.repeat)
+    grouped_time = time_call(process_employee_survey, df, 'Q1 2024', repeat=args.repeat)
+    
+    print(f"per-department loop: {loop_time:8.3f}s")
+    print(f"single groupby:      {grouped_time:8.3f}s")
+    print(f"speedup:             {loop_time / grouped_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure the memory a stored survey keeps resident: the processed data dict
+against the columnar form the survey store now holds.
+
+Run from the repository root:
+    python -m benchmarks.survey_memory --rows 100000 --text-columns 4
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_processor import process_csv_data, load_csv_survey
+
+QUESTIONS = [f"{section}.{question:02d}_agreement" for section in range(1, 6) for question in range(1, 5)]
+WORDS = np.array("the team manager workload strategy meetings growth support feedback clear "
+                 "priorities tools training remote office pay recognition process".split())
+
+def make_survey_csv(rows: int, text_columns: int, seed: int = 42) -> str:
+    """
+    Generate a synthetic employee survey CSV with free-text answers
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company name': rng.choice([f"Company {i}" for i in range(20)], rows),
+        'Role': rng.choice(["Executive", "Manager", "Individual Contributor"], rows),
+        'department': rng.choice([f"Department {i}" for i in range(30)], rows),
+        **{question: rng.integers(1, 6, rows) for question in QUESTIONS},
+    })
+    for index in range(text_columns):
+        lengths = rng.integers(3, 15, rows)
+        words = WORDS[rng.integers(0, len(WORDS), lengths.sum())]
+        answers = np.array([' '.join(chunk) for chunk in np.split(words, np.cumsum(lengths)[:-1])], dtype=object)
+        answers[rng.random(rows) < 0.3] = None
+        df[f"comment {index + 1}"] = answers
+    return df.to_csv(index=False)
+
+def retained(build):
+    """
+    Return (result, bytes still allocated once build returns, seconds)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--text-columns', type=int, default=4)
+    args = parser.parse_args()
+
+    csv = make_survey_csv(args.rows, args.text_columns)
+    per_100k = 100_000 / args.rows
+    print(f"{args.rows:,} rows, {len(QUESTIONS)} scores, {args.text_columns} free-text columns, "
+          f"{len(csv) / 1e6:.1f}MB of CSV")
+
+    data, dict_bytes, dict_seconds = retained(lambda: process_csv_data(csv, 'Employee Survey', 'Q1 2024'))
+    del data
+    columns, columnar_bytes, columnar_seconds = retained(lambda: load_csv_survey(csv, 'Employee Survey', 'Q1 2024'))
+    start = time.perf_counter()
+    columns.to_dict()
+    materialize = time.perf_counter() - start
+
+    print(f"processed dict:   {dict_bytes * per_100k / 1e6:8.1f}MB per 100k responses  (built in {dict_seconds:.2f}s)")
+    print(f"columnar survey:  {columnar_bytes * per_100k / 1e6:8.1f}MB per 100k responses  (built in {columnar_seconds:.2f}s, "
+          f"{columns.nbytes * per_100k / 1e6:.1f}MB in columns)")
+    print(f"reduction:        {dict_bytes / columnar_bytes:8.1f}x")
+    print(f"to_dict() at the API boundary: {materialize * 1000:.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare holding-to-team drill-downs by reparsing the upload with view
+filters against selecting the view from the survey's columns and looking
+up the precomputed KPI rollups.
+
+Run from the repository root:
+    python -m benchmarks.survey_views --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processor import process_csv_data, load_csv_survey, calculate_survey_kpis, view_filters
+from survey_store import InMemorySurveyStore
+
+COMPANIES = [f"Company {i}" for i in range(20)]
+ROLES = ["Executive", "Manager", "Individual Contributor"]
+
+def make_survey_csv(rows: int, seed: int = 42) -> str:
+    """
+    Generate a synthetic employee survey CSV
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company name': rng.choice(COMPANIES, rows),
+        'Role': rng.choice(ROLES, rows),
+        'department': rng.choice([f"Department {i}" for i in range(30)], rows),
+        **{f"{section}.{question:02d}_agreement": rng.integers(1, 6, rows)
+           for section in range(1, 6) for question in range(1, 5)},
+        'comments': rng.choice(["Clear strategy", "Too many meetings", None, None], rows),
+    })
+    return df.to_csv(index=False)
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    csv = make_survey_csv(args.rows)
+    columns = load_csv_survey(csv, 'Employee Survey', 'Q1 2024')
+    store = InMemorySurveyStore()
+    survey_id = store.create_survey('Employee Survey', 'Q1 2024', columns)
+    store.save_kpis(survey_id, calculate_survey_kpis(columns))
+    print(f"{args.rows:,} rows, {columns.nbytes / 1e6:.1f}MB of columns, "
+          f"{len(store.list_kpis(survey_id)):,} KPI rollups")
+
+    company, role = COMPANIES[3], ROLES[1]
+    filters = view_filters('team', company, role)
+    reparse = timed(lambda: process_csv_data(csv, 'Employee Survey', 'Q1 2024', 'team', company, role), 3)
+    selected = timed(lambda: columns.select(filters).to_dict(), 20)
+    lookup = timed(lambda: store.get_kpis(survey_id, company, role, ''), 10_000)
+
+    print(f"reparse with filters:  {reparse * 1000:10.2f}ms")
+    print(f"select from columns:   {selected * 1000:10.2f}ms  ({reparse / selected:.0f}x faster)")
+    print(f"KPI rollup lookup:     {lookup * 1e6:10.2f}us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Deterministic synthetic survey data shaped like real uploads: Company name,
+Role and department columns, 1-5 Likert questions and free-text comments.
+
+The same arguments always produce the same data, so benchmark results are
+comparable across runs and machines.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+COMPANIES = ["Northwind", "Contoso", "Fabrikam", "Tailspin", "Wingtip", "Litware", "Adatum", "Proseware"]
+ROLES = ["Executive", "Manager", "Individual Contributor"]
+DEPARTMENTS = ["Engineering", "Marketing", "Sales", "HR", "Product", "Finance", "Operations", "Support",
+               "Legal", "Design", "Data", "Security"]
+QUESTIONS = [f"{section}.{question:02d}_agreement" for section in range(1, 6) for question in range(1, 5)]
+CATEGORIES = ["Onboarding", "Billing", "Support", "Product quality", "Delivery"]
+
+# Comment fragments with a clear sentiment, combined into free-text answers
+POSITIVE = [
+    "leadership communicates the strategy clearly",
+    "great collaboration across teams",
+    "my manager supports my growth",
+    "recognition for good work has improved",
+    "flexible work policy is excellent",
+]
+NEGATIVE = [
+    "too many competing priorities this quarter",
+    "meetings take time away from focused work",
+    "career paths are unclear",
+    "tools are slow and outdated",
+    "workload is not sustainable",
+]
+NEUTRAL = [
+    "the new office layout",
+    "quarterly planning process",
+    "training budget for the team",
+    "remote onboarding",
+]
+
+def make_comments(count: int, seed: int = 7, missing: float = 0.0) -> np.ndarray:
+    """
+    Generate free-text answers mixing positive, negative and neutral fragments
+
+    Args:
+        count: Number of answers
+        seed: Random seed
+        missing: Fraction of answers left empty (None)
+
+    Returns:
+        Object array of answers
+    """
+    rng = np.random.default_rng(seed)
+    fragments = np.array(POSITIVE + NEGATIVE + NEUTRAL, dtype=object)
+    first = fragments[rng.integers(0, len(fragments), count)]
+    second = fragments[rng.integers(0, len(fragments), count)]
+    joiners = np.array([" and ", ", but ", ". Also ", "; "], dtype=object)[rng.integers(0, 4, count)]
+    comments = first + joiners + second
+    # Some answers are a single fragment
+    single = rng.random(count) < 0.4
+    comments[single] = first[single]
+    if missing:
+        comments[rng.random(count) < missing] = None
+    return comments
+
+def employee_survey(rows: int, text_columns: int = 2, companies: int = 4, departments: int = 8,
+                    seed: int = 42) -> pd.DataFrame:
+    """
+    Generate an employee survey with view dimensions, Likert scores and comments
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company name': np.array(COMPANIES[:companies], dtype=object)[rng.integers(0, companies, rows)],
+        'Role': np.array(ROLES, dtype=object)[rng.integers(0, len(ROLES), rows)],
+        'department': np.array(DEPARTMENTS[:departments], dtype=object)[rng.integers(0, departments, rows)],
+        **{question: rng.integers(1, 6, rows) for question in QUESTIONS},
+    })
+    for index in range(text_columns):
+        df[f"comment {index + 1}"] = make_comments(rows, seed=seed + index + 1, missing=0.3)
+    return df
+
+def customer_feedback(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate customer feedback with a category, ratings and a comment
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'category': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        'satisfaction': rng.integers(1, 6, rows),
+        'likelihood to recommend': rng.integers(0, 11, rows),
+        'feedback': make_comments(rows, seed=seed + 1, missing=0.2),
+    })
+
+def to_csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+def voice_commands(count: int, seed: int = 3) -> List[str]:
+    """
+    Generate spoken dashboard commands (filters, insights, comparisons, navigation)
+    """
+    from benchmarks.voice_intents import make_commands
+    return make_commands(count, seed=seed)
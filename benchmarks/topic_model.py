@@ -0,0 +1,99 @@
+"""
+Benchmark refitting TF-IDF + LDA on every batch against online partial_fit
+updates of a persistent topic model.
+
+Run from the repository root:
+    python -m benchmarks.topic_model --batches 20 --batch-size 2000
+"""
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from topic_model import OnlineTopicModel
+
+THEMES = {
+    'communication': ["communication", "transparency", "updates", "town", "halls", "information"],
+    'workload': ["workload", "meetings", "overtime", "deadlines", "burnout", "pressure"],
+    'growth': ["career", "growth", "training", "promotion", "mentoring", "learning"],
+    'leadership': ["leadership", "managers", "vision", "strategy", "decisions", "trust"],
+    'culture': ["culture", "team", "collaboration", "recognition", "values", "inclusion"],
+}
+FILLER = ["the", "our", "more", "better", "need", "would", "like", "really", "very", "good", "poor"]
+
+def make_comments(count: int, seed: int) -> List[str]:
+    """
+    Generate synthetic survey comments, each drawn mostly from one theme
+    """
+    rng = np.random.default_rng(seed)
+    themes = list(THEMES.values())
+    comments = []
+    for _ in range(count):
+        words = themes[rng.integers(len(themes))]
+        length = int(rng.integers(6, 16))
+        tokens = [words[rng.integers(len(words))] if rng.random() < 0.6 else FILLER[rng.integers(len(FILLER))]
+                  for _ in range(length)]
+        comments.append(' '.join(tokens))
+    return comments
+
+def refit_topics(texts: List[str], num_topics: int) -> List[str]:
+    """
+    Original approach: fit a new vectorizer and LDA model on every call
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation
+
+    vectorizer = TfidfVectorizer(max_features=100)
+    tfidf_matrix = vectorizer.fit_transform(texts)
+    lda = LatentDirichletAllocation(n_components=num_topics, random_state=42)
+    lda.fit(tfidf_matrix)
+    feature_names = vectorizer.get_feature_names_out()
+    return [' '.join(feature_names[i] for i in topic.argsort()[:-5:-1]) for topic in lda.components_]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--num-topics', type=int, default=5)
+    args = parser.parse_args()
+
+    batches = [make_comments(args.batch_size, seed) for seed in range(args.batches)]
+    print(f"{args.batches} batches of {args.batch_size:,} comments")
+
+    # Batch mode: each new batch triggers a full refit over everything seen so far
+    seen = []
+    start = time.perf_counter()
+    for batch in batches:
+        seen.extend(batch)
+        refit_topics(seen, args.num_topics)
+    refit_time = time.perf_counter() - start
+
+    # Incremental mode: fold in the new batch, then transform it
+    model = OnlineTopicModel('benchmark', num_topics=args.num_topics)
+    start = time.perf_counter()
+    for batch in batches:
+        model.partial_fit(batch)
+        model.extract_topics(batch, num_topics=3)
+    update_time = time.perf_counter() - start
+
+    # Per-request cost once a model exists
+    request = batches[-1][:50]
+    start = time.perf_counter()
+    for _ in range(100):
+        model.extract_topics(request, num_topics=3)
+    transform_time = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    for _ in range(10):
+        refit_topics(request, 3)
+    per_request_fit = (time.perf_counter() - start) / 10
+
+    print(f"refit on every batch:       {refit_time:8.3f}s")
+    print(f"partial_fit + transform:    {update_time:8.3f}s  ({refit_time / update_time:.1f}x faster)")
+    print(f"per-request fit (50 docs):  {per_request_fit * 1000:8.2f}ms")
+    print(f"per-request transform:      {transform_time * 1000:8.2f}ms")
+    print("topics:", model.topic_labels())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare sequential and concurrent generation of all five Triple Threat
+categories against the local stub OpenAI server, then measure the
+solution cache and single-flight coalescing.
+
+Run from the repository root:
+    python -m benchmarks.triple_threat --latency 0.8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.llm_stub_server import start_stub_server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.8)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency)
+    os.environ['OPENAI_BASE_URL'] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault('OPENAI_API_KEY', 'stub')
+    os.environ['SOLUTION_CACHE_PATH'] = ''
+
+    import openai_solution_service as service
+
+    start = time.perf_counter()
+    sequential = service.generate_solutions_for_company("Acme", concurrent=False, use_cache=False)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = service.generate_solutions_for_company("Acme", timeout=args.timeout, use_cache=False)
+    concurrent_time = time.perf_counter() - start
+
+    assert sequential.keys() == concurrent.keys()
+    assert all(len(solutions) == 3 for solutions in concurrent.values())
+
+    # A timeout shorter than the stub latency falls back to the default solutions
+    start = time.perf_counter()
+    timed_out = service.generate_solutions_for_company("Acme", timeout=args.latency / 4,
+                                                      use_cache=False)
+    timeout_time = time.perf_counter() - start
+    assert timed_out == {category: service.DEFAULT_SOLUTIONS[category] for category in service.CATEGORIES}
+
+    print(f"stub latency {args.latency:.2f}s per request")
+    print(f"sequential:          {sequential_time:6.2f}s")
+    print(f"concurrent:          {concurrent_time:6.2f}s  (max in flight: {server.state.max_in_flight})")
+    print(f"timeout fallback:    {timeout_time:6.2f}s  (circuit breaker {service.llm_client.breaker.state})")
+    # Five timed-out requests look like a degraded upstream; start the cache test from a closed breaker
+    service.llm_client.breaker.reset()
+
+    # 50 identical concurrent requests collapse into one upstream call
+    upstream_before = server.state.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        results = list(executor.map(lambda _: service.get_cached_solutions('relentless-focus', 'Acme'), range(50)))
+    burst_time = time.perf_counter() - start
+    assert all(result == results[0] for result in results)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        service.get_cached_solutions('relentless-focus', 'Acme')
+    hit_time = (time.perf_counter() - start) / 1000
+
+    stats = service.solution_cache_stats()
+    print(f"50 concurrent misses:{burst_time:6.2f}s  ({server.state.requests - upstream_before} upstream request, "
+          f"{stats['coalesced']} coalesced)")
+    print(f"cache hit:           {hit_time * 1e6:6.1f}us  (hit rate {stats['hitRate']:.1%}, "
+          f"{stats['avoidedLatencySeconds']:.0f}s upstream latency avoided)")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare when users see the first Triple Threat solution with the blocking
+endpoint and the server-sent events stream, against the local stub OpenAI
+server generating the completion word by word. Also checks that the
+streamed final solutions match the blocking ones for short, long and
+failed completions.
+
+Run from the repository root:
+    python -m benchmarks.triple_threat_stream --latency 0.4 --token-delay 0.03
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+from benchmarks.llm_stub_server import start_stub_server, STUB_SOLUTIONS
+
+CATEGORY = 'strategic-clarity'
+
+def stream(client, path: str):
+    """
+    Request a streamed SSE response and yield (event, payload, seconds since the request)
+    """
+    start = time.perf_counter()
+    response = client.get(path, buffered=False)
+    buffer = ''
+    for chunk in response.response:
+        buffer += chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.splitlines())
+            yield fields['event'], json.loads(fields['data']), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.4)
+    parser.add_argument('--token-delay', type=float, default=0.03)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for name in ('llm_client', 'httpx', 'httpx2', 'werkzeug'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    server = start_stub_server(latency=args.latency, token_delay=args.token_delay)
+    os.environ['OPENAI_BASE_URL'] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault('OPENAI_API_KEY', 'stub')
+    os.environ['SOLUTION_CACHE_PATH'] = ''
+    os.environ.setdefault('SURVEY_STORE_BACKEND', 'memory')
+
+    import openai_solution_service as service
+    from flask_server import app
+    client = app.test_client()
+
+    blocking, first, complete = [], [], []
+    for _ in range(args.repeat):
+        service.solution_cache.clear()
+        start = time.perf_counter()
+        client.get(f'/triple-threat-solutions/{CATEGORY}?company=Acme')
+        blocking.append(time.perf_counter() - start)
+
+        service.solution_cache.clear()
+        events = list(stream(client, f'/triple-threat-solutions/{CATEGORY}/stream?company=Acme'))
+        first.append(next(seconds for event, _, seconds in events if event == 'solution'))
+        complete.append(events[-1][2])
+
+    print(f"stub: {args.latency * 1000:.0f}ms to first token, {args.token_delay * 1000:.0f}ms per word")
+    print(f"blocking:            {statistics.median(blocking):6.2f}s until any solution is shown")
+    print(f"stream, first:       {statistics.median(first):6.2f}s")
+    print(f"stream, all three:   {statistics.median(complete):6.2f}s")
+
+    # The final solutions keep the blocking endpoint's truncation and fallback rules
+    cases = {
+        'five lines': "\n".join(STUB_SOLUTIONS + ["Fourth idea", "Fifth idea"]),
+        'one line': STUB_SOLUTIONS[0] + "\n\n",
+        'empty': "",
+    }
+    for name, content in cases.items():
+        server.state.content = content
+        service.solution_cache.clear()
+        expected = service.generate_triple_threat_solutions(CATEGORY, 'Acme')
+        events = list(stream(client, f'/triple-threat-solutions/{CATEGORY}/stream?company=Acme'))
+        final = events[-1][1]['solutions']
+        assert final == expected, (name, final, expected)
+        print(f"{name + ':':<21}identical final solutions ({len(events) - 1} solution events)")
+
+    server.state.content = "\n".join(STUB_SOLUTIONS)
+    server.state.fail_next(10, status=500)
+    service.solution_cache.clear()
+    events = list(stream(client, f'/triple-threat-solutions/{CATEGORY}/stream?company=Acme'))
+    assert events[-1][1]['solutions'] == service.DEFAULT_SOLUTIONS[CATEGORY]
+    print(f"upstream errors:     default solutions after {events[-1][2]:.2f}s")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
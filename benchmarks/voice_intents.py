@@ -0,0 +1,164 @@
+"""
+Compare voice intent matching with the compiled intent grammar against the
+previous substring scans over keyword lists.
+
+Run from the repository root:
+    python -m benchmarks.voice_intents --commands 20000
+"""
+import argparse
+import re
+import time
+from collections import Counter
+from typing import Dict, Any, List
+
+import numpy as np
+
+from nlp_models import get_word_tokenizer
+from voice_processor import get_voice_stop_words, parse_intent
+
+TEMPLATES = [
+    "show me {dept} results for the last {period}",
+    "filter to {dept} only",
+    "can you display {level} data for this {period}",
+    "give me a summary of {dept} feedback",
+    "compare {quarter} versus {quarter2} insights",
+    "analyze the {dept} survey",
+    "take me to the {destination}",
+    "go to {destination} please",
+    "navigate to {destination}",
+    "what changed in the three weeks since today",
+    "open the overall picture for small teams",
+    "show {level} scores from yesterday",
+]
+VALUES = {
+    'dept': ["engineering", "marketing", "sales", "HR", "human resources", "product", "finance"],
+    'period': ["week", "month", "quarter", "year", "day"],
+    'level': ["individual", "company", "all companies"],
+    'quarter': ["Q1", "Q2", "Q3", "Q4"],
+    'quarter2': ["Q1", "Q2", "Q3", "Q4"],
+    'destination': ["dashboard", "history page", "upload screen", "home", "timeline", "new survey form"],
+}
+
+def make_commands(count: int, seed: int = 3) -> List[str]:
+    rng = np.random.default_rng(seed)
+    commands = []
+    for _ in range(count):
+        template = TEMPLATES[rng.integers(len(TEMPLATES))]
+        commands.append(template.format(**{key: values[rng.integers(len(values))] for key, values in VALUES.items()}))
+    return commands
+
+def substring_keywords(transcript: str) -> List[str]:
+    """
+    The previous extract_intent_keywords: substring scans after word_tokenize
+    """
+    text = transcript.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    tokens = get_word_tokenizer()(text)
+    stop_words = get_voice_stop_words()
+    filtered_tokens = [word for word in tokens if word not in stop_words]
+
+    keywords = []
+    for word in ["filter", "show", "display", "view", "only", "see"]:
+        if word in text:
+            keywords.append("filter")
+            break
+    for dept in ["engineering", "marketing", "sales", "hr", "human resources", "product"]:
+        if dept in text:
+            keywords.append(dept)
+    for period in ["day", "week", "month", "quarter", "year", "q1", "q2", "q3", "q4"]:
+        if period in text:
+            keywords.append(period)
+    for word in ["compare", "comparison", "versus", "vs", "against"]:
+        if word in text:
+            keywords.append("compare")
+            break
+    for word in ["insight", "analyze", "analysis", "summary", "summarize"]:
+        if word in text:
+            keywords.append("insight")
+            break
+
+    word_freq = Counter(filtered_tokens)
+    keywords.extend(word for word, count in word_freq.most_common(5) if word not in keywords)
+    return keywords
+
+def substring_intent(transcript: str) -> Dict[str, Any]:
+    """
+    The previous process_voice_command rules, without the spaCy entity pass
+    """
+    keywords = substring_keywords(transcript)
+    action = "unknown"
+    parameters = {}
+
+    if "filter" in keywords:
+        action = "filter"
+        parameters["type"] = "data_filter"
+        for dept in ["engineering", "marketing", "sales", "hr", "product"]:
+            if dept in keywords:
+                parameters["department"] = dept.capitalize()
+                break
+        for period, label in (("week", "Last 7 days"), ("month", "Last 30 days"),
+                              ("quarter", "Last 90 days"), ("year", "Last 12 months")):
+            if period in keywords:
+                parameters["timePeriod"] = label
+                break
+        if "individual" in transcript.lower():
+            parameters["level"] = "Individual"
+        elif "company" in transcript.lower() and "all" not in transcript.lower():
+            parameters["level"] = "Company"
+        elif "all" in transcript.lower() and "company" in transcript.lower():
+            parameters["level"] = "All Companies"
+    elif "insight" in keywords or "summary" in keywords or "analyze" in keywords:
+        action = "insight"
+        if "compare" in keywords:
+            parameters["type"] = "comparison"
+            periods = [kw for kw in keywords if kw in ["q1", "q2", "q3", "q4", "quarter", "month", "year"]]
+            if len(periods) >= 2:
+                parameters["period1"], parameters["period2"] = periods[0], periods[1]
+        else:
+            parameters["type"] = "general"
+    elif any(kw in transcript.lower() for kw in ["go to", "navigate", "show me", "take me"]):
+        action = "navigate"
+        destinations = {"dashboard": ["dashboard", "home", "main"],
+                        "history": ["history", "activities", "timeline"],
+                        "upload": ["upload", "import", "new survey"]}
+        for dest, words in destinations.items():
+            if any(word in transcript.lower() for word in words):
+                parameters["destination"] = dest
+                break
+        parameters.setdefault("destination", "dashboard")
+    return {"action": action, "parameters": parameters}
+
+def throughput(func, commands: List[str]) -> float:
+    start = time.perf_counter()
+    for command in commands:
+        func(command)
+    return len(commands) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=20_000)
+    args = parser.parse_args()
+
+    commands = make_commands(args.commands)
+    # Load the tokenizer and stop words before timing
+    substring_intent(commands[0])
+    parse_intent(commands[0])
+
+    old_rate = throughput(substring_intent, commands)
+    new_rate = throughput(parse_intent, commands)
+    print(f"{len(commands):,} commands from {len(TEMPLATES)} templates")
+    print(f"substring scans:  {old_rate:10,.0f} commands/s")
+    print(f"intent grammar:   {new_rate:10,.0f} commands/s  ({new_rate / old_rate:.1f}x)")
+
+    changed = {}
+    for command in set(commands):
+        old = substring_intent(command)
+        new = parse_intent(command)
+        if (old['action'], old['parameters']) != (new['action'], new['parameters']):
+            changed[command] = (old, new)
+    print(f"{len(changed)} distinct commands resolve differently, e.g.:")
+    for command, (old, new) in sorted(changed.items())[:8]:
+        print(f"  {command!r}\n    before: {old['action']} {old['parameters']}\n    after:  {new['action']} {new['parameters']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Report p50/p99 latency per voice command with the spaCy entity pass the
+previous process_voice_command ran (and never read) against the current
+grammar-only path.
+
+Run from the repository root:
+    python -m benchmarks.voice_latency --commands 5000
+"""
+import argparse
+import logging
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.voice_intents import make_commands
+from nlp_models import get_spacy_model
+from voice_processor import process_voice_command, parse_intent
+
+def full_pipeline_command(transcript: str):
+    """
+    The previous process_voice_command: every spaCy component runs on every command
+    """
+    entities = {}
+    for ent in get_spacy_model()(transcript).ents:
+        if ent.label_ in ["DATE", "TIME"]:
+            entities["time"] = ent.text
+        elif ent.label_ in ["ORG", "PRODUCT"]:
+            entities["department"] = ent.text
+    return parse_intent(transcript)
+
+def latencies(func, commands: List[str]) -> np.ndarray:
+    times = np.empty(len(commands))
+    for index, command in enumerate(commands):
+        start = time.perf_counter()
+        func(command)
+        times[index] = time.perf_counter() - start
+    return times * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=2000,
+                        help="Size of the pool commands are drawn from")
+    args = parser.parse_args()
+    logging.getLogger('voice_processor').setLevel(logging.WARNING)
+
+    # Popular commands repeat far more often than the rest
+    rng = np.random.default_rng(11)
+    pool = make_commands(args.distinct, seed=11)
+    ranks = np.minimum(rng.zipf(1.3, args.commands), len(pool)) - 1
+    commands = [pool[rank] for rank in ranks]
+    print(f"{len(commands):,} commands, {len(set(commands)):,} distinct")
+
+    # Load the pipeline and stop words before timing
+    full_pipeline_command(pool[0])
+    process_voice_command(pool[0])
+    assert all(full_pipeline_command(command) == process_voice_command(command) for command in pool)
+
+    for name, func in (("spaCy entity pass", full_pipeline_command),
+                       ("grammar only", process_voice_command)):
+        times = latencies(func, commands)
+        print(f"{name:>17}: p50 {np.percentile(times, 50):7.3f}ms  p99 {np.percentile(times, 99):7.3f}ms  "
+              f"mean {times.mean():7.3f}ms")
+
+if __name__ == '__main__':
+    main()
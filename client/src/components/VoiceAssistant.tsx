@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef, useCallback } from 'react';
 import { 
   Dialog, 
   DialogContent, 
@@ -10,6 +10,7 @@ import { Button } from "@/components/ui/button";
 import { X, Mic, Keyboard, ChevronRight } from "lucide-react";
 import useSpeechRecognition from "@/hooks/useSpeechRecognition";
 import { apiRequest } from "@/lib/queryClient";
+import { startVoiceSession, type VoiceSession, type VoiceCommandResult } from "@/lib/voiceSession";
 import { useToast } from "@/hooks/use-toast";
 
 interface VoiceAssistantProps {
@@ -22,12 +23,15 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
   const [isProcessing, setIsProcessing] = useState(false);
   const [transcript, setTranscript] = useState("");
   const [response, setResponse] = useState<string | null>(null);
+  const [provisionalResponse, setProvisionalResponse] = useState<string | null>(null);
   const [isTextMode, setIsTextMode] = useState(false);
   const [textInput, setTextInput] = useState("");
   const { toast } = useToast();
+  const sessionRef = useRef<VoiceSession | null>(null);
 
   const {
     transcript: recognizedText,
+    interimTranscript,
     isListening: recognitionActive,
     startListening,
     stopListening,
@@ -35,11 +39,38 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
     error: recognitionError
   } = useSpeechRecognition();
 
+  const closeSession = useCallback(() => {
+    sessionRef.current?.close();
+    sessionRef.current = null;
+  }, []);
+
+  // Start recognition along with a voice session that resolves the command as it is spoken
+  const beginListening = useCallback(() => {
+    closeSession();
+    setProvisionalResponse(null);
+    sessionRef.current = startVoiceSession({ currentView: "dashboard" }, {
+      onProvisional: (data) => setProvisionalResponse(data.response),
+      onFinal: (data) => {
+        sessionRef.current = null;
+        showResult(data);
+        setIsProcessing(false);
+        stopListening();
+        setIsListening(false);
+      },
+      onError: () => {
+        // Process Query still resolves the transcript with a single request
+        sessionRef.current = null;
+        setIsProcessing(false);
+      },
+    });
+    startListening();
+    setIsListening(true);
+  }, [closeSession, startListening, stopListening]);
+
   // Start listening when the modal opens
   useEffect(() => {
     if (isOpen && hasRecognitionSupport && !isTextMode) {
-      startListening();
-      setIsListening(true);
+      beginListening();
     }
     // Reset transcript and response when modal is opened
     if (isOpen) {
@@ -47,12 +78,25 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
       setResponse(null);
       setTextInput("");
     }
-  }, [isOpen, hasRecognitionSupport, isTextMode, startListening]);
+    return closeSession;
+  }, [isOpen, hasRecognitionSupport, isTextMode, beginListening, closeSession]);
 
-  // Update transcript from recognition
+  // Send the utterance to the voice session while it is being spoken
+  useEffect(() => {
+    if (interimTranscript) {
+      setTranscript(interimTranscript);
+      sessionRef.current?.sendPartial(interimTranscript);
+    }
+  }, [interimTranscript]);
+
+  // Update transcript from recognition and resolve the finished command
   useEffect(() => {
     if (recognizedText) {
       setTranscript(recognizedText);
+      if (sessionRef.current) {
+        setIsProcessing(true);
+        sessionRef.current.finish(recognizedText);
+      }
     }
   }, [recognizedText]);
 
@@ -83,12 +127,7 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
       });
       
       const data = await res.json();
-      
-      // Display response
-      setResponse(data.response);
-      
-      // Handle the action response based on the result
-      handleActionResponse(data);
+      showResult(data);
       
     } catch (error) {
       toast({
@@ -103,6 +142,15 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
     }
   };
 
+  const showResult = (data: VoiceCommandResult) => {
+    // Display response
+    setResponse(data.response);
+    setProvisionalResponse(null);
+    
+    // Handle the action response based on the result
+    handleActionResponse(data);
+  };
+
   // Handle the different actions that could come from the voice processing
   const handleActionResponse = (data: any) => {
     if (!data.action || data.action === "unknown") {
@@ -141,12 +189,11 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
 
   const toggleInputMode = () => {
     if (!isTextMode) {
+      closeSession();
       stopListening();
       setIsListening(false);
-    } else if (hasRecognitionSupport) {
-      startListening();
-      setIsListening(true);
     }
+    // Switching back to voice restarts listening from the effect above
     setIsTextMode(!isTextMode);
   };
 
@@ -217,6 +264,12 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
                 </div>
               )}
               
+              {provisionalResponse && !response && (
+                <div className="border border-dashed border-primary/20 rounded-md p-3 mt-3">
+                  <p className="text-sm text-neutral-500">{provisionalResponse}</p>
+                </div>
+              )}
+              
               {response && (
                 <div className="bg-primary/5 border border-primary/20 rounded-md p-3 mt-3">
                   <p className="text-sm">{response}</p>
@@ -260,8 +313,7 @@ export default function VoiceAssistant({ isOpen, onClose }: VoiceAssistantProps)
               setTranscript("");
               setResponse(null);
               if (!isTextMode && hasRecognitionSupport) {
-                startListening();
-                setIsListening(true);
+                beginListening();
               }
             }}>
               Ask another question
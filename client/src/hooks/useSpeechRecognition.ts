@@ -2,6 +2,7 @@ import { useState, useEffect, useCallback } from 'react';
 
 interface SpeechRecognitionHook {
   transcript: string;
+  interimTranscript: string;
   isListening: boolean;
   startListening: () => void;
   stopListening: () => void;
@@ -12,6 +13,7 @@ interface SpeechRecognitionHook {
 
 const useSpeechRecognition = (): SpeechRecognitionHook => {
   const [transcript, setTranscript] = useState('');
+  const [interimTranscript, setInterimTranscript] = useState('');
   const [isListening, setIsListening] = useState(false);
   const [error, setError] = useState<string | null>(null);
   
@@ -35,6 +37,7 @@ const useSpeechRecognition = (): SpeechRecognitionHook => {
   
   const resetTranscript = useCallback(() => {
     setTranscript('');
+    setInterimTranscript('');
   }, []);
   
   const startListening = useCallback(() => {
@@ -79,14 +82,18 @@ const useSpeechRecognition = (): SpeechRecognitionHook => {
     // Recognition event handlers
     recognition.onresult = (event: any) => {
       let finalTranscript = '';
+      let utterance = '';
       
       for (let i = event.resultIndex; i < event.results.length; i++) {
         const transcript = event.results[i][0].transcript;
         if (event.results[i].isFinal) {
           finalTranscript += transcript;
         }
+        utterance += transcript;
       }
       
+      // Everything recognized so far, including words that may still change
+      setInterimTranscript(utterance);
       if (finalTranscript) {
         setTranscript(finalTranscript);
       }
@@ -120,6 +127,7 @@ const useSpeechRecognition = (): SpeechRecognitionHook => {
   
   return {
     transcript,
+    interimTranscript,
     isListening,
     startListening,
     stopListening,
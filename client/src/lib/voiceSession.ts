@@ -0,0 +1,98 @@
+import { apiRequest } from "./queryClient";
+
+export interface VoiceCommandResult {
+  action: string;
+  parameters: Record<string, any>;
+  response: string;
+  transcript?: string;
+  success?: boolean;
+}
+
+export interface VoiceSessionHandlers {
+  onProvisional?: (result: VoiceCommandResult) => void;
+  onFinal: (result: VoiceCommandResult) => void;
+  onError: (message: string) => void;
+}
+
+export interface VoiceSession {
+  sendPartial: (transcript: string) => void;
+  finish: (transcript?: string) => void;
+  close: () => void;
+}
+
+/**
+ * Resolve a voice command while it is still being spoken.
+ *
+ * Each interim transcript is POSTed to the session as it arrives and the
+ * resolved intents come back over an EventSource: a 'provisional' event
+ * whenever the action changes and a 'final' event once finish() is called.
+ * Without a transcript, finish() resolves the last partial sent.
+ */
+export function startVoiceSession(context: Record<string, any>, handlers: VoiceSessionHandlers): VoiceSession {
+  let closed = false;
+  let events: EventSource | null = null;
+  let lastSent: string | null = null;
+
+  const close = () => {
+    closed = true;
+    events?.close();
+  };
+
+  const fail = (error: unknown) => {
+    if (closed) return;
+    close();
+    handlers.onError(error instanceof Error ? error.message : "Voice session failed");
+  };
+
+  const sessionId: Promise<string> = apiRequest("POST", "/api/process-voice/sessions", { context })
+    .then((res) => res.json())
+    .then((data) => {
+      if (!closed) {
+        events = new EventSource(`/api/process-voice/sessions/${data.sessionId}/events`);
+        events.addEventListener("provisional", (event) => {
+          handlers.onProvisional?.(JSON.parse((event as MessageEvent).data));
+        });
+        events.addEventListener("final", (event) => {
+          close();
+          handlers.onFinal(JSON.parse((event as MessageEvent).data));
+        });
+        events.addEventListener("error", (event) => {
+          // Error events sent by the server carry a payload; dropped connections
+          // are retried by the browser unless it has given up
+          const data = (event as MessageEvent).data;
+          if (data) {
+            fail(new Error(JSON.parse(data).error));
+          } else if (events?.readyState === EventSource.CLOSED) {
+            fail(new Error("Lost connection to the voice session"));
+          }
+        });
+      }
+      return data.sessionId;
+    });
+  sessionId.catch(fail);
+
+  // Transcripts are sent one at a time so the server sees them in order
+  let queue: Promise<void> = Promise.resolve();
+  const send = (body: { transcript?: string; final?: boolean }) => {
+    queue = queue
+      .then(async () => {
+        if (closed) return;
+        const id = await sessionId;
+        await apiRequest("POST", `/api/process-voice/sessions/${id}/partials`, body);
+      })
+      .catch(fail);
+  };
+
+  return {
+    sendPartial: (transcript: string) => {
+      if (closed || !transcript.trim() || transcript === lastSent) return;
+      lastSent = transcript;
+      send({ transcript });
+    },
+    finish: (transcript?: string) => {
+      if (closed) return;
+      send({ transcript, final: true });
+    },
+    close,
+  };
+}
@@ -1,8 +1,14 @@
 import pandas as pd
+import numpy as np
 import io
+import os
+import re
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, BinaryIO
+
+from survey_columns import ColumnarSurvey, ColumnarSurveyBuilder, VIEW_DIMENSIONS
+from metrics import span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
@@ -27,41 +33,128 @@ def process_csv_data(file_content: str, survey_type: str, period: str, view_leve
     """
     try:
         # Parse CSV content
-        df = pd.read_csv(io.StringIO(file_content))
+        with span('process_csv_data', 'parse'):
+            df = pd.read_csv(io.StringIO(file_content))
         
         # Basic data validation
         if df.empty:
             raise ValueError("CSV file is empty")
         
         # Apply view level filtering
-        # First make sure we have the columns needed for filtering
-        if 'Company name' in df.columns and 'Role' in df.columns:
-            # Apply filters based on view_level
-            if view_level == "company" and company:
-                df = df[df['Company name'] == company]
-            elif view_level == "team" and company and role:
-                df = df[
-                    (df['Company name'] == company) & 
-                    (df['Role'] == role)
-                ]
-            # 'holding' level uses the full dataset
-            # 'individual' level is not implemented yet
+        with span('process_csv_data', 'filter'):
+            df = filter_view_level(df, view_level, company, role)
         
         # Clean column names after filtering
-        df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
+        df.columns = clean_column_names(df.columns)
         
         # Process based on survey type
-        if survey_type == 'Employee Survey':
-            return process_employee_survey(df, period)
-        elif survey_type == 'Customer Feedback':
-            return process_customer_feedback(df, period)
-        else:
-            return process_generic_survey(df, period)
+        with span('process_csv_data', 'aggregate'):
+            if survey_type == 'Employee Survey':
+                return process_employee_survey(df, period)
+            elif survey_type == 'Customer Feedback':
+                return process_customer_feedback(df, period)
+            else:
+                return process_generic_survey(df, period)
     
     except Exception as e:
         logger.error(f"Error processing CSV data: {str(e)}")
         raise
 
+def filter_view_level(df: pd.DataFrame, view_level: str = "holding", company: Optional[str] = None,
+                      role: Optional[str] = None) -> pd.DataFrame:
+    """
+    Filter survey rows to a view level
+    
+    Args:
+        df: DataFrame with the original (uncleaned) column names
+        view_level: Level to filter data at (individual, team, company, holding)
+        company: Company name to filter by (for company and team view levels)
+        role: Role to filter by (for team view level)
+        
+    Returns:
+        Filtered DataFrame
+    """
+    # First make sure we have the columns needed for filtering
+    if 'Company name' in df.columns and 'Role' in df.columns:
+        # Apply filters based on view_level
+        if view_level == "company" and company:
+            df = df[df['Company name'] == company]
+        elif view_level == "team" and company and role:
+            df = df[
+                (df['Company name'] == company) & 
+                (df['Role'] == role)
+            ]
+        # 'holding' level uses the full dataset
+        # 'individual' level is not implemented yet
+    
+    return df
+
+def clean_column_names(columns) -> List[str]:
+    """
+    Normalize column names to lowercase snake case
+    """
+    return [col.strip().lower().replace(' ', '_') for col in columns]
+
+def view_filters(view_level: str = "holding", company: Optional[str] = None, role: Optional[str] = None,
+                 department: Optional[str] = None) -> Dict[str, str]:
+    """
+    Translate a view level into equality filters on the view dimensions
+    
+    Follows filter_view_level: 'company' needs a company, 'team' needs a
+    company and a role, and anything else is the full (holding) view. A
+    department narrows any view further.
+    
+    Returns:
+        Mapping of cleaned dimension column to required value
+    """
+    filters = {}
+    if view_level == "company" and company:
+        filters['company_name'] = company
+    elif view_level == "team" and company and role:
+        filters['company_name'] = company
+        filters['role'] = role
+    if department:
+        filters['department'] = department
+    return filters
+
+# Month names for parsing period labels
+MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+               'august', 'september', 'october', 'november', 'december']
+
+def period_sort_key(period: Optional[str]) -> Optional[tuple]:
+    """
+    Turn a survey period label into a sortable (year, month) key
+    
+    Understands labels such as 'Q3 2024', '2024 Q3', 'H1 2024', 'March 2024',
+    '2024-03' and '2024'.
+    
+    Returns:
+        (year, first month of the period), or None if the label is not recognized
+    """
+    if not period:
+        return None
+    text = period.strip().lower()
+    year_match = re.search(r'\b(19|20)\d{2}\b', text)
+    if not year_match:
+        return None
+    year = int(year_match.group(0))
+    rest = (text[:year_match.start()] + ' ' + text[year_match.end():]).strip(' -/')
+    
+    if not rest:
+        return (year, 1)
+    quarter = re.fullmatch(r'q([1-4])', rest)
+    if quarter:
+        return (year, 3 * int(quarter.group(1)) - 2)
+    half = re.fullmatch(r'h([12])', rest)
+    if half:
+        return (year, 6 * int(half.group(1)) - 5)
+    if rest.isdigit() and 1 <= int(rest) <= 12:
+        return (year, int(rest))
+    for number, name in enumerate(MONTH_NAMES, start=1):
+        if rest.startswith(name[:3]) and name.startswith(rest.rstrip('.')):
+            return (year, number)
+    return None
+
 def process_employee_survey(df: pd.DataFrame, period: str) -> Dict[str, Any]:
     """
     Process employee survey data
@@ -87,26 +180,49 @@ def process_employee_survey(df: pd.DataFrame, period: str) -> Dict[str, Any]:
     for col in numeric_cols:
         avg_scores[col] = df[col].mean()
     
+    # Text columns are shared by every department
+    text_cols = df.select_dtypes(include=['object', 'string']).columns
+    text_cols = [col for col in text_cols if col != 'department']
+    
+    # Group once and reuse the same grouping for counts, means and text
+    if 'department' in df.columns:
+        grouped = df.groupby('department', sort=False)
+        group_sizes = grouped.size().to_dict()
+        group_means = grouped[list(numeric_cols)].mean().to_dict('index')
+        group_indices = grouped.indices
+    else:
+        group_sizes = {'Unspecified': total_responses}
+        group_means = {'Unspecified': dict(avg_scores)}
+        group_indices = {'Unspecified': np.arange(total_responses)}
+    
+    # Pull text columns out once so each department only takes its positions
+    text_values = {}
+    for col in text_cols:
+        values = df[col].to_numpy(dtype=object)
+        text_values[col] = (values, pd.notna(values))
+    
     # Process by department
     for dept in departments:
-        dept_df = df[df['department'] == dept] if 'department' in df.columns else df
-        
-        dept_data = {
-            'responses': len(dept_df),
-            'averages': {}
-        }
-        
-        for col in numeric_cols:
-            dept_data['averages'][col] = dept_df[col].mean()
+        if dept in group_indices:
+            positions = group_indices[dept]
+            dept_data = {
+                'responses': group_sizes[dept],
+                'averages': {col: group_means[dept][col] for col in numeric_cols}
+            }
+        else:
+            # Missing department values never match an equality filter
+            positions = np.array([], dtype=np.intp)
+            dept_data = {
+                'responses': 0,
+                'averages': {col: np.nan for col in numeric_cols}
+            }
         
         # Process text responses if available
-        text_cols = df.select_dtypes(include=['object']).columns
-        text_cols = [col for col in text_cols if col != 'department']
-        
         if text_cols:
             dept_data['text_responses'] = {}
             for col in text_cols:
-                dept_data['text_responses'][col] = dept_df[col].dropna().tolist()
+                values, present = text_values[col]
+                dept_data['text_responses'][col] = values[positions][present[positions]].tolist()
         
         department_data[dept] = dept_data
     
@@ -161,7 +277,7 @@ def process_customer_feedback(df: pd.DataFrame, period: str) -> Dict[str, Any]:
     
     # Process text feedback if available
     feedback_data = {}
-    text_cols = df.select_dtypes(include=['object']).columns
+    text_cols = df.select_dtypes(include=['object', 'string']).columns
     text_cols = [col for col in text_cols if col != 'category']
     
     for col in text_cols:
@@ -202,7 +318,7 @@ def process_generic_survey(df: pd.DataFrame, period: str) -> Dict[str, Any]:
     
     # Process categorical questions
     categorical_data = {}
-    cat_cols = df.select_dtypes(include=['object']).columns
+    cat_cols = df.select_dtypes(include=['object', 'string']).columns
     
     for col in cat_cols:
         value_counts = df[col].value_counts().to_dict()
@@ -219,21 +335,181 @@ def process_generic_survey(df: pd.DataFrame, period: str) -> Dict[str, Any]:
     
     return result
 
-def calculate_kpi_data(data: Dict[str, Any]) -> Dict[str, Any]:
+# Rows parsed per chunk when streaming uploads
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 50_000))
+
+def iter_csv_chunks(stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
     """
-    Calculate KPI data from processed survey data
+    Parse a CSV file object in chunks of rows
+    
+    Args:
+        stream: Readable file object (text or binary)
+        chunk_size: Rows per chunk
+        
+    Yields:
+        DataFrame per chunk
+    """
+    for chunk in pd.read_csv(stream, chunksize=chunk_size):
+        yield chunk
+
+def iter_xlsx_chunks(stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read the first sheet of an .xlsx file (as pd.read_excel does) in chunks
+    of rows using openpyxl's read-only mode, with the first row as the header
+    
+    Args:
+        stream: Seekable binary file object
+        chunk_size: Rows per chunk
+        
+    Yields:
+        DataFrame per chunk
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+        width = len(columns)
+        
+        batch = []
+        for row in rows:
+            # Skip blank rows, as read_csv does
+            if all(value is None for value in row):
+                continue
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+def load_csv_survey(file_content: str, survey_type: str, period: str) -> ColumnarSurvey:
+    """
+    Parse CSV content into a compact columnar survey
+    
+    Args:
+        file_content: String containing CSV content
+        survey_type: Type of survey (Employee Survey, Customer Feedback, etc.)
+        period: Survey period (Q1 2023, etc.)
+        
+    Returns:
+        ColumnarSurvey holding every row of the upload
+    """
+    with span('load_csv_survey', 'parse'):
+        df = pd.read_csv(io.StringIO(file_content))
+    if df.empty:
+        raise ValueError("CSV file is empty")
+    df.columns = clean_column_names(df.columns)
+    with span('load_csv_survey', 'columns'):
+        return ColumnarSurvey.from_frame(df, survey_type, period)
+
+def load_survey_stream(stream: BinaryIO, survey_type: str, period: str, file_format: str = "csv",
+                       chunk_size: int = STREAM_CHUNK_SIZE) -> ColumnarSurvey:
+    """
+    Parse an uploaded CSV or XLSX file chunk by chunk into a columnar survey
+    
+    Only one chunk is held as a DataFrame at a time; parsed rows are kept as
+    float32 scores, categorical codes and packed text.
+    
+    Args:
+        stream: File object positioned at the start of the upload
+        survey_type: Type of survey (Employee Survey, Customer Feedback, etc.)
+        period: Survey period (Q1 2023, etc.)
+        file_format: 'csv' or 'xlsx'
+        chunk_size: Rows parsed per chunk
+        
+    Returns:
+        ColumnarSurvey holding every row of the upload
+    """
+    if file_format == 'xlsx':
+        chunks = iter_xlsx_chunks(stream, chunk_size)
+    elif file_format == 'csv':
+        chunks = iter_csv_chunks(stream, chunk_size)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    
+    builder = ColumnarSurveyBuilder(survey_type, period)
+    with span('load_survey_stream', 'parse'):
+        for chunk in chunks:
+            builder.add_chunk(chunk.set_axis(clean_column_names(chunk.columns), axis=1))
+    with span('load_survey_stream', 'columns'):
+        return builder.build()
+
+def process_survey_stream(stream: BinaryIO, survey_type: str, period: str, file_format: str = "csv",
+                          chunk_size: int = STREAM_CHUNK_SIZE, view_level: str = "holding",
+                          company: Optional[str] = None, role: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process an uploaded CSV or XLSX file chunk by chunk
+    
+    Gives the same result as process_csv_data on the whole file.
+    
+    Args:
+        stream: File object positioned at the start of the upload
+        survey_type: Type of survey (Employee Survey, Customer Feedback, etc.)
+        period: Survey period (Q1 2023, etc.)
+        file_format: 'csv' or 'xlsx'
+        chunk_size: Rows parsed per chunk
+        view_level: Level to filter data at (individual, team, company, holding)
+        company: Company name to filter by (for company and team view levels)
+        role: Role to filter by (for team view level)
+        
+    Returns:
+        Dictionary containing processed data
+    """
+    try:
+        survey = load_survey_stream(stream, survey_type, period, file_format, chunk_size)
+        return survey.select(view_filters(view_level, company, role)).to_dict()
+    
+    except Exception as e:
+        logger.error(f"Error processing streamed survey data: {str(e)}")
+        raise
+
+def _average_rating(survey_type: str, averages: Dict[str, Any]) -> float:
+    """
+    Average the per-question means that look like 1-5 ratings
+    """
+    avg_score = 0
+    score_count = 0
+    
+    if survey_type in ('Employee Survey', 'Customer Feedback'):
+        for metric, value in averages.items():
+            # Only consider metrics that could be ratings (between 1-5)
+            if 1 <= value <= 5:
+                avg_score += value
+                score_count += 1
+    
+    if score_count > 0:
+        avg_score = round(float(avg_score) / score_count, 1)
+    return avg_score
+
+def calculate_kpi_rollups(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Calculate the survey-level KPI row from processed survey data
+    
+    Used for surveys stored before their columns were kept; see
+    calculate_survey_kpis for the per-slice rollups. Changes are left as
+    None; see apply_kpi_deltas.
     
     Args:
         data: Processed survey data
         
     Returns:
-        Dictionary containing KPI data
+        List holding the single survey-level KPI row
     """
+    survey_type = data['survey_type']
+    
     # Extract completion rate
     total_participants = 0
     completed_participants = 0
     
-    if data['survey_type'] == 'Employee Survey':
+    if survey_type == 'Employee Survey':
         for dept, dept_data in data['department_data'].items():
             # Assume responses are completed participants
             dept_total = dept_data.get('total', dept_data.get('responses', 0))
@@ -251,42 +527,136 @@ def calculate_kpi_data(data: Dict[str, Any]) -> Dict[str, Any]:
     if total_participants > 0:
         participation_rate = round((completed_participants / total_participants) * 100)
     
-    # Calculate average score
-    avg_score = 0
-    score_count = 0
+    return [_kpi_row('', '', '', int(data.get('total_responses', 0)), participation_rate,
+                     _average_rating(survey_type, data.get('overall_averages', {})))]
+
+def calculate_survey_kpis(survey: ColumnarSurvey) -> List[Dict[str, Any]]:
+    """
+    Calculate KPI rollups for a survey and for every slice of its view dimensions
     
-    if data['survey_type'] == 'Employee Survey':
-        for metric, value in data.get('overall_averages', {}).items():
-            # Only consider metrics that could be ratings (between 1-5)
-            if 1 <= value <= 5:
-                avg_score += value
-                score_count += 1
-    elif data['survey_type'] == 'Customer Feedback':
-        for metric, value in data.get('overall_averages', {}).items():
-            # Only consider metrics that could be ratings (between 1-5)
-            if 1 <= value <= 5:
-                avg_score += value
-                score_count += 1
+    Slices cover each combination of company, role and department, with ''
+    meaning all values of a dimension (the survey-level row has '' for all
+    three). The survey-level row matches calculate_kpi_rollups on the
+    processed data. Changes are left as None; see apply_kpi_deltas.
     
-    if score_count > 0:
-        avg_score = round(avg_score / score_count, 1)
+    Args:
+        survey: Columnar survey
+        
+    Returns:
+        List of KPI rows
+    """
+    survey_type = survey.survey_type
+    _, responses, means = survey.grouped_totals([])
+    total_responses = len(survey)
+    
+    # Employee participation only counts rows that belong to a department
+    participants = total_responses
+    if survey_type == 'Employee Survey' and 'department' in survey.categorical:
+        participants = int((survey.categorical['department'][0] >= 0).sum())
+    
+    rows = [_kpi_row('', '', '', total_responses, 100 if participants else 0,
+                     _average_rating(survey_type, {col: values[0] for col, values in means.items()}))]
+    
+    # Every combination of grouped dimensions, so any drill-down is a single lookup
+    names = dict(zip(VIEW_DIMENSIONS, ('company', 'role', 'department')))
+    dims = [col for col in VIEW_DIMENSIONS if col in survey.categorical]
+    for mask in range(1, 2 ** len(dims)):
+        grouped = [col for bit, col in enumerate(dims) if mask >> bit & 1]
+        keys, responses, means = survey.grouped_totals(grouped)
+        # Dimension columns are constant within a slice, so they are not scores
+        means = {col: values for col, values in means.items() if col not in VIEW_DIMENSIONS}
+        for index, key in enumerate(keys):
+            values = dict(zip(grouped, key))
+            # Slices only know completed responses, so any slice with responses is fully participating
+            rows.append(_kpi_row(*(str(values[col]) if col in values else '' for col in names),
+                                 int(responses[index]), 100 if responses[index] else 0,
+                                 _average_rating(survey_type, {col: column[index] for col, column in means.items()})))
+    return rows
+
+def _kpi_row(company: str, role: str, department: str, responses: int, participation_rate: int,
+             average_score: float) -> Dict[str, Any]:
+    return {
+        'company': company,
+        'role': role,
+        'department': department,
+        'responses': responses,
+        'participationRate': participation_rate,
+        'averageScore': average_score,
+        'participationChange': None,
+        'scoreChange': None,
+        'previousSurveyId': None,
+        'previousPeriod': None
+    }
+
+def apply_kpi_deltas(rows: List[Dict[str, Any]], previous_rows: List[Dict[str, Any]],
+                     previous_survey_id: Optional[int] = None,
+                     previous_period: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fill in period-over-period changes from an earlier survey's KPI rows
     
-    # Mock changes for demo purposes
-    participation_change = 5
-    score_change = 0.3
+    Slices missing from the earlier survey keep None changes.
     
-    # Prepare the KPI data
-    result = {
+    Args:
+        rows: KPI rows of the current survey
+        previous_rows: KPI rows of the earlier survey (empty if there is none)
+        previous_survey_id: ID of the earlier survey
+        previous_period: Period of the earlier survey
+        
+    Returns:
+        The updated rows
+    """
+    previous = {(row['company'], row['role'], row['department']): row for row in previous_rows}
+    for row in rows:
+        prior = previous.get((row['company'], row['role'], row['department']))
+        if prior is None:
+            row.update({'participationChange': None, 'scoreChange': None,
+                        'previousSurveyId': None, 'previousPeriod': None})
+            continue
+        row.update({
+            'participationChange': row['participationRate'] - prior['participationRate'],
+            'scoreChange': round(row['averageScore'] - prior['averageScore'], 1),
+            'previousSurveyId': previous_survey_id,
+            'previousPeriod': previous_period
+        })
+    return rows
+
+def format_kpi_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a KPI row as the /kpi-data response
+    
+    A change of 0 is reported when there is no earlier period to compare with.
+    """
+    participation_change = row['participationChange'] or 0
+    score_change = row['scoreChange'] or 0
+    
+    return {
         "participation": {
-            "rate": participation_rate,
+            "rate": row['participationRate'],
             "change": participation_change,
             "direction": "up" if participation_change >= 0 else "down"
         },
         "averageScore": {
-            "score": avg_score,
+            "score": row['averageScore'],
             "change": score_change,
             "direction": "up" if score_change >= 0 else "down"
-        }
+        },
+        "responses": row['responses'],
+        "previousPeriod": row['previousPeriod']
     }
+
+def calculate_kpi_data(data: Dict[str, Any], previous_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Calculate KPI data from processed survey data
     
-    return result
+    Args:
+        data: Processed survey data
+        previous_data: Processed data of an earlier period to compute changes against
+        
+    Returns:
+        Dictionary containing KPI data
+    """
+    rows = calculate_kpi_rollups(data)[:1]
+    if previous_data is not None:
+        apply_kpi_deltas(rows, calculate_kpi_rollups(previous_data)[:1],
+                         previous_period=previous_data.get('period'))
+    return format_kpi_row(rows[0])
@@ -1,13 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import pandas as pd
 import json
 import os
+import time
 import logging
-from openai_service import generate_insights, analyze_text
+from openai_service import generate_survey_insights, analyze_text, update_survey_topic_model
 from luzmo_service import get_dashboard_embed
-from data_processor import process_csv_data, calculate_kpi_data
+from data_processor import (load_csv_survey, load_survey_stream, calculate_kpi_rollups, calculate_survey_kpis,
+                            apply_kpi_deltas, format_kpi_row, period_sort_key, view_filters)
 from voice_processor import process_voice_command
-from openai_solution_service import generate_triple_threat_solutions
+from voice_sessions import VoiceSessionStore, VoiceSessionNotFoundError, VoiceSessionClosedError
+from openai_solution_service import (get_cached_solutions, generate_solutions_for_company,
+                                     stream_triple_threat_solutions, solution_cache_stats, LLM_REQUEST_TIMEOUT)
+from survey_store import get_survey_store, survey_fingerprint
+from job_queue import JobQueue, QueueFullError
+from analysis_pool import analysis_pool, AnalysisPoolFullError, server_preload_models
+from llm_client import llm_client
+from insight_service import insight_cache, insight_cache_key, generate_batch_insights
+from nlp_models import warm_up, model_stats
+from topic_model import topic_family
+from metrics import registry as metrics_registry
 
 app = Flask(__name__)
 
@@ -16,8 +28,214 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# In-memory storage for uploaded data
-survey_data = {}
+# Persistent storage for uploaded data, shared by all workers
+survey_store = get_survey_store()
+
+# Sections of the processed data that KPI rollups of surveys stored without columns are computed from
+KPI_SECTIONS = ['survey_type', 'total_responses', 'department_data', 'overall_averages']
+
+class ViewUnavailableError(Exception):
+    """
+    Raised when a filtered view is requested of a survey stored without its columns
+    """
+
+# Background workers for insight generation after upload
+job_queue = JobQueue()
+
+# Voice commands resolved while they are spoken, shared by all workers
+voice_sessions = VoiceSessionStore()
+
+# Seconds between comments sent on an idle voice event stream
+VOICE_KEEPALIVE_INTERVAL = float(os.environ.get("VOICE_KEEPALIVE_INTERVAL", 15))
+
+# Latency of every request, labelled with the route pattern rather than the path
+REQUEST_LATENCY = metrics_registry.histogram('http_request_duration_seconds',
+                                             'Flask request latency by route, method and status',
+                                             ('method', 'route', 'status'))
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """
+    Record the request's latency (for streamed responses, the time to the first byte)
+    """
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route,
+                                status=response.status_code)
+    return response
+
+def get_cached_insights(key, load_survey, family=None, block=False, refresh=False):
+    """
+    Generate insights for a survey, reusing cached results
+    
+    The survey is only loaded on a cache miss. Uncached insights are
+    generated on the analysis pool, which only materializes the processed
+    data in its worker process.
+    
+    Args:
+        key: Insight cache key (see insight_cache_key)
+        load_survey: Callable returning the ColumnarSurvey, or the processed
+            data of a survey stored without columns
+        family: Topic model family of the survey
+        block: Wait for a free analysis slot instead of raising AnalysisPoolFullError
+        refresh: Drop any cached insights and generate them again
+    """
+    if refresh:
+        insight_cache.delete(key)
+    insights = None if refresh else insight_cache.get(key)
+    if insights is None:
+        insights = analysis_pool.run(generate_survey_insights, load_survey(), family, block=block)
+        insight_cache.set(key, insights)
+    return insights
+
+def analyze_upload(survey, family, block=True):
+    """
+    Update the family's topic model with a new survey, then generate its insights
+    """
+    try:
+        analysis_pool.run(update_survey_topic_model, survey, family, block=block)
+    except AnalysisPoolFullError:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating topic model {family}: {str(e)}")
+    key = insight_cache_key(survey_fingerprint(survey), family)
+    return get_cached_insights(key, lambda: survey, family, block=block)
+
+def pool_busy(error, **fields):
+    """
+    Build a 503 response telling the client when to retry a saturated analysis pool
+    """
+    logger.warning(f"Rejected analysis request: {str(error)}")
+    return jsonify({"error": str(error), **fields}), 503, {"Retry-After": str(error.retry_after)}
+
+def request_view():
+    """
+    Read the view level query parameters of a request
+    
+    Returns:
+        Tuple of (view_level, company, role, department)
+    """
+    return (request.args.get('viewLevel', 'holding'), request.args.get('company'),
+            request.args.get('role'), request.args.get('department'))
+
+def find_previous_survey(survey):
+    """
+    Find the latest survey of the same type and company from an earlier period
+    """
+    period_key = period_sort_key(survey['period'])
+    if period_key is None:
+        return None
+    
+    previous = None
+    for candidate in survey_store.list_surveys(company=survey['company'], survey_type=survey['type']):
+        candidate_key = period_sort_key(candidate['period'])
+        if candidate['company'] != survey['company'] or candidate_key is None or candidate_key >= period_key:
+            continue
+        if previous is None or (candidate_key, candidate['id']) > (period_sort_key(previous['period']), previous['id']):
+            previous = candidate
+    return previous
+
+def find_next_survey(survey):
+    """
+    Find the earliest survey of the same type and company from a later period
+    """
+    period_key = period_sort_key(survey['period'])
+    if period_key is None:
+        return None
+    
+    following = None
+    for candidate in survey_store.list_surveys(company=survey['company'], survey_type=survey['type']):
+        candidate_key = period_sort_key(candidate['period'])
+        if candidate['company'] != survey['company'] or candidate_key is None or candidate_key <= period_key:
+            continue
+        if following is None or (candidate_key, -candidate['id']) < (period_sort_key(following['period']), -following['id']):
+            following = candidate
+    return following
+
+def with_kpi_deltas(survey, rows):
+    """
+    Fill in KPI changes against the survey's previous period
+    """
+    previous = find_previous_survey(survey)
+    if previous is None:
+        return apply_kpi_deltas(rows, [])
+    return apply_kpi_deltas(rows, load_kpi_rows(previous), previous['id'], previous['period'])
+
+def load_kpi_rows(survey):
+    """
+    Return a survey's KPI rollups, computing them for surveys stored before rollups existed
+    """
+    rows = survey_store.list_kpis(survey['id'])
+    if not rows:
+        columns = survey_store.get_columns(survey['id'])
+        if columns is not None:
+            rows = calculate_survey_kpis(columns)
+        else:
+            rows = calculate_kpi_rollups(survey_store.get_survey(survey['id'], sections=KPI_SECTIONS)['data'])
+        rows = with_kpi_deltas(survey, rows)
+        survey_store.save_kpis(survey['id'], rows)
+    return rows
+
+def store_kpis(survey_id, columns):
+    """
+    Precompute and store KPI rollups for a new survey
+    
+    The survey from the next later period (if any) is compared against the
+    new one from now on, so its changes are recomputed too.
+    """
+    survey = survey_store.get_survey(survey_id, sections=[])
+    rows = with_kpi_deltas(survey, calculate_survey_kpis(columns))
+    survey_store.save_kpis(survey_id, rows)
+    
+    following = find_next_survey(survey)
+    following_rows = survey_store.list_kpis(following['id']) if following else []
+    if following_rows:
+        survey_store.save_kpis(following['id'], with_kpi_deltas(following, following_rows))
+
+def store_and_analyze(columns, survey_type, period, company, run_async):
+    """
+    Store a parsed upload and generate its insights, in the background
+    unless run_async is false
+    """
+    # Store the survey and allocate its id
+    survey_id = survey_store.create_survey(survey_type, period, columns, company=company)
+    store_kpis(survey_id, columns)
+    family = topic_family(company, survey_type)
+    
+    if not run_async:
+        # Generate insights while the request waits
+        try:
+            insights = analyze_upload(columns, family, block=False)
+        except AnalysisPoolFullError as e:
+            return pool_busy(e, surveyId=survey_id)
+        
+        return jsonify({
+            "success": True,
+            "surveyId": survey_id,
+            "message": f"Successfully processed {survey_type} for {period}",
+            "insights": insights
+        })
+    
+    # Generate insights in the background
+    try:
+        job_id = job_queue.submit('insights', analyze_upload, columns, family,
+                                  metadata={'surveyId': survey_id})
+    except QueueFullError as e:
+        logger.warning(f"Insight queue full for survey {survey_id}: {str(e)}")
+        job_id = None
+    
+    return jsonify({
+        "success": True,
+        "surveyId": survey_id,
+        "jobId": job_id,
+        "status": "queued" if job_id else "deferred",
+        "message": f"Successfully processed {survey_type} for {period}"
+    }), 202
 
 @app.route('/upload-csv', methods=['POST'])
 def upload_csv():
@@ -32,33 +250,46 @@ def upload_csv():
         file_content = data['fileContent']
         survey_type = data.get('surveyType', 'Employee Survey')
         period = data.get('period', 'Q4 2023')
+        company = data.get('company')
+        run_async = data.get('async', True)
         
-        # Process the CSV data
-        processed_data = process_csv_data(file_content, survey_type, period)
-        
-        # Store in memory
-        survey_id = len(survey_data) + 1
-        survey_data[survey_id] = {
-            'id': survey_id,
-            'type': survey_type,
-            'period': period,
-            'data': processed_data
-        }
-        
-        # Generate insights
-        insights = generate_insights(processed_data)
+        # Parse the CSV data into columns
+        columns = load_csv_survey(file_content, survey_type, period)
         
-        return jsonify({
-            "success": True,
-            "surveyId": survey_id,
-            "message": f"Successfully processed {survey_type} for {period}",
-            "insights": insights
-        })
+        return store_and_analyze(columns, survey_type, period, company, run_async)
     
     except Exception as e:
         logger.error(f"Error processing CSV upload: {str(e)}")
         return jsonify({"error": f"Failed to process CSV: {str(e)}"}), 500
 
+@app.route('/upload-file', methods=['POST'])
+def upload_file():
+    """
+    Handle a multipart CSV or XLSX upload, parsed in chunks as it is read
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({"error": "No file provided"}), 400
+        
+        extension = os.path.splitext(upload.filename)[1].lower()
+        if extension not in ('.csv', '.xlsx'):
+            return jsonify({"error": f"Unsupported file type: {extension or 'unknown'}"}), 400
+        
+        survey_type = request.form.get('surveyType', 'Employee Survey')
+        period = request.form.get('period', 'Q4 2023')
+        company = request.form.get('company')
+        run_async = request.form.get('async', 'true').lower() not in ('0', 'false', 'no')
+        
+        # Parse the file into columns chunk by chunk
+        columns = load_survey_stream(upload.stream, survey_type, period, file_format=extension.lstrip('.'))
+        
+        return store_and_analyze(columns, survey_type, period, company, run_async)
+    
+    except Exception as e:
+        logger.error(f"Error processing file upload: {str(e)}")
+        return jsonify({"error": f"Failed to process file: {str(e)}"}), 500
+
 @app.route('/process-voice', methods=['POST'])
 def process_voice():
     """
@@ -86,13 +317,93 @@ def process_voice():
         logger.error(f"Error processing voice command: {str(e)}")
         return jsonify({"error": f"Failed to process voice command: {str(e)}"}), 500
 
+def sse_event(event, payload, event_id=None):
+    """
+    Format one server-sent event with a JSON payload
+    """
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/process-voice/sessions', methods=['POST'])
+def create_voice_session():
+    """
+    Start resolving a voice command while it is still being spoken
+    
+    The client sends each interim transcript to the session's partials
+    route and reads the resolved intents from its events route.
+    """
+    data = request.get_json(silent=True) or {}
+    session_id = voice_sessions.create(data.get('context', {}))
+    return jsonify({"sessionId": session_id}), 201
+
+@app.route('/process-voice/sessions/<session_id>/partials', methods=['POST'])
+def add_voice_partial(session_id):
+    """
+    Add a transcript to a voice session
+    
+    The body is {"transcript": "show me eng", "final": false}, where
+    transcript holds the utterance so far. A final message ends the
+    session; without a transcript the last partial is used.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        voice_sessions.add_transcript(session_id, data.get('transcript'), final=bool(data.get('final')))
+        return jsonify({"success": True})
+    
+    except VoiceSessionNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except VoiceSessionClosedError as e:
+        return jsonify({"error": str(e)}), 409
+
+@app.route('/process-voice/sessions/<session_id>/events', methods=['GET'])
+def voice_session_events(session_id):
+    """
+    Stream the resolved intents of a voice session
+    
+    The response is a text/event-stream with a 'provisional' event whenever
+    the resolved action changes and a 'final' event, shaped like the
+    /process-voice response, once the final transcript arrives. Events carry
+    their position as the SSE id, so a reconnecting EventSource resumes
+    after the last one it received.
+    """
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+        voice_sessions.events(session_id)
+    except ValueError:
+        return jsonify({"error": "Invalid event position"}), 400
+    except VoiceSessionNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    
+    def events():
+        position = after
+        try:
+            while True:
+                batch, finished = voice_sessions.events(session_id, position, timeout=VOICE_KEEPALIVE_INTERVAL)
+                for kind, payload in batch:
+                    position += 1
+                    yield sse_event(kind, payload, event_id=position)
+                if finished:
+                    return
+                if not batch:
+                    # Keeps idle connections from being closed by proxies
+                    yield ": keepalive\n\n"
+        
+        except VoiceSessionNotFoundError as e:
+            yield sse_event('error', {"error": str(e)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/generate-insights/<int:survey_id>', methods=['GET'])
 def get_insights(survey_id):
     """
     Generate insights for a specific survey
     """
     try:
-        if survey_id not in survey_data:
+        filters = view_filters(*request_view())
+        
+        survey = survey_store.get_survey(survey_id, sections=[])
+        if survey is None:
             # If we don't have data for this survey, return mock data
             return jsonify({
                 "title": "Employee satisfaction has increased by 12% over the last quarter",
@@ -101,18 +412,158 @@ def get_insights(survey_id):
                 "isPositive": True
             })
         
-        # Get the survey data
-        data = survey_data[survey_id]['data']
+        family = topic_family(survey['company'], survey['type'])
+        key = insight_cache_key(survey_store.get_fingerprint(survey_id), family, filters)
+        
+        def load_view():
+            # Select the requested view from the survey's columns
+            columns = survey_store.get_columns(survey_id)
+            if columns is not None:
+                return columns.select(filters)
+            if filters:
+                raise ViewUnavailableError("Survey was stored without its columns; upload it again to enable view filtering")
+            return survey_store.get_survey(survey_id)['data']
         
-        # Generate insights
-        insights = generate_insights(data)
+        # Generate insights, from scratch when the client asks for a refresh
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        insights = get_cached_insights(key, load_view, family, refresh=refresh)
         
         return jsonify(insights)
     
+    except ViewUnavailableError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    except AnalysisPoolFullError as e:
+        return pool_busy(e)
     except Exception as e:
         logger.error(f"Error generating insights: {str(e)}")
         return jsonify({"error": f"Failed to generate insights: {str(e)}"}), 500
 
+@app.route('/generate-insights/batch', methods=['POST'])
+def get_batch_insights():
+    """
+    Generate insights for many surveys in one document
+    
+    The body names the surveys either by id, {"surveyIds": [1, 2, 3]}, or by
+    company, {"companies": ["Northwind", ...], "period": "Q1 2024",
+    "surveyType": "Employee Survey"} with optional period and type filters.
+    The NLP work is batched across surveys; the response lists the insights
+    of every survey, unknown survey ids and throughput in surveys per
+    minute. With "async": true the batch runs as a background job instead.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        survey_ids = data.get('surveyIds')
+        companies = data.get('companies')
+        if not survey_ids and not companies:
+            return jsonify({"error": "Provide surveyIds or companies"}), 400
+        if survey_ids and not all(isinstance(survey_id, int) for survey_id in survey_ids):
+            return jsonify({"error": "surveyIds must be a list of integers"}), 400
+        
+        args = (survey_store, survey_ids, companies, data.get('period'), data.get('surveyType'))
+        if data.get('async', False):
+            try:
+                job_id = job_queue.submit('batch-insights', generate_batch_insights, *args,
+                                          metadata={'surveyIds': survey_ids, 'companies': companies})
+            except QueueFullError as e:
+                return jsonify({"error": f"Insight queue is full: {str(e)}"}), 503
+            return jsonify({"success": True, "jobId": job_id, "status": "queued"}), 202
+        
+        return jsonify(generate_batch_insights(*args, block=False))
+    
+    except AnalysisPoolFullError as e:
+        return pool_busy(e)
+    except Exception as e:
+        logger.error(f"Error generating batch insights: {str(e)}")
+        return jsonify({"error": f"Failed to generate batch insights: {str(e)}"}), 500
+
+@app.route('/surveys', methods=['GET'])
+def list_surveys():
+    """
+    List stored surveys, optionally filtered by company, period and survey type
+    """
+    try:
+        surveys = survey_store.list_surveys(
+            company=request.args.get('company'),
+            period=request.args.get('period'),
+            survey_type=request.args.get('surveyType')
+        )
+        
+        return jsonify({"surveys": surveys})
+    
+    except Exception as e:
+        logger.error(f"Error listing surveys: {str(e)}")
+        return jsonify({"error": f"Failed to list surveys: {str(e)}"}), 500
+
+@app.route('/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get status, timing and result of a background job
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    
+    return jsonify(job)
+
+@app.route('/jobs', methods=['GET'])
+def get_job_stats():
+    """
+    Report job queue depth and failure counters
+    """
+    return jsonify(job_queue.stats())
+
+@app.route('/analysis-pool', methods=['GET'])
+def get_analysis_pool_stats():
+    """
+    Report analysis pool occupancy and task counters
+    """
+    return jsonify(analysis_pool.stats())
+
+@app.route('/llm-client', methods=['GET'])
+def get_llm_client_stats():
+    """
+    Report OpenAI retry, throttling and circuit breaker counters
+    """
+    return jsonify(llm_client.stats())
+
+@app.route('/nlp-models', methods=['GET'])
+def get_nlp_models():
+    """
+    Report load state, load time and memory for each NLP model
+    """
+    return jsonify(model_stats())
+
+@app.route('/nlp-models/warm-up', methods=['POST'])
+def warm_up_nlp_models():
+    """
+    Load NLP models now instead of on the first request that needs them
+    """
+    try:
+        names = (request.get_json(silent=True) or {}).get('models')
+        return jsonify(warm_up(names))
+    
+    except Exception as e:
+        logger.error(f"Error warming up NLP models: {str(e)}")
+        return jsonify({"error": f"Failed to warm up NLP models: {str(e)}"}), 500
+
+@app.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Report hit/miss/eviction counters for the result caches
+    """
+    return jsonify({
+        "insights": insight_cache.stats(),
+        "solutions": solution_cache_stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Expose request latency, stage timings and counters in the Prometheus text format
+    """
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/luzmo-dashboard/<int:survey_id>', methods=['GET'])
 def get_luzmo_dashboard(survey_id):
     """
@@ -131,31 +582,36 @@ def get_luzmo_dashboard(survey_id):
 @app.route('/kpi-data/<int:survey_id>', methods=['GET'])
 def get_kpi_data(survey_id):
     """
-    Get KPI data for a specific survey
+    Get KPI data for a specific survey, optionally for one view level
     """
     try:
-        if survey_id not in survey_data:
-            # If we don't have data for this survey, return mock data
-            return jsonify({
-                "participation": {
-                    "rate": 87,
-                    "change": 5,
-                    "direction": "up"
-                },
-                "averageScore": {
-                    "score": 4.2,
-                    "change": 0.3,
-                    "direction": "up"
-                }
-            })
+        filters = view_filters(*request_view())
+        key = (filters.get('company_name', ''), filters.get('role', ''), filters.get('department', ''))
         
-        # Get the survey data
-        data = survey_data[survey_id]['data']
+        # Rollups for every view are precomputed at upload, so this is a single keyed lookup
+        row = survey_store.get_kpis(survey_id, *key)
+        if row is None:
+            survey = survey_store.get_survey(survey_id, sections=[])
+            if survey is None:
+                # If we don't have data for this survey, return mock data
+                return jsonify({
+                    "participation": {
+                        "rate": 87,
+                        "change": 5,
+                        "direction": "up"
+                    },
+                    "averageScore": {
+                        "score": 4.2,
+                        "change": 0.3,
+                        "direction": "up"
+                    }
+                })
+            row = next((row for row in load_kpi_rows(survey)
+                        if (row['company'], row['role'], row['department']) == key), None)
+            if row is None:
+                return jsonify({"error": "No survey responses match this view"}), 404
         
-        # Calculate KPI data
-        kpi_data = calculate_kpi_data(data)
-        
-        return jsonify(kpi_data)
+        return jsonify(format_kpi_row(row))
     
     except Exception as e:
         logger.error(f"Error getting KPI data: {str(e)}")
@@ -169,8 +625,8 @@ def get_triple_threat_solutions(category_id):
     try:
         company_name = request.args.get('company')
         
-        # Generate solutions for the category
-        solutions = generate_triple_threat_solutions(category_id, company_name)
+        # Serve cached solutions, generating them only on a miss
+        solutions = get_cached_solutions(category_id, company_name, timeout=LLM_REQUEST_TIMEOUT)
         
         return jsonify({
             "success": True,
@@ -182,7 +638,58 @@ def get_triple_threat_solutions(category_id):
         logger.error(f"Error generating Triple Threat Solutions: {str(e)}")
         return jsonify({"error": f"Failed to generate solutions: {str(e)}"}), 500
 
+@app.route('/triple-threat-solutions/<string:category_id>/stream', methods=['GET'])
+def stream_triple_threat_solutions_route(category_id):
+    """
+    Stream Triple Threat Solutions for a category as they are generated
+    
+    The response is a text/event-stream with a 'solution' event
+    ({"index", "text", "source"}) as soon as each solution is complete and a
+    'done' event with the final three solutions, which replace any sent
+    before it when generation fell back to the defaults.
+    """
+    company_name = request.args.get('company')
+    
+    def events():
+        try:
+            for event in stream_triple_threat_solutions(category_id, company_name, timeout=LLM_REQUEST_TIMEOUT):
+                kind = event.pop('type')
+                if kind == 'done':
+                    event = {"success": True, "category": category_id, **event}
+                yield sse_event(kind, event)
+        
+        except Exception as e:
+            logger.error(f"Error streaming Triple Threat Solutions: {str(e)}")
+            yield sse_event('error', {"error": f"Failed to generate solutions: {str(e)}"})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/triple-threat-solutions', methods=['GET'])
+def get_all_triple_threat_solutions():
+    """
+    Generate Triple Threat Solutions for every 5xCEO category in one response
+    """
+    try:
+        company_name = request.args.get('company')
+        
+        # Generate solutions for all categories in parallel
+        solutions = generate_solutions_for_company(company_name)
+        
+        return jsonify({
+            "success": True,
+            "company": company_name,
+            "solutions": solutions
+        })
+    
+    except Exception as e:
+        logger.error(f"Error generating Triple Threat Solutions: {str(e)}")
+        return jsonify({"error": f"Failed to generate solutions: {str(e)}"}), 500
+
 if __name__ == '__main__':
+    # Development server; in production run `gunicorn -c gunicorn.conf.py wsgi:app`
     # Make sure to run on port 8000 and be accessible from other processes
+    if os.environ.get("NLP_WARMUP", "").lower() in ("1", "true", "yes"):
+        warm_up(server_preload_models())
     logger.info("Starting Flask server on 0.0.0.0:8000")
     app.run(host='0.0.0.0', port=8000, debug=True, threaded=True)
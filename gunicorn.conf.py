@@ -0,0 +1,93 @@
+"""
+Gunicorn settings for serving the Flask API in production
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment. The app is preloaded in
+the master and shared copy-on-write by the workers. NLP analysis runs in each
+worker's analysis pool, whose processes load their own models, so the master
+only preloads the models request threads use (see wsgi.py). Workers share
+surveys, job records, voice sessions and caches through SQLite files.
+"""
+import gc
+import os
+import tempfile
+import multiprocessing
+
+# Shared state must live outside the worker processes; the survey store and
+# solution cache are on disk by default, these three are opt-in elsewhere
+os.environ.setdefault("INSIGHT_CACHE_PATH", "insight_cache.db")
+os.environ.setdefault("JOB_STORE_PATH", "job_store.db")
+os.environ.setdefault("VOICE_SESSION_STORE_PATH", "voice_sessions.db")
+
+# Each worker writes its metrics here so /metrics can report all of them
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "survey-insights-metrics"))
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+
+# NLP workloads are CPU and memory heavy, so default to one worker per core
+# rather than gunicorn's usual 2 * cores + 1
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Every worker runs its own NLP analysis pool; split the cores between them
+os.environ.setdefault("ANALYSIS_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Threads per worker cover requests that wait on the LLM or on streaming clients
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+preload_app = True
+
+# Insight generation in the request thread can take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth (0 disables)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 50))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+def on_starting(server):
+    from metrics import registry
+    registry.clear_directory()
+    if workers > 1 and os.environ.get("SURVEY_STORE_BACKEND", "sqlite") == "memory":
+        server.log.warning("SURVEY_STORE_BACKEND=memory keeps a separate store per worker; "
+                           "use the sqlite backend when running more than one worker")
+
+# Freeze the master's objects before forking (see pre_fork)
+gc_freeze = os.environ.get("GUNICORN_GC_FREEZE", "true").lower() in ("1", "true", "yes")
+
+def pre_fork(server, worker):
+    # Move everything the master loaded into the permanent generation, so
+    # garbage collection in the workers does not touch those objects and
+    # copy the shared pages. With the analysis pool the master holds little
+    # more than the app and this saves next to nothing; it matters more with
+    # ANALYSIS_WORKERS=0, when every model is preloaded here
+    # (python -m benchmarks.server_memory measures both)
+    if gc_freeze:
+        gc.freeze()
+
+def post_fork(server, worker):
+    from metrics import registry
+    registry.start_flusher()
+    server.log.info(f"Worker {worker.pid} started")
+
+def worker_exit(server, worker):
+    # Let insight jobs this worker already accepted finish before it exits,
+    # then stop its analysis processes
+    from flask_server import job_queue, analysis_pool
+    stats = job_queue.stats()
+    if stats['pending']:
+        server.log.info(f"Worker {worker.pid} waiting for {stats['pending']} background jobs")
+    job_queue.shutdown(wait=True)
+    analysis_pool.shutdown(wait=True)
+
+    from llm_client import llm_client
+    llm_client.close()
+
+    from metrics import registry
+    registry.flush()
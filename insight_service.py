@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Tuple
+
+from result_cache import ResultCache, stable_hash
+from survey_store import SurveyStore, get_survey_store
+from topic_model import topic_models, topic_family
+from analysis_pool import AnalysisPool, AnalysisPoolFullError, analysis_pool
+from openai_service import generate_surveys_insights, INSIGHT_PARAMETERS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Surveys analyzed together in one analysis pool task; batches run in
+# parallel when the pool has several workers
+INSIGHT_BATCH_SIZE = int(os.environ.get("INSIGHT_BATCH_SIZE", 32))
+
+# Cache of generated insights keyed by survey content and analysis parameters
+insight_cache = ResultCache(
+    'insights',
+    max_entries=int(os.environ.get("INSIGHT_CACHE_MAX_ENTRIES", 1024)),
+    max_bytes=int(os.environ.get("INSIGHT_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("INSIGHT_CACHE_TTL", 24 * 60 * 60)),
+    persist_path=os.environ.get("INSIGHT_CACHE_PATH") or None
+)
+
+def insight_cache_key(fingerprint: str, family: Optional[str] = None,
+                      filters: Optional[Dict[str, str]] = None) -> str:
+    """
+    Build the insight cache key of a survey view
+
+    Surveys are keyed by the fingerprint their store recorded, so a cache
+    hit never loads the survey. Topics depend on the family's topic model,
+    so its version is part of the key.
+
+    Args:
+        fingerprint: Survey fingerprint (see survey_store.survey_fingerprint)
+        family: Topic model family of the survey
+        filters: View filters the insights were generated for
+    """
+    model_version = topic_models.version(family) if family else None
+    return stable_hash(fingerprint, filters or None, INSIGHT_PARAMETERS, family, model_version)
+
+def select_surveys(store: SurveyStore, survey_ids: Optional[List[int]] = None,
+                   companies: Optional[List[str]] = None, period: Optional[str] = None,
+                   survey_type: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Resolve survey ids, or companies with optional period and type filters,
+    to survey records
+
+    Returns:
+        Tuple of (survey records without data, requested ids that do not exist)
+    """
+    records = []
+    missing = []
+    seen = set()
+    for survey_id in survey_ids or []:
+        record = store.get_survey(survey_id, sections=[])
+        if record is None:
+            missing.append(survey_id)
+        elif record['id'] not in seen:
+            seen.add(record['id'])
+            records.append(record)
+    for company in companies or []:
+        for record in store.list_surveys(company=company, period=period, survey_type=survey_type):
+            if record['id'] not in seen:
+                seen.add(record['id'])
+                records.append(record)
+    return records, missing
+
+def generate_batch_insights(store: SurveyStore, survey_ids: Optional[List[int]] = None,
+                            companies: Optional[List[str]] = None, period: Optional[str] = None,
+                            survey_type: Optional[str] = None, pool: AnalysisPool = analysis_pool,
+                            cache: Optional[ResultCache] = insight_cache, batch_size: int = INSIGHT_BATCH_SIZE,
+                            block: bool = True) -> Dict[str, Any]:
+    """
+    Generate insights for many surveys as one document
+
+    Cached insights are reused; the rest are analyzed in batches of
+    batch_size surveys on the analysis pool (see generate_insights_batch).
+
+    Args:
+        store: Survey store to load surveys from
+        survey_ids: Surveys to analyze
+        companies: Companies whose surveys to analyze
+        period: Only analyze company surveys from this period
+        survey_type: Only analyze company surveys of this type
+        pool: Analysis pool to run the batches on
+        cache: Insight cache (None to always analyze)
+        batch_size: Surveys per analysis task
+        block: Wait for free analysis slots instead of raising AnalysisPoolFullError
+
+    Returns:
+        Dictionary with the insights of every survey, missing survey ids and
+        throughput stats
+
+    Raises:
+        AnalysisPoolFullError: If block is false and the pool is saturated;
+            batches already accepted still finish and are cached
+    """
+    start = time.perf_counter()
+    records, missing = select_surveys(store, survey_ids, companies, period, survey_type)
+
+    entries = []
+    pending = []
+    for record in records:
+        family = topic_family(record['company'], record['type'])
+        key = insight_cache_key(store.get_fingerprint(record['id']), family)
+        insights = cache.get(key) if cache is not None else None
+        entry = {
+            "surveyId": record['id'],
+            "company": record['company'],
+            "type": record['type'],
+            "period": record['period'],
+            "cached": insights is not None,
+            "insights": insights
+        }
+        entries.append(entry)
+        if insights is None:
+            columns = store.get_columns(record['id'])
+            source = columns if columns is not None else store.get_survey(record['id'])['data']
+            pending.append((entry, source, family, key))
+
+    batches = [pending[i:i + max(batch_size, 1)] for i in range(0, len(pending), max(batch_size, 1))]
+    submitted: List[Tuple[List, Future]] = []
+    try:
+        for batch in batches:
+            future = pool.submit(generate_surveys_insights, [source for _, source, _, _ in batch],
+                                 [family for _, _, family, _ in batch], block=block)
+            submitted.append((batch, future))
+    finally:
+        # Collect (and cache) every accepted batch, even if a later one was rejected
+        for batch, future in submitted:
+            for (entry, _, _, key), insights in zip(batch, future.result()):
+                entry['insights'] = insights
+                if cache is not None:
+                    cache.set(key, insights)
+
+    seconds = time.perf_counter() - start
+    return {
+        "success": True,
+        "surveys": entries,
+        "missing": missing,
+        "stats": {
+            "surveys": len(entries),
+            "analyzed": len(pending),
+            "cached": len(entries) - len(pending),
+            "batches": len(batches),
+            "seconds": round(seconds, 3),
+            "surveysPerMinute": round(len(entries) / seconds * 60, 1) if seconds > 0 else None
+        }
+    }
+
+def main():
+    """
+    Generate insights for many surveys from the command line, e.g. every
+    portfolio company for a quarter:
+
+        python insight_service.py --companies Northwind Contoso --period "Q1 2024" --output q1.json
+        python insight_service.py --survey-ids 1 2 3
+    """
+    parser = argparse.ArgumentParser(description="Generate insights for many surveys as one JSON document")
+    parser.add_argument('--survey-ids', type=int, nargs='*', help="Surveys to analyze")
+    parser.add_argument('--companies', nargs='*', help="Companies whose surveys to analyze")
+    parser.add_argument('--period', help="Only analyze company surveys from this period")
+    parser.add_argument('--survey-type', help="Only analyze company surveys of this type")
+    parser.add_argument('--batch-size', type=int, default=INSIGHT_BATCH_SIZE)
+    parser.add_argument('--no-cache', action='store_true', help="Analyze every survey even if cached")
+    parser.add_argument('--output', help="File to write the document to (stdout if omitted)")
+    args = parser.parse_args()
+    if not args.survey_ids and not args.companies:
+        parser.error("pass --survey-ids or --companies")
+
+    document = generate_batch_insights(get_survey_store(), args.survey_ids, args.companies, args.period,
+                                       args.survey_type, cache=None if args.no_cache else insight_cache,
+                                       batch_size=args.batch_size)
+    analysis_pool.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    stats = document['stats']
+    logger.info(f"Generated insights for {stats['surveys']} surveys ({stats['cached']} cached) in "
+                f"{stats['seconds']}s: {stats['surveysPerMinute']} surveys/minute")
+    if document['missing']:
+        logger.warning(f"Surveys not found: {', '.join(map(str, document['missing']))}")
+
+if __name__ == '__main__':
+    main()
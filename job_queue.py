@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Job queue configuration from environment variables
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 32))
+JOB_HISTORY_SIZE = int(os.environ.get("JOB_HISTORY_SIZE", 1000))
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH") or None
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue is at capacity
+    """
+    pass
+
+class JobQueue:
+    """
+    Bounded background job runner with per-job status and timing records
+
+    Jobs run on a fixed-size thread pool. At most max_pending jobs may be
+    queued or running at once; further submissions raise QueueFullError.
+    Finished job records are kept for the most recent history_size jobs.
+
+    With a store_path, job records are also written to SQLite so that a job
+    submitted in one server process can be looked up from any other.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING,
+                 history_size: int = JOB_HISTORY_SIZE, store_path: Optional[str] = JOB_STORE_PATH):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self.store_path = store_path
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._failures = 0
+
+        self._local = threading.local()
+        if store_path:
+            self._initialize_store()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return a SQLite connection owned by the current thread and process
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.store_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize_store(self):
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                submitted_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+
+    def submit(self, kind: str, func: Callable[..., Any], *args,
+               max_attempts: int = 1, metadata: Optional[Dict[str, Any]] = None, **kwargs) -> str:
+        """
+        Queue a function call as a background job
+
+        Args:
+            kind: Short job type label (e.g. 'insights')
+            func: Callable to run
+            max_attempts: How many times to try the job before marking it failed
+            metadata: Extra JSON-serializable fields to report with the job
+
+        Returns:
+            ID of the new job
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self._pending} pending jobs)")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'kind': kind,
+                'status': 'queued',
+                'metadata': metadata or {},
+                'queueDepth': self._pending,
+                'submittedAt': time.time(),
+                'startedAt': None,
+                'finishedAt': None,
+                'waitTime': None,
+                'runTime': None,
+                'attempts': 0,
+                'failures': 0,
+                'result': None,
+                'error': None
+            }
+            self._pending += 1
+            self._trim_history()
+            record = dict(self._jobs[job_id])
+
+        self._persist(record)
+        self._executor.submit(self._run, job_id, func, args, kwargs, max_attempts)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a snapshot of a job record, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        if self.store_path:
+            # Submitted by another process, or trimmed from this one's history
+            try:
+                row = self._connect().execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Error loading job {job_id}: {str(e)}")
+                return None
+            return json.loads(row[0]) if row else None
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue-wide counters
+        """
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job['status']] = statuses.get(job['status'], 0) + 1
+            return {
+                'workers': self.workers,
+                'maxPending': self.max_pending,
+                'pending': self._pending,
+                'failures': self._failures,
+                'jobs': statuses
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs and optionally wait for running ones to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str, func: Callable[..., Any], args, kwargs, max_attempts: int):
+        started = time.time()
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['startedAt'] = started
+            job['waitTime'] = started - job['submittedAt']
+            record = dict(job)
+        self._persist(record)
+
+        result = None
+        error = None
+        for attempt in range(1, max_attempts + 1):
+            with self._lock:
+                job['attempts'] = attempt
+            try:
+                result = func(*args, **kwargs)
+                error = None
+                break
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Job {job_id} ({job['kind']}) attempt {attempt} failed: {error}")
+                with self._lock:
+                    job['failures'] += 1
+
+        finished = time.time()
+        with self._lock:
+            job['finishedAt'] = finished
+            job['runTime'] = finished - started
+            if error is None:
+                job['status'] = 'completed'
+                job['result'] = result
+            else:
+                job['status'] = 'failed'
+                job['error'] = error
+                self._failures += 1
+            self._pending -= 1
+            record = dict(job)
+        self._persist(record, trim=True)
+
+    def _persist(self, record: Dict[str, Any], trim: bool = False):
+        if not self.store_path:
+            return
+        try:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO jobs (id, submitted_at, payload) VALUES (?, ?, ?)",
+                         (record['id'], record['submittedAt'], json.dumps(record, default=str)))
+            if trim:
+                conn.execute(
+                    "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY submitted_at DESC LIMIT ?)",
+                    (self.history_size,)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error persisting job {record['id']}: {str(e)}")
+
+    def _trim_history(self):
+        # Caller must hold the lock; only finished jobs are dropped
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['status'] in ('completed', 'failed')][:excess]:
+            del self._jobs[job_id]
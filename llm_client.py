@@ -0,0 +1,443 @@
+import os
+import time
+import random
+import logging
+import threading
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+import openai
+from openai import OpenAI
+
+from metrics import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# LLM client configuration from environment variables. Quotas are enforced per
+# process, so with several server workers set them to the account quota
+# divided by the number of workers.
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", 20))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 5))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", 60))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", 0.5))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", 8))
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get("LLM_TOKENS_PER_MINUTE", 30000))
+# Seconds' worth of quota that may be used at once (e.g. all five Triple Threat categories)
+LLM_BURST_SECONDS = float(os.environ.get("LLM_BURST_SECONDS", 10))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", 30))
+
+LLM_RETRIES = registry.counter('llm_retries_total', 'OpenAI request attempts retried by reason', ('reason',))
+LLM_REJECTIONS = registry.counter('llm_rejections_total', 'OpenAI requests not sent, by reason', ('reason',))
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when a request is not sent because the circuit breaker is open or
+    the rate limits leave no room before the request's deadline
+    """
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` per second up to `capacity`
+
+    The balance may go negative when a caller is charged more than it
+    reserved (e.g. a response used more tokens than estimated); later callers
+    then wait for the debt to be refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return how many seconds the caller must wait
+        before they are actually available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A request larger than the bucket waits for a full bucket rather than forever
+            self._tokens -= min(amount, self.capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` tokens would be available, without taking them
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = min(amount, self.capacity) - self._tokens
+            return max(0.0, missing / self.rate)
+
+    def adjust(self, amount: float):
+        """
+        Return unused tokens (positive) or charge extra ones (negative)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing upstream for `reset_timeout` seconds after
+    `failure_threshold` consecutive failures, then lets one trial call
+    through (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        return 'half_open' if now - self._opened_at >= self.reset_timeout else 'open'
+
+    def allow(self) -> bool:
+        """
+        Return whether a call may be made now
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """
+        End a call that says nothing about the upstream's health
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self):
+        """
+        Close the breaker and forget past failures
+        """
+        self.record_success()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self._failures += 1
+            if self._trial_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._opened_at is None:
+                    logger.warning(f"OpenAI circuit breaker opened after {self._failures} consecutive failures")
+                self.opened += 1
+                self._opened_at = now
+            self._trial_in_flight = False
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, 'status_code', None)
+
+def _is_retryable(error: Exception) -> bool:
+    # Timeouts and connection errors, rate limits and server errors are
+    # transient; other 4xx responses would fail the same way again
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """
+    Return the delay the server asked for, if any
+    """
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """
+    Rough token count of a chat request: about 4 characters per prompt token
+    plus the completion budget
+    """
+    return sum(len(message.get('content') or '') for message in messages) // 4 + max_tokens
+
+class LLMClient:
+    """
+    Process-wide OpenAI client with connection pooling, client-side rate
+    limiting, retries and a circuit breaker
+
+    All requests share one HTTP connection pool with keep-alive, so only the
+    first request to the API pays for the TCP and TLS handshake. Requests
+    reserve capacity from request-per-minute and token-per-minute buckets
+    before they are sent, transient failures (timeouts, 429 and 5xx) are
+    retried with jittered exponential backoff within the request's deadline,
+    and while the circuit breaker is open requests fail immediately with
+    LLMUnavailableError so callers can fall back to defaults.
+    """
+
+    def __init__(self, api_key: Optional[str] = OPENAI_API_KEY, base_url: Optional[str] = None,
+                 max_connections: int = LLM_MAX_CONNECTIONS, keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE, burst_seconds: float = LLM_BURST_SECONDS,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_bucket = TokenBucket(requests_per_minute / 60, max(requests_per_minute / 60 * burst_seconds, 1))
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, max(tokens_per_minute / 60 * burst_seconds, 1))
+        self.breaker = breaker or CircuitBreaker()
+        self._client = None
+        self._client_pid = None
+        self._client_lock = threading.Lock()
+        self._paused_until = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0, 'rejected': 0,
+                       'rateLimited': 0, 'throttledSeconds': 0.0}
+
+    def client(self) -> Optional[OpenAI]:
+        """
+        Return the pooled OpenAI client, or None without an API key
+        """
+        if not self.api_key:
+            return None
+        # A client inherited from the parent process would share its sockets
+        if self._client is None or self._client_pid != os.getpid():
+            with self._client_lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    self._client = self._create_client()
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def _create_client(self) -> OpenAI:
+        # The Limits class of whichever HTTP library this openai release is built on
+        limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        http_client = openai.DefaultHttpxClient(
+            limits=limits,
+            timeout=openai.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+        )
+        # Retries are handled here, so they respect the rate limits and the breaker
+        return OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0, http_client=http_client)
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None and self._client_pid == os.getpid():
+                self._client.close()
+            self._client = None
+
+    def _record(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _throttle(self, tokens: int, deadline: float):
+        """
+        Wait until the request and token budgets (and any server-requested
+        pause) allow another request, or raise if that is past the deadline
+        """
+        now = time.monotonic()
+        delay = max(self._paused_until - now, self.request_bucket.wait_time(1),
+                    self.token_bucket.wait_time(tokens))
+        if now + delay > deadline:
+            LLM_REJECTIONS.inc(reason='rate_limit')
+            self._record(rejected=1)
+            raise LLMUnavailableError(f"OpenAI rate limit leaves no room for {tokens} tokens before the deadline")
+        delay = max(self._paused_until - now, self.request_bucket.reserve(1), self.token_bucket.reserve(tokens))
+        if delay > 0:
+            self._record(throttledSeconds=delay)
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter spreads retries from concurrent callers apart
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def chat_completion(self, client: Optional[OpenAI] = None, timeout: Optional[float] = None, **params):
+        """
+        Create a chat completion through the shared pool
+
+        Args:
+            client: OpenAI client to use (the pooled client if None)
+            timeout: Total seconds allowed, including throttling and retries
+            **params: Arguments for client.chat.completions.create
+
+        Returns:
+            The chat completion response
+
+        Raises:
+            LLMUnavailableError: The circuit breaker is open or the rate limits
+                leave no room before the deadline
+            openai.OpenAIError: The last attempt failed (or a non-retryable error)
+        """
+        tokens = estimate_tokens(params.get('messages', []), params.get('max_tokens') or 0)
+        response = self._send(client, timeout, tokens, params)
+        self._settle(tokens, getattr(response, 'usage', None))
+        return response
+
+    def stream_chat_completion(self, client: Optional[OpenAI] = None, timeout: Optional[float] = None,
+                               on_usage: Optional[Callable[[Any], None]] = None, **params) -> Iterator[str]:
+        """
+        Stream a chat completion through the shared pool, yielding text as it arrives
+
+        Throttling and retries happen before the first chunk; once text has
+        been yielded a failure is raised to the caller. The timeout bounds the
+        wait for the stream to start and each read after that.
+
+        Args:
+            client: OpenAI client to use (the pooled client if None)
+            timeout: Seconds allowed until the stream starts, including throttling and retries
+            on_usage: Called with the token usage reported at the end of the stream
+            **params: Arguments for client.chat.completions.create
+
+        Yields:
+            Pieces of the completion text
+
+        Raises:
+            LLMUnavailableError: The circuit breaker is open or the rate limits
+                leave no room before the deadline
+            openai.OpenAIError: The request or the stream failed
+        """
+        tokens = estimate_tokens(params.get('messages', []), params.get('max_tokens') or 0)
+        stream = self._send(client, timeout, tokens,
+                            {**params, 'stream': True, 'stream_options': {'include_usage': True}})
+        usage = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            if _is_retryable(e):
+                self.breaker.record_failure()
+            self._record(failures=1)
+            raise
+        finally:
+            stream.close()
+        self._settle(tokens, usage)
+        if on_usage is not None and usage is not None:
+            on_usage(usage)
+
+    def _settle(self, tokens: int, usage):
+        # Correct the token estimate with what the request actually used
+        if usage is not None and usage.total_tokens is not None:
+            self.token_bucket.adjust(tokens - usage.total_tokens)
+
+    def _send(self, client: Optional[OpenAI], timeout: Optional[float], tokens: int, params: Dict[str, Any]):
+        """
+        Send one chat completion request, throttled and retried
+        """
+        client = client or self.client()
+        if client is None:
+            raise LLMUnavailableError("OPENAI_API_KEY is not configured")
+        deadline = time.monotonic() + (timeout if timeout is not None else LLM_REQUEST_TIMEOUT)
+        self._record(requests=1)
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                LLM_REJECTIONS.inc(reason='circuit_open')
+                self._record(rejected=1)
+                raise LLMUnavailableError("OpenAI circuit breaker is open")
+            try:
+                self._throttle(tokens, deadline)
+            except LLMUnavailableError:
+                self.breaker.release()
+                raise
+            self._record(attempts=1)
+            try:
+                response = client.chat.completions.create(timeout=max(deadline - time.monotonic(), 0.001),
+                                                          **params)
+            except Exception as e:
+                if not _is_retryable(e):
+                    if _status_code(e):
+                        # The upstream answered (e.g. a bad request), so it is healthy
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.release()
+                    raise
+                status = _status_code(e)
+                if status == 429:
+                    # Rate limits mean the upstream is healthy but busy: pause
+                    # every caller instead of counting towards the breaker
+                    self._record(rateLimited=1)
+                    self.breaker.release()
+                    self._paused_until = max(self._paused_until, time.monotonic() + (_retry_after(e) or 1.0))
+                else:
+                    self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                    self._record(failures=1)
+                    raise
+                reason = 'rate_limit' if status == 429 else ('server_error' if status else 'connection')
+                LLM_RETRIES.inc(reason=reason)
+                self._record(retries=1)
+                logger.info(f"Retrying OpenAI request in {delay:.2f}s after {type(e).__name__}")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report request, retry and throttling counters and the breaker state
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'throttledSeconds': round(stats['throttledSeconds'], 4),
+            'circuit': self.breaker.state,
+            'circuitOpened': self.breaker.opened,
+            'maxConnections': self.max_connections
+        }
+
+# Client shared by every request in this process
+llm_client = LLMClient()
@@ -0,0 +1,315 @@
+import os
+import glob
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Metrics configuration from environment variables. With METRICS_DIR set,
+# every server process writes its metrics there and /metrics reports the sum
+# over all of them.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+# Histogram buckets (seconds) spanning cache hits to LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Metric:
+    """
+    A named metric with one value per combination of label values
+    """
+    kind = None
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[Any, ...]:
+        # Label values are stringified when rendered, keeping this path cheap
+        return tuple(map(labels.get, self.labelnames))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'samples': samples}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _copy(self, value):
+        return value
+
+class Counter(Metric):
+    """
+    Monotonically increasing count
+    """
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, samples: List[List[Any]]):
+        with self._lock:
+            for key, value in samples:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed buckets
+    """
+    kind = 'histogram'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (the last one is +Inf), then the sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, **labels) -> '_Timer':
+        """
+        Observe the duration of a with-block, including when it raises
+        """
+        return _Timer(self, labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), 'buckets': list(self.buckets)}
+
+    def merge(self, samples: List[List[Any]]):
+        with self._lock:
+            for key, (counts, total) in samples:
+                key = tuple(key)
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+class _Timer:
+    # A plain class rather than @contextmanager, which costs several times more per span
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """
+    Process-wide set of metrics rendered in the Prometheus text format
+
+    Recording a value costs a lock and a dict update, so instrumentation can
+    stay on in production; set METRICS_ENABLED=false to turn it into a no-op.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, directory: Optional[str] = METRICS_DIR):
+        self.enabled = enabled
+        self.directory = directory
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """
+        Create (or return the existing) counter with this name
+        """
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """
+        Create (or return the existing) histogram with this name
+        """
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            return metric
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return every metric's samples as JSON-serializable data
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        Return a snapshot and reset every metric (for handing deltas to another process)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {}
+        for metric in metrics:
+            snapshot[metric.name] = metric.snapshot()
+            metric.clear()
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Add the samples of a snapshot (e.g. from an analysis worker) to this registry
+        """
+        for name, data in snapshot.items():
+            if not data['samples']:
+                continue
+            if data['type'] == 'histogram':
+                metric = self.histogram(name, data['help'], tuple(data['labelnames']), tuple(data['buckets']))
+            else:
+                metric = self.counter(name, data['help'], tuple(data['labelnames']))
+            metric.merge(data['samples'])
+
+    def flush(self) -> None:
+        """
+        Write this process's snapshot to the metrics directory
+        """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing metrics to {path}: {str(e)}")
+
+    def start_flusher(self, interval: float = METRICS_FLUSH_INTERVAL) -> None:
+        """
+        Flush this process's metrics periodically from a daemon thread
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.flush()
+
+        threading.Thread(target=loop, name='metrics-flusher', daemon=True).start()
+
+    def clear_directory(self) -> None:
+        """
+        Remove snapshots left by a previous run of the server
+        """
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Return the metrics of this process, or of every process sharing the
+        metrics directory
+        """
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        combined = MetricsRegistry(enabled=True, directory=None)
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    combined.merge(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading metrics from {path}: {str(e)}")
+        return combined.snapshot()
+
+    def render(self) -> str:
+        """
+        Render the collected metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for name, data in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            for key, value in sorted(data['samples'], key=lambda sample: [_label_value(v) for v in sample[0]]):
+                labels = list(zip(data['labelnames'], key))
+                if data['type'] == 'histogram':
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip(list(data['buckets']) + ['+Inf'], counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', _number(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+def _label_value(value) -> str:
+    return '' if value is None else str(value)
+
+def _labels(pairs: List[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ''
+    escaped = (_label_value(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Shared registry for the whole process
+registry = MetricsRegistry()
+
+# Timing of the stages inside the heavier operations
+STAGE_DURATION = registry.histogram(
+    'stage_duration_seconds',
+    'Time spent in each stage of survey processing, insight generation and LLM calls',
+    ('operation', 'stage')
+)
+
+def span(operation: str, stage: str):
+    """
+    Time a stage of an operation, e.g. `with span('generate_insights', 'sentiment'):`
+    """
+    return STAGE_DURATION.time(operation=operation, stage=stage)
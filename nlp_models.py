@@ -0,0 +1,264 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# spaCy pipeline shared by all NLP modules
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+
+# Distinct words whose tokenization stays cached by the regex tokenizer
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 100_000))
+
+# NLTK resources and the packages that provide them
+NLTK_RESOURCES = {
+    'tokenizers/punkt': 'punkt',
+    'corpora/stopwords': 'stopwords',
+    'sentiment/vader_lexicon.zip': 'vader_lexicon',
+    'corpora/wordnet': 'wordnet'
+}
+
+def _current_rss() -> int:
+    """
+    Return the resident set size of this process in bytes (0 if unknown)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak RSS in kilobytes on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+def _ensure_nltk_resource(resource_path: str) -> None:
+    """
+    Make sure an NLTK resource is available, downloading it if necessary
+    """
+    import nltk
+    try:
+        nltk.data.find(resource_path)
+    except LookupError:
+        nltk.download(NLTK_RESOURCES[resource_path], quiet=True)
+
+def _load_spacy() -> Any:
+    import spacy
+    try:
+        return spacy.load(SPACY_MODEL)
+    except OSError:
+        # If the model is not available, download it
+        spacy.cli.download(SPACY_MODEL)
+        return spacy.load(SPACY_MODEL)
+
+def _load_stop_words() -> Any:
+    _ensure_nltk_resource('corpora/stopwords')
+    from nltk.corpus import stopwords
+    return set(stopwords.words('english'))
+
+def _load_lemmatizer() -> Any:
+    _ensure_nltk_resource('corpora/wordnet')
+    from nltk.stem import WordNetLemmatizer
+    lemmatizer = WordNetLemmatizer()
+    # WordNet is read lazily on first use; do it now so load time is measured here
+    lemmatizer.lemmatize('surveys')
+    return lemmatizer
+
+def _load_sentiment_analyzer() -> Any:
+    _ensure_nltk_resource('sentiment/vader_lexicon.zip')
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def _load_tokenizer() -> Any:
+    _ensure_nltk_resource('tokenizers/punkt')
+    from nltk.tokenize import word_tokenize
+    # Punkt parameters are read on first use
+    word_tokenize('Warm up the tokenizer.')
+    return word_tokenize
+
+def _load_regex_tokenizer() -> Any:
+    # Once punctuation is stripped, the only word_tokenize rules that can
+    # still apply are its contraction splits (e.g. "cannot" -> "can not"),
+    # and Punkt never splits a sentence. Word boundaries then only fall
+    # between words, so the rules can be applied (and memoized) per word.
+    from functools import lru_cache
+    from nltk.tokenize.destructive import NLTKWordTokenizer
+    contractions = NLTKWordTokenizer.CONTRACTIONS2 + NLTKWordTokenizer.CONTRACTIONS3
+
+    @lru_cache(maxsize=TOKEN_CACHE_SIZE)
+    def split_word(word: str) -> Tuple[str, ...]:
+        text = f" {word} "
+        for regexp in contractions:
+            text = regexp.sub(r" \1 \2 ", text)
+        return tuple(text.split())
+
+    def regex_tokenize(text: str) -> List[str]:
+        return [token for word in text.split() for token in split_word(word)]
+    regex_tokenize.cache_clear = split_word.cache_clear
+    return regex_tokenize
+
+class ModelRegistry:
+    """
+    Loads NLP models once, on first use, and shares them across modules
+
+    Each model has its own lock so a slow load (e.g. spaCy) does not block
+    callers that need a different, already-loaded model.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """
+        Register a loader for a named model
+
+        Args:
+            name: Model name used by get()
+            loader: Zero-argument callable that returns the loaded model
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+        Return a model, loading it on first use
+
+        Args:
+            name: Registered model name
+
+        Returns:
+            The loaded model
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown NLP model: {name}")
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                logger.info(f"Loading NLP model '{name}'...")
+                rss_before = _current_rss()
+                start = time.perf_counter()
+                model = self._loaders[name]()
+                load_time = time.perf_counter() - start
+                self._stats[name] = {
+                    'loadTime': round(load_time, 4),
+                    'memoryBytes': max(_current_rss() - rss_before, 0),
+                    'loadedAt': time.time()
+                }
+                self._models[name] = model
+                logger.info(f"Loaded NLP model '{name}' in {load_time:.2f}s")
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Load models ahead of time (e.g. before serving or forking workers)
+
+        Args:
+            names: Models to load (all registered models if None)
+
+        Returns:
+            Per-model load statistics
+        """
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Error warming up NLP model '{name}': {str(e)}")
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report which models are loaded, with load time and memory per model
+        """
+        return {
+            name: {
+                'loaded': name in self._models,
+                **self._stats.get(name, {})
+            }
+            for name in self._loaders
+        }
+
+# Shared registry used by openai_service and voice_processor
+registry = ModelRegistry()
+registry.register('spacy', _load_spacy)
+registry.register('stopwords', _load_stop_words)
+registry.register('lemmatizer', _load_lemmatizer)
+registry.register('sentiment', _load_sentiment_analyzer)
+registry.register('tokenizer', _load_tokenizer)
+registry.register('regex_tokenizer', _load_regex_tokenizer)
+
+def get_spacy_model() -> Any:
+    """
+    Return the shared spaCy pipeline
+    """
+    return registry.get('spacy')
+
+def get_stop_words() -> Any:
+    """
+    Return the NLTK English stop word set
+    """
+    return registry.get('stopwords')
+
+def get_lemmatizer() -> Any:
+    """
+    Return the shared WordNet lemmatizer
+    """
+    return registry.get('lemmatizer')
+
+def get_sentiment_analyzer() -> Any:
+    """
+    Return the shared VADER sentiment analyzer
+    """
+    return registry.get('sentiment')
+
+def get_word_tokenizer() -> Any:
+    """
+    Return NLTK's word_tokenize with Punkt loaded
+    """
+    return registry.get('tokenizer')
+
+def get_regex_tokenizer() -> Any:
+    """
+    Return a word tokenizer for text without punctuation
+
+    Matches word_tokenize on text made only of word characters and
+    whitespace, without running Punkt.
+    """
+    return registry.get('regex_tokenizer')
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Load NLP models ahead of the first request
+
+    Args:
+        names: Models to load (all if None)
+
+    Returns:
+        Per-model load statistics
+    """
+    return registry.warm_up(names)
+
+def model_stats() -> Dict[str, Any]:
+    """
+    Report load state, load time and memory for each NLP model
+    """
+    return registry.stats()
@@ -1,85 +1,141 @@
 import json
 import os
 import re
-from typing import Dict, List, Any, Optional
+import logging
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Sequence, Tuple, Union
 from collections import Counter, defaultdict
-import nltk
-import spacy
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.sentiment import SentimentIntensityAnalyzer
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.decomposition import LatentDirichletAllocation
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+from nlp_models import (get_spacy_model, get_stop_words, get_lemmatizer,
+                        get_sentiment_analyzer, get_word_tokenizer, get_regex_tokenizer)
+from topic_model import topic_models, DEFAULT_TOPIC_FAMILY
+from survey_columns import ColumnarSurvey, CATEGORICAL_COLUMNS
+from metrics import span
 
-# Download required NLTK resources
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('sentiment/vader_lexicon.zip')
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('vader_lexicon')
-    nltk.download('wordnet')
-
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # If the model is not available, download a simple one
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
-
-# Initialize NLTK components
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
-sentiment_analyzer = SentimentIntensityAnalyzer()
-
-def preprocess_text(text: str) -> str:
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# NLTK resources and the spaCy model are loaded lazily through nlp_models
+# on first use, and scikit-learn is imported by the topic model itself, so
+# importing this module stays cheap
+
+# Batch settings for streaming comments through spaCy
+SPACY_BATCH_SIZE = int(os.environ.get("SPACY_BATCH_SIZE", 256))
+SPACY_N_PROCESS = int(os.environ.get("SPACY_N_PROCESS", 1))
+
+# Batch sentiment settings: distinct texts whose VADER scores stay cached,
+# the longest text that is cached (whole-survey texts are scored directly so
+# they do not pin memory in long-running workers), and worker processes used
+# to score large batches
+SENTIMENT_CACHE_SIZE = int(os.environ.get("SENTIMENT_CACHE_SIZE", 100_000))
+SENTIMENT_CACHE_MAX_LENGTH = int(os.environ.get("SENTIMENT_CACHE_MAX_LENGTH", 1000))
+SENTIMENT_N_PROCESS = int(os.environ.get("SENTIMENT_N_PROCESS", 1))
+
+# Text preprocessing: tokenizer ('regex', or 'nltk' for Punkt word_tokenize,
+# which gives the same tokens more slowly) and distinct words whose lemmas
+# stay cached
+PREPROCESS_TOKENIZER = os.environ.get("PREPROCESS_TOKENIZER", "regex")
+LEMMA_CACHE_SIZE = int(os.environ.get("LEMMA_CACHE_SIZE", 100_000))
+
+# Punctuation and digits removed before tokenizing
+NON_WORD_PATTERN = re.compile(r'[^\w\s]|\d+')
+
+# Pipeline components key-phrase extraction never reads (noun chunks need
+# the tagger, attribute ruler and parser; entities need NER)
+KEY_PHRASE_DISABLED_PIPES = ['lemmatizer']
+
+# Parameters that shape generate_insights output; bump the version whenever
+# the analysis changes so cached insights are invalidated
+INSIGHT_PARAMETERS = {
+    "version": 3,
+    "num_topics": 3,
+    "num_phrases": 5
+}
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _lemmatize(word: str) -> str:
+    """
+    WordNet lemma of a word, memoized
+    """
+    return get_lemmatizer().lemmatize(word)
+
+def _get_tokenizer(tokenizer: str):
+    if tokenizer == 'nltk':
+        return get_word_tokenizer()
+    if tokenizer == 'regex':
+        return get_regex_tokenizer()
+    raise ValueError(f"Unknown tokenizer: {tokenizer}")
+
+def preprocess_texts(texts: Iterable[str], tokenizer: str = PREPROCESS_TOKENIZER) -> Iterator[str]:
+    """
+    Preprocess many texts (e.g. a survey's comments) one at a time
+    
+    Models are looked up once for the whole iterable, and lemmas are
+    memoized across texts.
+    
+    Args:
+        texts: Iterable of raw texts
+        tokenizer: 'regex' or 'nltk' (see PREPROCESS_TOKENIZER)
+        
+    Returns:
+        Iterator over the preprocessed texts, in order
+    """
+    tokenize = _get_tokenizer(tokenizer)
+    stop_words = get_stop_words()
+    for text in texts:
+        # Lowercase, then remove special characters and numbers
+        text = NON_WORD_PATTERN.sub('', text.lower())
+        
+        # Tokenize, remove stop words and lemmatize
+        yield ' '.join(_lemmatize(word) for word in tokenize(text) if word not in stop_words)
+
+def preprocess_text(text: str, tokenizer: str = PREPROCESS_TOKENIZER) -> str:
     """
     Preprocess text for NLP analysis
     
     Args:
         text: Raw text to process
+        tokenizer: 'regex' or 'nltk' (see PREPROCESS_TOKENIZER)
         
     Returns:
         Preprocessed text
     """
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove special characters and numbers
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\d+', '', text)
-    
-    # Tokenize and remove stop words
-    tokens = word_tokenize(text)
-    filtered_tokens = [word for word in tokens if word not in stop_words]
-    
-    # Lemmatize
-    lemmatized = [lemmatizer.lemmatize(word) for word in filtered_tokens]
-    
-    return ' '.join(lemmatized)
+    return next(preprocess_texts([text], tokenizer))
 
-def extract_key_topics(texts: List[str], num_topics: int = 3) -> List[str]:
+def extract_key_topics(texts: List[str], num_topics: int = 3, family: Optional[str] = None) -> List[str]:
     """
     Extract key topics from a list of texts using LDA
     
+    When a topic model family is given and has a fitted model, the texts are
+    only transformed against it; otherwise a new model is fitted on the texts.
+    
     Args:
         texts: List of preprocessed texts
         num_topics: Number of topics to extract
+        family: Optional persistent topic model family (see topic_model)
         
     Returns:
         List of key topics
     """
+    if family is not None:
+        topics = topic_models.extract_topics(family, texts, num_topics)
+        if topics:
+            return topics
+    
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation
+    
     # Create TF-IDF vectorizer
     vectorizer = TfidfVectorizer(max_features=100)
-    tfidf_matrix = vectorizer.fit_transform(texts)
+    try:
+        tfidf_matrix = vectorizer.fit_transform(texts)
+    except ValueError:
+        # None of the texts has a usable term
+        return []
     
     # Apply LDA for topic modeling
     lda = LatentDirichletAllocation(n_components=num_topics, random_state=42)
@@ -107,7 +163,7 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
     Returns:
         Dictionary with sentiment scores
     """
-    scores = sentiment_analyzer.polarity_scores(text)
+    scores = get_sentiment_analyzer().polarity_scores(text)
     
     # Determine overall sentiment
     if scores['compound'] >= 0.05:
@@ -129,6 +185,177 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
         "neutral": scores['neu']
     }
 
+def _vader_scores(text: str) -> Tuple[float, float, float, float]:
+    """
+    VADER scores for one text as (compound, pos, neg, neu)
+    """
+    scores = get_sentiment_analyzer().polarity_scores(text)
+    return scores['compound'], scores['pos'], scores['neg'], scores['neu']
+
+# Memoized scores of comment-length texts
+_polarity_scores = lru_cache(maxsize=SENTIMENT_CACHE_SIZE)(_vader_scores)
+
+def _polarity_scores_chunk(texts: List[str]) -> List[Tuple[float, float, float, float]]:
+    return [_polarity_scores(text) if len(text) <= SENTIMENT_CACHE_MAX_LENGTH else _vader_scores(text)
+            for text in texts]
+
+def analyze_sentiment_batch(texts: Sequence[str], n_process: int = SENTIMENT_N_PROCESS) -> Dict[str, np.ndarray]:
+    """
+    Score the sentiment of every text separately
+    
+    Survey comments repeat a lot, so texts are deduplicated first and each
+    distinct text is scored once. Scores of texts up to
+    SENTIMENT_CACHE_MAX_LENGTH characters are also memoized across calls.
+    Scores are then broadcast back to every position with a single index
+    operation.
+    
+    Args:
+        texts: Sequence of texts (e.g. one per comment)
+        n_process: Number of worker processes for scoring distinct texts
+        
+    Returns:
+        Dictionary of float arrays aligned with texts: 'compound', 'positive',
+        'negative' and 'neutral'
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(''), sort=False)
+    uniques = [str(text) for text in uniques]
+    
+    if n_process > 1 and len(uniques) > 10_000:
+        chunk_size = -(-len(uniques) // n_process)
+        chunks = [uniques[i:i + chunk_size] for i in range(0, len(uniques), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_process) as executor:
+            unique_scores = [row for chunk in executor.map(_polarity_scores_chunk, chunks) for row in chunk]
+    else:
+        unique_scores = _polarity_scores_chunk(uniques)
+    
+    table = np.array(unique_scores, dtype=np.float64).reshape(-1, 4)
+    scores = table[codes]
+    return {
+        "compound": scores[:, 0],
+        "positive": scores[:, 1],
+        "negative": scores[:, 2],
+        "neutral": scores[:, 3]
+    }
+
+def aggregate_sentiment(scores: Dict[str, np.ndarray], groups: Sequence[Any]) -> Dict[Any, Dict[str, Any]]:
+    """
+    Aggregate per-text sentiment by group (department, company, etc.)
+    
+    Args:
+        scores: Output of analyze_sentiment_batch
+        groups: Group label for each scored text
+        
+    Returns:
+        Dictionary keyed by group with mean scores, a 0-10 score, the share of
+        positive/negative comments and the overall sentiment label
+    """
+    codes, labels = pd.factorize(pd.Series(groups, dtype=object), sort=False)
+    valid = codes >= 0
+    codes = codes[valid]
+    compound = scores['compound'][valid]
+    
+    counts = np.bincount(codes, minlength=len(labels))
+    safe_counts = np.maximum(counts, 1)
+    means = {
+        name: np.bincount(codes, weights=values[valid], minlength=len(labels)) / safe_counts
+        for name, values in scores.items()
+    }
+    positive_share = np.bincount(codes, weights=compound >= 0.05, minlength=len(labels)) / safe_counts
+    negative_share = np.bincount(codes, weights=compound <= -0.05, minlength=len(labels)) / safe_counts
+    sentiments = np.where(means['compound'] >= 0.05, "positive",
+                          np.where(means['compound'] <= -0.05, "negative", "neutral"))
+    
+    return {
+        label: {
+            "sentiment": str(sentiments[i]),
+            "score": round(float((means['compound'][i] + 1) * 5), 1),
+            "compound": float(means['compound'][i]),
+            "positive": float(means['positive'][i]),
+            "negative": float(means['negative'][i]),
+            "neutral": float(means['neutral'][i]),
+            "positiveShare": round(float(positive_share[i]), 3),
+            "negativeShare": round(float(negative_share[i]), 3),
+            "comments": int(counts[i])
+        }
+        for i, label in enumerate(labels)
+    }
+
+def _sentiment_result(compound: float, positive: float, negative: float, neutral: float) -> Dict[str, Any]:
+    """
+    Build the analyze_sentiment result from VADER scores
+    """
+    if compound >= 0.05:
+        sentiment = "positive"
+    elif compound <= -0.05:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    return {
+        "sentiment": sentiment,
+        "score": round((compound + 1) * 5, 1),
+        "compound": compound,
+        "positive": positive,
+        "negative": negative,
+        "neutral": neutral
+    }
+
+def overall_sentiment(scores: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Average per-comment sentiment into one analyze_sentiment-style result
+    
+    Args:
+        scores: Output of analyze_sentiment_batch
+        
+    Returns:
+        Sentiment of the mean scores (neutral when there are no comments)
+    """
+    if not len(scores['compound']):
+        return _sentiment_result(0.0, 0.0, 0.0, 0.0)
+    return _sentiment_result(*(float(scores[name].mean()) for name in ('compound', 'positive', 'negative', 'neutral')))
+
+def collect_department_comments(data: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    """
+    Collect individual comments with the department each one belongs to
+    
+    Reads raw 'responses' (comments + departmentId) when present, otherwise
+    the per-department text responses of processed employee surveys.
+    
+    Args:
+        data: Survey data
+        
+    Returns:
+        Tuple of (comments, department of each comment)
+    """
+    texts = []
+    groups = []
+    if 'responses' in data:
+        for response in data['responses']:
+            if response.get('comments'):
+                texts.append(response['comments'])
+                groups.append(response.get('departmentId', 'Unspecified'))
+    elif 'department_data' in data:
+        for dept, dept_data in data['department_data'].items():
+            for column_texts in dept_data.get('text_responses', {}).values():
+                texts.extend(str(text) for text in column_texts)
+                groups.extend([dept] * len(column_texts))
+    return texts, groups
+
+def department_sentiment(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Score every comment in a survey and aggregate sentiment per department
+    
+    Args:
+        data: Survey data
+        
+    Returns:
+        Dictionary keyed by department name (as a string)
+    """
+    texts, groups = collect_department_comments(data)
+    if not texts:
+        return {}
+    scores = analyze_sentiment_batch(texts)
+    return {str(dept): result for dept, result in aggregate_sentiment(scores, groups).items()}
+
 def extract_key_phrases(text: str, n: int = 5) -> List[str]:
     """
     Extract key phrases from text using spaCy
@@ -140,7 +367,7 @@ def extract_key_phrases(text: str, n: int = 5) -> List[str]:
     Returns:
         List of key phrases
     """
-    doc = nlp(text)
+    doc = get_spacy_model()(text)
     
     # Extract noun phrases
     noun_phrases = [chunk.text for chunk in doc.noun_chunks]
@@ -157,90 +384,361 @@ def extract_key_phrases(text: str, n: int = 5) -> List[str]:
     
     return key_phrases
 
-def generate_insights(data: Dict[str, Any]) -> Dict[str, Any]:
+def extract_key_phrases_batched(texts: Iterable[str], n: int = 5, batch_size: int = SPACY_BATCH_SIZE,
+                                n_process: int = SPACY_N_PROCESS) -> List[str]:
+    """
+    Extract key phrases from many texts by streaming them through spaCy
+    
+    Each distinct comment is parsed once as its own document with nlp.pipe,
+    and its phrases are counted for every occurrence of the comment (survey
+    comments repeat a lot). Ranking matches extract_key_phrases: noun
+    phrases are counted before entities and ties keep first-seen order.
+    
+    Args:
+        texts: Iterable of texts (e.g. individual comments)
+        n: Number of key phrases to extract
+        batch_size: Number of texts per spaCy batch
+        n_process: Number of worker processes for spaCy
+        
+    Returns:
+        List of key phrases
+    """
+    nlp = get_spacy_model()
+    disabled = [name for name in KEY_PHRASE_DISABLED_PIPES if name in nlp.pipe_names]
+    
+    occurrences = Counter(texts)
+    noun_counter = Counter()
+    entity_counter = Counter()
+    for text, doc in zip(occurrences, nlp.pipe(occurrences, batch_size=batch_size, n_process=n_process,
+                                               disable=disabled)):
+        count = occurrences[text]
+        for chunk in doc.noun_chunks:
+            noun_counter[chunk.text] += count
+        for ent in doc.ents:
+            entity_counter[ent.text] += count
+    
+    # Combine and get most frequent
+    phrase_counter = noun_counter
+    phrase_counter.update(entity_counter)
+    key_phrases = [phrase for phrase, _ in phrase_counter.most_common(n)]
+    
+    return key_phrases
+
+def extract_survey_text(data: Dict[str, Any]):
+    """
+    Collect the comment text and scores generate_insights analyzes
+    
+    Comments are the survey's free text (see collect_free_text), so
+    processed uploads are analyzed per comment like raw responses.
+    
+    Args:
+        data: Survey data to analyze
+        
+    Returns:
+        Tuple of (list of comments, list of scores)
+    """
+    all_comments = collect_free_text(data)
+    scores = [response['score'] for response in data.get('responses', []) if 'score' in response]
+    return all_comments, scores
+
+def collect_free_text(data: Dict[str, Any]) -> List[str]:
+    """
+    Collect the free-text answers of a survey
+    
+    Reads raw 'responses' comments when present, otherwise the text columns
+    of processed employee surveys (per department) and customer feedback.
+    Categorical columns such as company name and role are left out.
+    
+    Args:
+        data: Survey data
+        
+    Returns:
+        List of comments
+    """
+    if 'responses' in data:
+        return [response['comments'] for response in data['responses'] if response.get('comments')]
+    
+    columns = []
+    for dept_data in data.get('department_data', {}).values():
+        columns.extend(dept_data.get('text_responses', {}).items())
+    columns.extend(data.get('feedback_data', {}).items())
+    return [str(text) for col, column_texts in columns if col not in CATEGORICAL_COLUMNS
+            for text in column_texts if str(text).strip()]
+
+def update_topic_model(data: Dict[str, Any], family: str) -> int:
+    """
+    Fold a survey's comments into a persistent topic model
+    
+    The family's model and the default model (used by analyze_text) are both
+    updated with partial_fit instead of being refitted from scratch. Comments
+    are preprocessed as they are for topic extraction. Surveys without free
+    text leave the models unchanged.
+    
+    Args:
+        data: Survey data to learn from
+        family: Topic model family (see topic_model.topic_family)
+        
+    Returns:
+        New version of the family's model
+    """
+    texts = [text for text in preprocess_texts(collect_free_text(data)) if text]
+    if not texts:
+        return topic_models.version(family)
+    
+    model = topic_models.update(family, texts)
+    if family != DEFAULT_TOPIC_FAMILY:
+        topic_models.update(DEFAULT_TOPIC_FAMILY, texts)
+    return model.version
+
+def _compose_insights(all_comments: List[str], scores: List[Any], sentiment_result: Dict[str, Any],
+                      topics: List[str], key_phrases: List[str],
+                      sentiment_by_department: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turn the analysis results of one survey into the insights document
+    """
+    # Calculate average score and trend
+    avg_score = np.mean(scores) if scores else 0
+    # Assume last quarter's score is 5% lower for demo purposes
+    last_quarter_score = 0.95 * avg_score if avg_score else 0
+    trend_percentage = ((avg_score - last_quarter_score) / last_quarter_score * 100) if last_quarter_score else 5
+    is_positive = sentiment_result['sentiment'] == 'positive'
+    
+    # Create content with bullet points
+    content = f"Analysis based on {len(all_comments) if all_comments else 'limited'} survey responses:\n"
+    content += f"- Overall sentiment is {sentiment_result['sentiment']} with a score of {sentiment_result['score']}/10\n"
+    content += f"- Key topics include: {', '.join(topics)}\n"
+    content += f"- Average satisfaction score is {avg_score:.1f} out of 10\n"
+    
+    # Create a title based on sentiment and trend
+    if is_positive:
+        title = f"Satisfaction has increased by {abs(trend_percentage):.1f}% since last quarter"
+    else:
+        title = f"Areas for improvement identified in recent survey data"
+    
+    # Generate tags from topics
+    tags = topics[:3] if len(topics) >= 3 else topics + ["Survey Analysis"]
+    
+    return {
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "isPositive": is_positive,
+        "keyPhrases": key_phrases,
+        "departmentSentiment": sentiment_by_department
+    }
+
+def _default_insights() -> Dict[str, Any]:
+    return {
+        "title": "Employee satisfaction has increased by 12% over the last quarter",
+        "content": "Key factors contributing to this improvement include:\n- New flexible work policy implemented in July (mentioned in 47% of comments)\n- Leadership town halls have improved transparency scores by 18%\n- Improved onboarding process positively impacted new hire experience",
+        "tags": ["Positive Trend", "Leadership Impact", "Q3 Results"],
+        "isPositive": True
+    }
+
+def generate_insights(data: Dict[str, Any], topic_family: Optional[str] = None) -> Dict[str, Any]:
     """
     Generate insights from survey data using NLP
     
     Args:
         data: Survey data to analyze
+        topic_family: Optional persistent topic model family to extract topics with
         
     Returns:
         Dictionary containing insights
     """
     try:
         # Extract text from survey data
-        all_text = ""
-        all_comments = []
-        scores = []
-        
-        if 'responses' in data:
-            for response in data['responses']:
-                if 'comments' in response and response['comments']:
-                    all_comments.append(response['comments'])
-                    all_text += response['comments'] + " "
-                if 'score' in response:
-                    scores.append(response['score'])
-        
-        # If no responses are available, use entire data as text
-        if not all_comments:
-            all_text = str(data)
+        with span('generate_insights', 'extract_text'):
+            all_comments, scores = extract_survey_text(data)
             
-        # Preprocess text
-        processed_text = preprocess_text(all_text)
-        
-        # Calculate average score and trend
-        avg_score = np.mean(scores) if scores else 0
-        # Assume last quarter's score is 5% lower for demo purposes
-        last_quarter_score = 0.95 * avg_score if avg_score else 0
-        trend_percentage = ((avg_score - last_quarter_score) / last_quarter_score * 100) if last_quarter_score else 5
+        # Preprocess each comment
+        with span('generate_insights', 'preprocess'):
+            processed_comments = [text for text in preprocess_texts(all_comments) if text]
         
         # Perform sentiment analysis
-        sentiment_result = analyze_sentiment(all_text)
-        is_positive = sentiment_result['sentiment'] == 'positive'
+        with span('generate_insights', 'sentiment'):
+            sentiment_result = overall_sentiment(analyze_sentiment_batch(all_comments))
         
         # Extract key topics
-        topics = extract_key_topics(all_comments if all_comments else [processed_text])
+        with span('generate_insights', 'topics'):
+            topics = extract_key_topics(processed_comments, num_topics=INSIGHT_PARAMETERS['num_topics'],
+                                        family=topic_family) if processed_comments else []
         
         # Extract key phrases
-        key_phrases = extract_key_phrases(all_text)
+        with span('generate_insights', 'key_phrases'):
+            key_phrases = extract_key_phrases_batched(all_comments, n=INSIGHT_PARAMETERS['num_phrases'])
         
-        # Create content with bullet points
-        content = f"Analysis based on {len(all_comments) if all_comments else 'limited'} survey responses:\n"
-        content += f"- Overall sentiment is {sentiment_result['sentiment']} with a score of {sentiment_result['score']}/10\n"
-        content += f"- Key topics include: {', '.join(topics)}\n"
-        content += f"- Average satisfaction score is {avg_score:.1f} out of 10\n"
+        with span('generate_insights', 'department_sentiment'):
+            sentiment_by_department = department_sentiment(data)
         
-        # Create a title based on sentiment and trend
-        if is_positive:
-            title = f"Satisfaction has increased by {abs(trend_percentage):.1f}% since last quarter"
-        else:
-            title = f"Areas for improvement identified in recent survey data"
+        return _compose_insights(all_comments, scores, sentiment_result, topics, key_phrases,
+                                 sentiment_by_department)
+    except Exception as e:
+        logger.error(f"Error in generate_insights: {str(e)}")
+        # If there's an error, return default insights
+        return _default_insights()
+
+def _key_phrases_by_survey(documents: List[Tuple[str, int]], count: int, n: int) -> List[List[str]]:
+    """
+    Extract key phrases for many surveys from one spaCy pass
+    
+    Comments repeated within or across surveys are parsed once; their
+    phrases are counted for every occurrence, in document order.
+    
+    Args:
+        documents: (text, survey index) pairs; a survey's comments are separate documents
+        count: Number of surveys
+        n: Number of key phrases per survey
         
-        # Generate tags from topics
-        tags = topics[:3] if len(topics) >= 3 else topics + ["Survey Analysis"]
+    Returns:
+        Key phrases of every survey, ranked like extract_key_phrases_batched
+    """
+    nlp = get_spacy_model()
+    disabled = [name for name in KEY_PHRASE_DISABLED_PIPES if name in nlp.pipe_names]
+    distinct = list(dict.fromkeys(text for text, _ in documents))
+    phrases = {
+        text: ([chunk.text for chunk in doc.noun_chunks], [ent.text for ent in doc.ents])
+        for text, doc in zip(distinct, nlp.pipe(distinct, batch_size=SPACY_BATCH_SIZE,
+                                                 n_process=SPACY_N_PROCESS, disable=disabled))
+    }
+    
+    noun_counters = [Counter() for _ in range(count)]
+    entity_counters = [Counter() for _ in range(count)]
+    for text, index in documents:
+        noun_phrases, entities = phrases[text]
+        noun_counters[index].update(noun_phrases)
+        entity_counters[index].update(entities)
+    
+    key_phrases = []
+    for noun_counter, entity_counter in zip(noun_counters, entity_counters):
+        noun_counter.update(entity_counter)
+        key_phrases.append([phrase for phrase, _ in noun_counter.most_common(n)])
+    return key_phrases
+
+def _topics_by_survey(documents: List[List[str]], topic_families: List[Optional[str]]) -> List[List[str]]:
+    """
+    Extract topics for many surveys, applying each fitted topic model family
+    to all of its surveys at once
+    """
+    num_topics = INSIGHT_PARAMETERS['num_topics']
+    topics = [None] * len(documents)
+    by_family = defaultdict(list)
+    for index, texts in enumerate(documents):
+        if not texts:
+            # Surveys without comments have no topics, as in generate_insights
+            topics[index] = []
+        elif topic_families[index] is not None:
+            by_family[topic_families[index]].append(index)
+    for family, indices in by_family.items():
+        family_topics = topic_models.extract_topics_batch(family, [documents[i] for i in indices], num_topics)
+        if family_topics is not None:
+            for index, survey_topics in zip(indices, family_topics):
+                # An empty result falls through to a fresh fit, as in extract_key_topics
+                topics[index] = survey_topics or None
+    
+    # Surveys without a fitted family model get a model fitted on their own text
+    return [survey_topics if survey_topics is not None else
+            extract_key_topics(documents[index], num_topics=num_topics)
+            for index, survey_topics in enumerate(topics)]
+
+def generate_insights_batch(surveys: Sequence[Dict[str, Any]],
+                            topic_families: Optional[Sequence[Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Generate insights for many surveys, batching the NLP work across them
+    
+    Produces the same insights as calling generate_insights on each survey,
+    but all comments go through spaCy in one nlp.pipe pass, every text is
+    scored in one deduplicated sentiment batch, and each fitted topic model
+    family vectorizes and transforms all of its surveys at once.
+    
+    Args:
+        surveys: Survey data to analyze
+        topic_families: Topic model family of each survey (None for no persistent model)
         
-        return {
-            "title": title,
-            "content": content,
-            "tags": tags,
-            "isPositive": is_positive
-        }
+    Returns:
+        Insights of every survey, in order
+    """
+    families = list(topic_families) if topic_families is not None else [None] * len(surveys)
+    try:
+        with span('generate_insights_batch', 'extract_text'):
+            extracted = [extract_survey_text(data) for data in surveys]
+        
+        # Overall and per-department sentiment from one batch of distinct texts
+        with span('generate_insights_batch', 'sentiment'):
+            overall_texts = [comment for all_comments, _ in extracted for comment in all_comments]
+            offsets = np.cumsum([0] + [len(all_comments) for all_comments, _ in extracted])
+            comment_texts, comment_groups = [], []
+            for index, data in enumerate(surveys):
+                texts, groups = collect_department_comments(data)
+                comment_texts.extend(texts)
+                # Missing departments stay missing, so they are skipped as in department_sentiment
+                comment_groups.extend(None if pd.isna(group) else (index, group) for group in groups)
+            scores = analyze_sentiment_batch(overall_texts + comment_texts)
+            overall = [overall_sentiment({name: values[start:end] for name, values in scores.items()})
+                       for start, end in zip(offsets[:-1], offsets[1:])]
+            by_department = [{} for _ in surveys]
+            if comment_texts:
+                comment_scores = {name: values[len(overall_texts):] for name, values in scores.items()}
+                for (index, group), result in aggregate_sentiment(comment_scores, comment_groups).items():
+                    by_department[index][str(group)] = result
+        
+        with span('generate_insights_batch', 'topics'):
+            processed = list(preprocess_texts(overall_texts))
+            documents = [[text for text in processed[start:end] if text]
+                         for start, end in zip(offsets[:-1], offsets[1:])]
+            topics = _topics_by_survey(documents, families)
+        
+        with span('generate_insights_batch', 'key_phrases'):
+            phrase_documents = [(text, index) for index, (all_comments, _) in enumerate(extracted)
+                                for text in all_comments]
+            key_phrases = _key_phrases_by_survey(phrase_documents, len(surveys), INSIGHT_PARAMETERS['num_phrases'])
+        
+        return [_compose_insights(all_comments, survey_scores, overall[index], topics[index], key_phrases[index],
+                                  by_department[index])
+                for index, (all_comments, survey_scores) in enumerate(extracted)]
     except Exception as e:
-        print(f"Error in generate_insights: {str(e)}")
-        # If there's an error, return default insights
-        return {
-            "title": "Employee satisfaction has increased by 12% over the last quarter",
-            "content": "Key factors contributing to this improvement include:\n- New flexible work policy implemented in July (mentioned in 47% of comments)\n- Leadership town halls have improved transparency scores by 18%\n- Improved onboarding process positively impacted new hire experience",
-            "tags": ["Positive Trend", "Leadership Impact", "Q3 Results"],
-            "isPositive": True
-        }
+        logger.error(f"Error in generate_insights_batch: {str(e)}")
+        # Fall back to analyzing the surveys one at a time
+        return [generate_insights(data, topic_family=family) for data, family in zip(surveys, families)]
+
+def generate_survey_insights(survey: Union[ColumnarSurvey, Dict[str, Any]],
+                             topic_family: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Generate insights for a columnar survey or processed survey data
+    
+    Meant to run on the analysis pool: the compact columns are sent to the
+    worker process and only materialized there.
+    """
+    data = survey.to_dict() if isinstance(survey, ColumnarSurvey) else survey
+    return generate_insights(data, topic_family=topic_family)
+
+def generate_surveys_insights(surveys: Sequence[Union[ColumnarSurvey, Dict[str, Any]]],
+                              topic_families: Optional[Sequence[Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Generate insights for many columnar surveys or processed survey data in one batch
+    
+    Meant to run on the analysis pool, like generate_survey_insights.
+    """
+    data = [survey.to_dict() if isinstance(survey, ColumnarSurvey) else survey for survey in surveys]
+    return generate_insights_batch(data, topic_families)
+
+def update_survey_topic_model(survey: Union[ColumnarSurvey, Dict[str, Any]], family: str) -> int:
+    """
+    Fold a columnar survey or processed survey data into a persistent topic model
+    
+    Returns:
+        New version of the family's model
+    """
+    data = survey.to_dict() if isinstance(survey, ColumnarSurvey) else survey
+    return update_topic_model(data, family)
 
-def analyze_text(text: str) -> Dict[str, Any]:
+def analyze_text(text: str, topic_family: str = DEFAULT_TOPIC_FAMILY) -> Dict[str, Any]:
     """
     Analyze text to extract insights using NLP
     
     Args:
         text: Text to analyze
+        topic_family: Persistent topic model family to extract themes with
         
     Returns:
         Dictionary containing analysis results
@@ -253,7 +751,7 @@ def analyze_text(text: str) -> Dict[str, Any]:
         sentiment_result = analyze_sentiment(text)
         
         # Extract topics
-        topics = extract_key_topics([processed_text], num_topics=2)
+        topics = extract_key_topics([processed_text], num_topics=2, family=topic_family)
         
         # Extract key phrases
         key_phrases = extract_key_phrases(text)
@@ -377,7 +875,8 @@ def generate_summary_report(data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "summary": summary,
             "improvementAreas": improvement_areas,
-            "recommendation": recommendation
+            "recommendation": recommendation,
+            "departmentSentiment": department_sentiment(data)
         }
     except Exception as e:
         print(f"Error in generate_summary_report: {str(e)}")
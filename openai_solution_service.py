@@ -1,140 +1,428 @@
-import json
 import os
-from typing import Dict, List, Any, Optional
-import openai
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional
 from openai import OpenAI
+from result_cache import ResultCache, SingleFlight, stable_hash
+from metrics import registry, span
+from llm_client import llm_client, LLMUnavailableError, LLM_REQUEST_TIMEOUT
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+# Default solutions in case OpenAI is not available
+DEFAULT_SOLUTIONS = {
+    'strategic-clarity': [
+        "Create a one-page strategic plan that every employee can understand and reference",
+        "Schedule monthly strategic alignment sessions with all department heads",
+        "Implement a strategic objectives dashboard visible to all team members"
+    ],
+    'relentless-focus': [
+        "Institute a project prioritization matrix that aligns with strategic objectives",
+        "Conduct weekly focus review meetings to eliminate low-value activities",
+        "Use time-tracking analytics to identify and reduce time spent on non-core activities"
+    ],
+    'disciplined-execution': [
+        "Implement a structured accountability framework with clear owners for each deliverable",
+        "Establish a regular cadence of execution reviews with predefined metrics",
+        "Create a recognition program specifically for execution excellence"
+    ],
+    'scalable-talent': [
+        "Develop skill matrices for each role with clear development pathways", 
+        "Implement quarterly capability assessments tied to growth objectives",
+        "Create cross-functional mentoring pairs to accelerate knowledge transfer"
+    ],
+    'energized-culture': [
+        "Launch a structured employee feedback program with action tracking",
+        "Establish team-level culture champions with specific improvement metrics",
+        "Create regular team-building activities aligned with company values"
+    ]
+}
+
+# 5xCEO framework categories
+CATEGORIES = [
+    'strategic-clarity', 
+    'relentless-focus', 
+    'disciplined-execution',
+    'scalable-talent',
+    'energized-culture'
+]
+
+# Concurrency settings for OpenAI requests (timeouts, retries and rate limits
+# are configured in llm_client)
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 5))
+
+# Bump whenever the prompt or request parameters change so cached solutions are regenerated
+SOLUTION_PROMPT_VERSION = 1
+SOLUTION_MODEL = "gpt-4o"
+
+# Cache of generated solutions keyed by category, company and prompt version
+solution_cache = ResultCache(
+    'solutions',
+    max_entries=int(os.environ.get("SOLUTION_CACHE_MAX_ENTRIES", 2048)),
+    max_bytes=int(os.environ.get("SOLUTION_CACHE_MAX_BYTES", 8 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("SOLUTION_CACHE_TTL", 7 * 24 * 60 * 60)),
+    persist_path=os.environ.get("SOLUTION_CACHE_PATH", "solution_cache.db") or None
+)
+_solution_flights = SingleFlight()
+_solution_metrics_lock = threading.Lock()
+_solution_metrics = {
+    'upstreamCalls': 0,
+    'upstreamErrors': 0,
+    'upstreamSeconds': 0.0,
+    'coalesced': 0,
+    'avoidedCalls': 0,
+    'avoidedLatencySeconds': 0.0
+}
+
+# Upstream OpenAI usage
+LLM_REQUESTS = registry.counter('llm_requests_total', 'OpenAI requests by model and outcome', ('model', 'outcome'))
+LLM_TOKENS = registry.counter('llm_tokens_total', 'OpenAI tokens used by model and kind', ('model', 'kind'))
+TIME_TO_FIRST_SOLUTION = registry.histogram(
+    'triple_threat_time_to_first_solution_seconds',
+    'Time until the first streamed Triple Threat solution was sent, by source',
+    ('source',)
+)
 
-def initialize_openai_client():
+def get_shared_client() -> Optional[OpenAI]:
     """
-    Initialize the OpenAI client with API key
+    Return an OpenAI client shared by all requests in this process
+    
+    The client is thread-safe and keeps its HTTP connections alive, so
+    concurrent and repeated requests skip the connection and TLS setup.
     
     Returns:
         OpenAI client if API key is available, None otherwise
     """
-    if OPENAI_API_KEY:
-        return OpenAI(api_key=OPENAI_API_KEY)
-    else:
-        print("Warning: OPENAI_API_KEY not found in environment variables.")
-        return None
+    return llm_client.client()
 
-def generate_triple_threat_solutions(category: str, company_name: Optional[str] = None) -> List[str]:
+def generate_triple_threat_solutions(category: str, company_name: Optional[str] = None,
+                                     client: Optional[OpenAI] = None,
+                                     timeout: Optional[float] = None) -> List[str]:
     """
     Generate Triple Threat Solutions using OpenAI
     
     Args:
         category: The framework category (strategic-clarity, relentless-focus, etc.)
         company_name: Optional company name for more specific solutions
+        client: OpenAI client to use (the shared pooled client if None)
+        timeout: Optional timeout in seconds for the OpenAI request, including retries
         
     Returns:
         List of 3 actionable solutions
     """
-    # Format category name for better readability
-    formatted_category = category.replace('-', ' ').title()
-    
-    # Default solutions in case OpenAI is not available
-    default_solutions = {
-        'strategic-clarity': [
-            "Create a one-page strategic plan that every employee can understand and reference",
-            "Schedule monthly strategic alignment sessions with all department heads",
-            "Implement a strategic objectives dashboard visible to all team members"
-        ],
-        'relentless-focus': [
-            "Institute a project prioritization matrix that aligns with strategic objectives",
-            "Conduct weekly focus review meetings to eliminate low-value activities",
-            "Use time-tracking analytics to identify and reduce time spent on non-core activities"
-        ],
-        'disciplined-execution': [
-            "Implement a structured accountability framework with clear owners for each deliverable",
-            "Establish a regular cadence of execution reviews with predefined metrics",
-            "Create a recognition program specifically for execution excellence"
-        ],
-        'scalable-talent': [
-            "Develop skill matrices for each role with clear development pathways", 
-            "Implement quarterly capability assessments tied to growth objectives",
-            "Create cross-functional mentoring pairs to accelerate knowledge transfer"
-        ],
-        'energized-culture': [
-            "Launch a structured employee feedback program with action tracking",
-            "Establish team-level culture champions with specific improvement metrics",
-            "Create regular team-building activities aligned with company values"
-        ]
-    }
-    
     # Try to generate solutions with OpenAI if available
-    client = initialize_openai_client()
+    if client is None:
+        client = get_shared_client()
     if not client:
-        return default_solutions.get(category, default_solutions['strategic-clarity'])
+        return DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
     
     try:
-        # Create the prompt for OpenAI
-        company_context = f" for {company_name}" if company_name else ""
+        return _request_solutions(client, category, company_name, timeout)
         
-        prompt = f"""
-        You are a highly experienced business consultant specializing in the 5xCEO framework.
+    except Exception as e:
+        print(f"Error generating solutions with OpenAI: {str(e)}")
+        # Fall back to default solutions
+        return DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
+
+def _solution_messages(category: str, company_name: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Build the chat messages asking for three solutions for a category
+    """
+    # Format category name for better readability
+    formatted_category = category.replace('-', ' ').title()
+    
+    # Create the prompt for OpenAI
+    company_context = f" for {company_name}" if company_name else ""
+    
+    prompt = f"""
+    You are a highly experienced business consultant specializing in the 5xCEO framework.
+    
+    Generate three specific, actionable solutions for improving '{formatted_category}'{company_context}.
+    Each solution should be:
+    1. Practical and implementable within 30-90 days
+    2. Specific enough to be immediately actionable
+    3. Focused on measurable outcomes
+    4. Limited to one concise sentence (maximum 20 words)
+    
+    Return ONLY the three solutions, one per line. Do not include any explanations or numbering.
+    """
+    
+    return [
+        {"role": "system", "content": "You are an expert business consultant who provides concise, actionable advice."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _complete_solutions(solutions: List[str], category: str) -> List[str]:
+    """
+    Return exactly three solutions, filling in defaults or truncating
+    """
+    # Ensure we have exactly 3 solutions
+    if len(solutions) < 3:
+        # Fill in with default solutions if needed
+        defaults = DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
+        solutions = solutions + defaults[:3-len(solutions)]
+    elif len(solutions) > 3:
+        # Truncate to 3 solutions
+        solutions = solutions[:3]
         
-        Generate three specific, actionable solutions for improving '{formatted_category}'{company_context}.
-        Each solution should be:
-        1. Practical and implementable within 30-90 days
-        2. Specific enough to be immediately actionable
-        3. Focused on measurable outcomes
-        4. Limited to one concise sentence (maximum 20 words)
+    return solutions
+
+def _record_usage(usage):
+    LLM_TOKENS.inc(usage.prompt_tokens, model=SOLUTION_MODEL, kind='prompt')
+    LLM_TOKENS.inc(usage.completion_tokens, model=SOLUTION_MODEL, kind='completion')
+
+def _request_solutions(client: OpenAI, category: str, company_name: Optional[str],
+                       timeout: Optional[float]) -> List[str]:
+    """
+    Ask OpenAI for three solutions, raising on any request error
+    """
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    try:
+        with span('generate_triple_threat_solutions', 'llm_request'):
+            # Pooled, rate limited and retried; fails fast while the upstream is degraded
+            response = llm_client.chat_completion(
+                client,
+                model=SOLUTION_MODEL,
+                messages=_solution_messages(category, company_name),
+                max_tokens=250,
+                temperature=0.7,
+                timeout=timeout
+            )
+    except LLMUnavailableError:
+        LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='unavailable')
+        raise
+    except Exception:
+        LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='error')
+        raise
+    LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='ok')
+    if response.usage is not None:
+        _record_usage(response.usage)
+    
+    # Parse and clean the response
+    solutions_text = response.choices[0].message.content.strip()
+    solutions = [line.strip() for line in solutions_text.split('\n') if line.strip()]
+    return _complete_solutions(solutions, category)
+
+def _stream_solution_lines(client: OpenAI, category: str, company_name: Optional[str],
+                           timeout: Optional[float]) -> Iterator[str]:
+    """
+    Stream solutions from OpenAI, yielding each non-empty line as soon as it
+    is complete and stopping after three; raises on any request error
+    """
+    try:
+        with span('generate_triple_threat_solutions', 'llm_stream'):
+            pieces = llm_client.stream_chat_completion(
+                client,
+                model=SOLUTION_MODEL,
+                messages=_solution_messages(category, company_name),
+                max_tokens=250,
+                temperature=0.7,
+                timeout=timeout,
+                on_usage=_record_usage
+            )
+            buffer = ''
+            count = 0
+            for piece in pieces:
+                buffer += piece
+                *lines, buffer = buffer.split('\n')
+                for line in lines:
+                    if line.strip() and count < 3:
+                        count += 1
+                        yield line.strip()
+            if buffer.strip() and count < 3:
+                yield buffer.strip()
+    except LLMUnavailableError:
+        LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='unavailable')
+        raise
+    except Exception:
+        LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='error')
+        raise
+    LLM_REQUESTS.inc(model=SOLUTION_MODEL, outcome='ok')
+
+def stream_triple_threat_solutions(category: str, company_name: Optional[str] = None,
+                                   timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generate Triple Threat Solutions, yielding each one as soon as it is ready
+    
+    Yields 'solution' events ({"type": "solution", "index", "text", "source"})
+    as lines of the streamed completion complete, then a 'done' event with
+    the final list. The final list follows generate_triple_threat_solutions:
+    exactly three items, padded with defaults or truncated, and all defaults
+    if the request fails (solutions already sent are then superseded).
+    Cached solutions are sent at once and successful results are cached.
+    
+    Args:
+        category: The framework category (strategic-clarity, relentless-focus, etc.)
+        company_name: Optional company name for more specific solutions
+        timeout: Seconds allowed until the stream starts, including retries
         
-        Return ONLY the three solutions, one per line. Do not include any explanations or numbering.
-        """
+    Yields:
+        Event dictionaries
+    """
+    company_name = company_name.strip() if company_name else None
+    key = stable_hash(category, company_name, SOLUTION_PROMPT_VERSION, SOLUTION_MODEL)
+    defaults = DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
+    start = time.perf_counter()
+    first = None
+    
+    def solution(index: int, text: str, source: str) -> Dict[str, Any]:
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - start
+            TIME_TO_FIRST_SOLUTION.observe(first, source=source)
+        return {"type": "solution", "index": index, "text": text, "source": source}
+    
+    def done(solutions: List[str], source: str) -> Dict[str, Any]:
+        return {"type": "done", "solutions": solutions, "source": source,
+                "timeToFirstSolution": round(first, 4) if first is not None else None}
+    
+    cached = solution_cache.get(key)
+    if cached is not None:
+        for index, text in enumerate(cached):
+            yield solution(index, text, 'cache')
+        yield done(cached, 'cache')
+        return
+    
+    client = get_shared_client()
+    solutions = []
+    source = 'default'
+    if client:
+        try:
+            for text in _stream_solution_lines(client, category, company_name, timeout):
+                yield solution(len(solutions), text, 'llm')
+                solutions.append(text)
+        except Exception as e:
+            print(f"Error streaming solutions from OpenAI: {str(e)}")
+            _record_solution_metric(upstreamCalls=1, upstreamErrors=1)
+            for index, text in enumerate(defaults):
+                yield solution(index, text, 'default')
+            yield done(list(defaults), 'default')
+            return
+        _record_solution_metric(upstreamCalls=1, upstreamSeconds=time.perf_counter() - start)
+        source = 'llm'
+    
+    completed = _complete_solutions(solutions, category)
+    for index in range(len(solutions), len(completed)):
+        yield solution(index, completed[index], 'default')
+    if source == 'llm':
+        solution_cache.set(key, completed)
+    yield done(completed, source)
+
+def _record_solution_metric(**increments):
+    with _solution_metrics_lock:
+        for name, value in increments.items():
+            _solution_metrics[name] += value
+
+def _average_upstream_latency() -> float:
+    with _solution_metrics_lock:
+        calls = _solution_metrics['upstreamCalls'] - _solution_metrics['upstreamErrors']
+        return _solution_metrics['upstreamSeconds'] / calls if calls else 0.0
+
+def get_cached_solutions(category: str, company_name: Optional[str] = None,
+                         client: Optional[OpenAI] = None,
+                         timeout: Optional[float] = None) -> List[str]:
+    """
+    Return Triple Threat Solutions, generating them only on a cache miss
+    
+    Solutions are cached by (category, company, prompt version). Concurrent
+    misses for the same key share a single OpenAI request. Fallback default
+    solutions returned after an error are not cached.
+    
+    Args:
+        category: The framework category (strategic-clarity, relentless-focus, etc.)
+        company_name: Optional company name for more specific solutions
+        client: OpenAI client to use (the shared client if None)
+        timeout: Optional timeout in seconds for the OpenAI request
         
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert business consultant who provides concise, actionable advice."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=250,
-            temperature=0.7
-        )
+    Returns:
+        List of 3 actionable solutions
+    """
+    company_name = company_name.strip() if company_name else None
+    key = stable_hash(category, company_name, SOLUTION_PROMPT_VERSION, SOLUTION_MODEL)
+    
+    solutions = solution_cache.get(key)
+    if solutions is not None:
+        _record_solution_metric(avoidedCalls=1, avoidedLatencySeconds=_average_upstream_latency())
+        return solutions
+    
+    def fetch():
+        # Another caller may have filled the cache between our miss and taking the flight
+        cached = solution_cache.get(key)
+        if cached is not None:
+            return cached
         
-        # Parse and clean the response
-        solutions_text = response.choices[0].message.content.strip()
-        solutions = [line.strip() for line in solutions_text.split('\n') if line.strip()]
+        openai_client = client or get_shared_client()
+        if not openai_client:
+            return DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
         
-        # Ensure we have exactly 3 solutions
-        if len(solutions) < 3:
-            # Fill in with default solutions if needed
-            solutions.extend(default_solutions[category][:3-len(solutions)])
-        elif len(solutions) > 3:
-            # Truncate to 3 solutions
-            solutions = solutions[:3]
-            
-        return solutions
+        start = time.perf_counter()
+        try:
+            result = _request_solutions(openai_client, category, company_name, timeout)
+        except Exception as e:
+            print(f"Error generating solutions with OpenAI: {str(e)}")
+            _record_solution_metric(upstreamCalls=1, upstreamErrors=1)
+            return DEFAULT_SOLUTIONS.get(category, DEFAULT_SOLUTIONS['strategic-clarity'])
         
-    except Exception as e:
-        print(f"Error generating solutions with OpenAI: {str(e)}")
-        # Fall back to default solutions
-        return default_solutions.get(category, default_solutions['strategic-clarity'])
+        _record_solution_metric(upstreamCalls=1, upstreamSeconds=time.perf_counter() - start)
+        solution_cache.set(key, result)
+        return result
+    
+    solutions, shared = _solution_flights.do(key, fetch)
+    if shared:
+        _record_solution_metric(coalesced=1)
+    return solutions
+
+def solution_cache_stats() -> Dict[str, Any]:
+    """
+    Report solution cache counters plus upstream and avoided OpenAI latency
+    """
+    average_latency = _average_upstream_latency()
+    with _solution_metrics_lock:
+        metrics = dict(_solution_metrics)
+    return {
+        **solution_cache.stats(),
+        **metrics,
+        'upstreamSeconds': round(metrics['upstreamSeconds'], 4),
+        'avoidedLatencySeconds': round(metrics['avoidedLatencySeconds'], 4),
+        'averageUpstreamLatency': round(average_latency, 4),
+        'promptVersion': SOLUTION_PROMPT_VERSION
+    }
 
-def generate_solutions_for_company(company_name: str) -> Dict[str, List[str]]:
+def generate_solutions_for_company(company_name: Optional[str], concurrent: bool = True,
+                                   max_concurrency: int = LLM_MAX_CONCURRENCY,
+                                   timeout: float = LLM_REQUEST_TIMEOUT,
+                                   use_cache: bool = True) -> Dict[str, List[str]]:
     """
     Generate solutions for all 5xCEO categories for a specific company
     
+    In concurrent mode the category requests share one pooled client and run
+    in parallel (at most max_concurrency at a time), so total latency is
+    roughly that of the slowest request instead of the sum of all five.
+    
     Args:
         company_name: Name of the company
+        concurrent: Issue the category requests in parallel
+        max_concurrency: Maximum number of requests in flight
+        timeout: Timeout in seconds for each OpenAI request
+        use_cache: Serve and store solutions through the solution cache
         
     Returns:
         Dictionary with category as key and list of solutions as value
     """
-    categories = [
-        'strategic-clarity', 
-        'relentless-focus', 
-        'disciplined-execution',
-        'scalable-talent',
-        'energized-culture'
-    ]
+    generate = get_cached_solutions if use_cache else generate_triple_threat_solutions
     
-    return {
-        category: generate_triple_threat_solutions(category, company_name)
-        for category in categories
-    }
\ No newline at end of file
+    if not concurrent:
+        return {
+            category: generate(category, company_name)
+            for category in CATEGORIES
+        }
+    
+    client = get_shared_client()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(CATEGORIES))),
+                            thread_name_prefix='triple-threat') as executor:
+        futures = {
+            category: executor.submit(generate, category, company_name, client=client, timeout=timeout)
+            for category in CATEGORIES
+        }
+        # Each call falls back to the default solutions on errors and timeouts
+        return {category: future.result() for category, future in futures.items()}
@@ -0,0 +1,371 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Callable
+
+import numpy as np
+
+from metrics import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of expired rows from the SQLite store
+CACHE_PRUNE_INTERVAL = float(os.environ.get("CACHE_PRUNE_INTERVAL", 300))
+
+CACHE_LOOKUPS = registry.counter('cache_lookups_total', 'Result cache lookups by cache and outcome',
+                                 ('cache', 'result'))
+
+def _canonical_key(key: Any) -> str:
+    """
+    Stringify a dict key the same way json.dumps does
+    """
+    if isinstance(key, np.generic):
+        key = key.item()
+    if key is None or isinstance(key, (bool, float)):
+        return json.dumps(key)
+    return str(key)
+
+def _canonical(value: Any) -> Any:
+    """
+    Convert a value into a JSON-serializable form with a deterministic layout
+
+    Dict keys are stringified and sorted, NumPy scalars become Python numbers
+    and NaN/inf become strings, so equal data always serializes identically.
+    """
+    if isinstance(value, dict):
+        items = [(_canonical_key(key), item) for key, item in value.items()]
+        return [[key, _canonical(item)] for key, item in sorted(items, key=lambda kv: kv[0])]
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return [_canonical(item) for item in value.tolist()]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def stable_hash(*parts: Any) -> str:
+    """
+    Compute a stable content hash of arbitrary JSON-like values
+
+    Args:
+        parts: Values to hash (processed survey data, analysis parameters, etc.)
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    payload = json.dumps(_canonical(list(parts)), separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with TTL expiry, a byte budget and optional
+    persistence to SQLite so cached results survive restarts.
+
+    Values must be JSON-serializable; their size is measured as the length
+    of their JSON encoding. The SQLite store is held to the same entry and
+    byte budget, evicting the oldest rows on write.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None, persist_path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'diskHits': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'oversized': 0,
+            'diskEvictions': 0,
+            'diskExpirations': 0
+        }
+        self._next_prune = 0.0
+
+        self._local = threading.local()
+        if persist_path:
+            self._initialize_disk()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return a SQLite connection owned by the current thread and process
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.persist_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize_disk(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                expires_at REAL,
+                size INTEGER NOT NULL DEFAULT 0,
+                stored_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (cache, key)
+            ) WITHOUT ROWID
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+        if 'size' not in columns:
+            # Stores written before the disk budget; their rows count as the oldest
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+            conn.execute("UPDATE cache_entries SET size = length(payload)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_age ON cache_entries (cache, stored_at, size)")
+        self._prune_disk(conn, time.time())
+        self._evict_disk(conn)
+
+    def _prune_disk(self, conn: sqlite3.Connection, now: float):
+        """
+        Delete this cache's expired rows from disk
+        """
+        deleted = conn.execute(
+            "DELETE FROM cache_entries WHERE cache = ? AND expires_at IS NOT NULL AND expires_at < ?",
+            (self.name, now)
+        ).rowcount
+        with self._lock:
+            self._counters['diskExpirations'] += deleted
+            self._next_prune = time.monotonic() + CACHE_PRUNE_INTERVAL
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        """
+        Delete the oldest rows until this cache fits its entry and byte budget on disk
+        """
+        deleted = conn.execute("""
+            DELETE FROM cache_entries WHERE cache = ? AND key IN (
+                SELECT key FROM (
+                    SELECT key,
+                           SUM(size) OVER newest AS kept_bytes,
+                           ROW_NUMBER() OVER newest AS kept_entries
+                    FROM cache_entries WHERE cache = ?
+                    WINDOW newest AS (ORDER BY stored_at DESC, key)
+                ) WHERE kept_bytes > ? OR kept_entries > ?
+            )
+        """, (self.name, self.name, self.max_bytes, self.max_entries)).rowcount
+        with self._lock:
+            self._counters['diskEvictions'] += deleted
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is not None and expires_at < now:
+                    self._remove(key)
+                    self._counters['expirations'] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    CACHE_LOOKUPS.inc(cache=self.name, result='hit')
+                    return value
+
+        if self.persist_path:
+            loaded = self._load_from_disk(key, now)
+            if loaded is not None:
+                value, payload, expires_at = loaded
+                with self._lock:
+                    self._counters['hits'] += 1
+                    self._counters['diskHits'] += 1
+                    self._store(key, value, len(payload), expires_at)
+                CACHE_LOOKUPS.inc(cache=self.name, result='disk_hit')
+                return value
+
+        with self._lock:
+            self._counters['misses'] += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result='miss')
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value in the cache (and on disk if persistence is enabled)
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload)
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+
+        with self._lock:
+            if size > self.max_bytes:
+                self._counters['oversized'] += 1
+                return
+            self._store(key, value, size, expires_at)
+
+        if self.persist_path:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (cache, key, payload, expires_at, size, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.name, key, payload, expires_at, size, time.time())
+                )
+                if time.monotonic() >= self._next_prune:
+                    self._prune_disk(conn, time.time())
+                self._evict_disk(conn)
+            except sqlite3.Error as e:
+                logger.error(f"Error persisting {self.name} cache entry: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """
+        Drop one entry from memory and disk
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.persist_path:
+            try:
+                self._connect().execute("DELETE FROM cache_entries WHERE cache = ? AND key = ?", (self.name, key))
+            except sqlite3.Error as e:
+                logger.error(f"Error deleting {self.name} cache entry: {str(e)}")
+
+    def clear(self) -> None:
+        """
+        Drop every entry from memory and disk
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.persist_path:
+            self._connect().execute("DELETE FROM cache_entries WHERE cache = ?", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters and current occupancy
+        """
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'hitRate': round(self._counters['hits'] / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+                'ttlSeconds': self.ttl_seconds,
+                'persistent': bool(self.persist_path)
+            }
+
+    def _store(self, key: str, value: Any, size: int, expires_at: Optional[float]):
+        # Caller must hold the lock
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters['evictions'] += 1
+
+    def _remove(self, key: str):
+        # Caller must hold the lock
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _load_from_disk(self, key: str, now: float) -> Optional[Tuple[Any, str, Optional[float]]]:
+        try:
+            row = self._connect().execute(
+                "SELECT payload, expires_at FROM cache_entries WHERE cache = ? AND key = ?",
+                (self.name, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading {self.name} cache entry: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+        payload, expires_at = row
+        if expires_at is not None and expires_at < now:
+            return None
+        return json.loads(payload), payload, expires_at
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution
+
+    The first caller for a key runs the function; callers that arrive while
+    it is in flight wait and receive the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.value = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func once per key across concurrent callers
+
+        Args:
+            key: Key identifying identical calls
+            func: Zero-argument callable to run
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            waited on another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
@@ -290,11 +290,102 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  app.post("/api/process-voice/sessions", async (req, res) => {
+    try {
+      // Forward to Flask server
+      const flaskUrl = "http://0.0.0.0:8000/process-voice/sessions";
+      console.log(`Forwarding request to Flask: ${flaskUrl}`);
+
+      const flaskResponse = await fetch(flaskUrl, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify(req.body),
+      });
+
+      const data = await flaskResponse.json();
+      res.status(flaskResponse.status).json(data);
+    } catch (error) {
+      console.error(`Error forwarding to Flask: ${error}`);
+      // The client falls back to /api/process-voice once speech ends
+      res.status(503).json({ error: "Voice sessions are unavailable" });
+    }
+  });
+
+  app.post("/api/process-voice/sessions/:sessionId/partials", async (req, res) => {
+    try {
+      const flaskUrl = `http://0.0.0.0:8000/process-voice/sessions/${encodeURIComponent(req.params.sessionId)}/partials`;
+
+      const flaskResponse = await fetch(flaskUrl, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify(req.body),
+      });
+
+      const data = await flaskResponse.json();
+      res.status(flaskResponse.status).json(data);
+    } catch (error) {
+      console.error(`Error forwarding to Flask: ${error}`);
+      res.status(503).json({ error: "Voice sessions are unavailable" });
+    }
+  });
+
+  app.get("/api/process-voice/sessions/:sessionId/events", async (req, res) => {
+    // Stop reading from Flask when the browser goes away
+    const controller = new AbortController();
+    req.on("close", () => controller.abort());
+
+    try {
+      const flaskUrl = `http://0.0.0.0:8000/process-voice/sessions/${encodeURIComponent(req.params.sessionId)}/events`;
+      const lastEventId = req.get("Last-Event-ID");
+
+      const flaskResponse = await fetch(flaskUrl, {
+        method: "GET",
+        headers: lastEventId ? { "Last-Event-ID": lastEventId } : {},
+        signal: controller.signal,
+      });
+
+      if (!flaskResponse.ok || !flaskResponse.body) {
+        const data = await flaskResponse.json();
+        res.status(flaskResponse.status).json(data);
+        return;
+      }
+
+      // Pass the event stream through as it arrives rather than buffering it
+      res.status(200);
+      res.setHeader("Content-Type", "text/event-stream");
+      res.setHeader("Cache-Control", "no-cache");
+      res.setHeader("X-Accel-Buffering", "no");
+      res.flushHeaders();
+
+      const reader = flaskResponse.body.getReader();
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        res.write(value);
+      }
+      res.end();
+    } catch (error) {
+      if (controller.signal.aborted) return;
+      console.error(`Error forwarding to Flask: ${error}`);
+      if (res.headersSent) {
+        res.end();
+      } else {
+        res.status(503).json({ error: "Voice sessions are unavailable" });
+      }
+    }
+  });
+
   app.get("/api/generate-insights/:surveyId", async (req, res) => {
     try {
       const surveyId = req.params.surveyId;
-      // Forward to Flask server
-      const flaskUrl = `http://0.0.0.0:8000/generate-insights/${surveyId}`;
+      // Forward to Flask server, keeping the view and refresh parameters
+      const queryIndex = req.originalUrl.indexOf("?");
+      const query = queryIndex >= 0 ? req.originalUrl.slice(queryIndex) : "";
+      const flaskUrl = `http://0.0.0.0:8000/generate-insights/${surveyId}${query}`;
       console.log(`Forwarding request to Flask: ${flaskUrl}`);
       
       const flaskResponse = await fetch(flaskUrl, {
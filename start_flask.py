@@ -8,21 +8,13 @@ logger = logging.getLogger(__name__)
 
 try:
     logger.info("Initializing NLP environment...")
-    import nltk
-    import spacy
+    import nlp_models
     
-    # Download required NLTK resources
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('vader_lexicon', quiet=True)
-    nltk.download('wordnet', quiet=True)
-    
-    # Load spaCy model
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        logger.info("Downloading spaCy model...")
-        spacy.cli.download("en_core_web_sm")
+    # Download missing NLTK resources and the spaCy model, and keep them
+    # loaded in the shared registry so flask_server reuses them
+    for name, stats in nlp_models.warm_up().items():
+        if not stats['loaded']:
+            raise RuntimeError(f"Failed to load NLP model '{name}'")
     
     logger.info("NLP environment initialized successfully")
     
@@ -0,0 +1,586 @@
+import io
+import json
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable, BinaryIO
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Columns (cleaned names) stored as categorical codes
+CATEGORICAL_COLUMNS = ['company_name', 'role', 'department', 'category']
+
+# Dimensions of the view levels (holding, company, team) plus department drill-downs
+VIEW_DIMENSIONS = ['company_name', 'role', 'department']
+
+# Columns the processed data is broken down by (department or feedback category)
+GROUP_COLUMNS = ['department', 'category']
+
+# What each processed-data section is computed from, besides the survey
+# metadata: 'numeric' and 'text' columns and the 'groups' columns
+SECTION_INPUTS = {
+    'departments': {'groups'},
+    'department_data': {'groups', 'numeric', 'text'},
+    'categories': {'groups'},
+    'category_data': {'groups', 'numeric'},
+    'overall_averages': {'numeric'},
+    'numeric_averages': {'numeric'},
+    'feedback_data': {'text'},
+    'categorical_data': {'text'},
+}
+
+class TextColumn:
+    """
+    Strings packed into one UTF-8 byte buffer with offsets, as in Arrow
+
+    Missing values take a zero-length slot and are marked in valid.
+    """
+
+    def __init__(self, data: bytes, offsets: np.ndarray, valid: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.valid = valid
+
+    @classmethod
+    def from_values(cls, values) -> 'TextColumn':
+        """
+        Pack a sequence of values (strings, or anything str() can render)
+        """
+        values = np.asarray(values, dtype=object)
+        valid = ~pd.isna(values)
+        encoded = [str(value).encode('utf-8') for value in values[valid]]
+        lengths = np.zeros(len(values), dtype=np.int64)
+        lengths[valid] = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(b''.join(encoded), offsets, valid)
+
+    @classmethod
+    def missing(cls, length: int) -> 'TextColumn':
+        return cls(b'', np.zeros(length + 1, dtype=np.int64), np.zeros(length, dtype=bool))
+
+    @classmethod
+    def concat(cls, columns: List['TextColumn']) -> 'TextColumn':
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + base)
+            base += len(column.data)
+        return cls(b''.join(column.data for column in columns), np.concatenate(offsets),
+                   np.concatenate([column.valid for column in columns]) if columns else np.zeros(0, dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.nbytes + self.valid.nbytes
+
+    def to_list(self, rows: np.ndarray) -> List[str]:
+        """
+        Decode the non-missing values at the given row positions, in order
+        """
+        rows = rows[self.valid[rows]]
+        data = self.data
+        return [data[start:end].decode('utf-8')
+                for start, end in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+
+class ColumnarSurvey:
+    """
+    Compact, column-oriented form of an uploaded survey
+
+    Numeric answers are float32 arrays, company/role/department/category are
+    categorical codes (-1 for missing) and free text lives in TextColumn
+    buffers. Views share the underlying columns and only hold the selected
+    row positions. to_dict() materializes the processed-survey dict that
+    process_csv_data returns for the same rows.
+    """
+
+    def __init__(self, survey_type: str, period: str, columns: List[str], kinds: Dict[str, str],
+                 numeric: Dict[str, np.ndarray], text: Dict[str, TextColumn],
+                 categorical: Dict[str, Tuple[np.ndarray, List[Any]]], length: int,
+                 rows: Optional[np.ndarray] = None, parent: Optional['ColumnarSurvey'] = None):
+        self.survey_type = survey_type
+        self.period = period
+        self.columns = columns
+        self.kinds = kinds
+        self.numeric = numeric
+        self.text = text
+        self.categorical = categorical
+        self.length = length
+        self.rows = rows
+        self._parent = parent
+        self._digest = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, survey_type: str, period: str) -> 'ColumnarSurvey':
+        """
+        Build from a DataFrame with cleaned column names
+        """
+        builder = ColumnarSurveyBuilder(survey_type, period)
+        builder.add_chunk(df)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return self.length if self.rows is None else len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the columns (shared with any views)
+        """
+        total = sum(values.nbytes for values in self.numeric.values())
+        total += sum(column.nbytes for column in self.text.values())
+        for codes, categories in self.categorical.values():
+            total += codes.nbytes + sum(len(str(category)) + 49 for category in categories)
+        if self.rows is not None:
+            total += self.rows.nbytes
+        return total
+
+    def select(self, filters: Dict[str, str]) -> 'ColumnarSurvey':
+        """
+        Return the view of rows matching equality filters on the view dimensions
+
+        Company and role filters only apply when both columns exist, as in
+        data_processor.filter_view_level; missing values never match.
+
+        Args:
+            filters: Mapping of cleaned column name to required value
+        """
+        active = {
+            col: str(value) for col, value in filters.items()
+            if col in self.categorical and (
+                col not in ('company_name', 'role')
+                or ('company_name' in self.categorical and 'role' in self.categorical))
+        }
+        if not active:
+            return self
+
+        mask = np.ones(len(self), dtype=bool)
+        for col, value in active.items():
+            codes, categories = self.categorical[col]
+            matching = [code for code, category in enumerate(categories) if str(category) == value]
+            mask &= np.isin(self._take(codes), matching)
+
+        rows = np.flatnonzero(mask)
+        if self.rows is not None:
+            rows = self.rows[rows]
+        return ColumnarSurvey(self.survey_type, self.period, self.columns, self.kinds, self.numeric,
+                              self.text, self.categorical, self.length, rows=rows, parent=self._parent or self)
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of the survey (and of the selected rows for a view)
+        """
+        base = self._parent or self
+        if base._digest is None:
+            digest = hashlib.sha256()
+            digest.update(json.dumps(base._metadata(), sort_keys=True, default=str).encode('utf-8'))
+            for col in base.columns:
+                if col in base.numeric:
+                    digest.update(base.numeric[col].tobytes())
+                if col in base.categorical:
+                    digest.update(base.categorical[col][0].tobytes())
+                if col in base.text:
+                    column = base.text[col]
+                    digest.update(column.data)
+                    digest.update(column.offsets.tobytes())
+                    digest.update(column.valid.tobytes())
+            base._digest = digest.hexdigest()
+        if self.rows is None:
+            return base._digest
+        return hashlib.sha256(base._digest.encode('ascii') + self.rows.tobytes()).hexdigest()
+
+    def grouped_totals(self, dims: List[str]) -> Tuple[List[Tuple[Any, ...]], np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Count rows and average numeric columns per combination of dimensions
+
+        Rows with a missing value in any of the dimensions are left out.
+
+        Args:
+            dims: Categorical columns to group by (none for a single group)
+
+        Returns:
+            Tuple of (group keys, responses per group, mean per group for each numeric column)
+        """
+        codes = [self._take(self.categorical[col][0]) for col in dims]
+        if any(not self.categorical[col][1] for col in dims):
+            # A dimension with no values at all has no groups
+            return [], np.zeros(0, dtype=np.int64), {col: np.zeros(0) for col in self._columns('numeric')}
+        if codes:
+            valid = np.logical_and.reduce([column >= 0 for column in codes])
+            sizes = [len(self.categorical[col][1]) for col in dims]
+            combined = np.ravel_multi_index([column[valid] for column in codes], sizes)
+            group_ids, inverse = np.unique(combined, return_inverse=True)
+            keys = [
+                tuple(self.categorical[col][1][index] for col, index in zip(dims, indices))
+                for indices in zip(*np.unravel_index(group_ids, sizes))
+            ]
+        else:
+            valid = np.ones(len(self), dtype=bool)
+            inverse = np.zeros(len(self), dtype=np.intp)
+            keys = [()]
+
+        responses = np.bincount(inverse, minlength=len(keys))
+        means = {}
+        for col in self._columns('numeric'):
+            values = self._take(self.numeric[col])[valid].astype(np.float64)
+            present = ~np.isnan(values)
+            totals = np.bincount(inverse[present], weights=values[present], minlength=len(keys))
+            counts = np.bincount(inverse[present], minlength=len(keys))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[col] = totals / counts
+        return keys, responses, means
+
+    def to_dict(self, sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Materialize the processed survey dict for these rows
+
+        Args:
+            sections: Top-level keys to compute (all if None); only the work
+                those sections need is done
+        """
+        names = None if sections is None else list(sections)
+        wanted = (lambda name: True) if names is None else set(names).__contains__
+        if self.survey_type == 'Employee Survey':
+            data = self._employee_survey(wanted)
+        elif self.survey_type == 'Customer Feedback':
+            data = self._customer_feedback(wanted)
+        else:
+            data = self._generic_survey(wanted)
+        return data if names is None else {name: data[name] for name in names if name in data}
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the survey (the full survey for a view) without pickling
+        """
+        base = self._parent or self
+        arrays = {'meta': np.frombuffer(json.dumps(base._metadata()).encode('utf-8'), dtype=np.uint8)}
+        for index, col in enumerate(base.columns):
+            if col in base.numeric:
+                arrays[f'numeric_{index}'] = base.numeric[col]
+            if col in base.categorical:
+                arrays[f'codes_{index}'] = base.categorical[col][0]
+            if col in base.text:
+                column = base.text[col]
+                arrays[f'text_{index}'] = np.frombuffer(column.data, dtype=np.uint8)
+                arrays[f'offsets_{index}'] = column.offsets
+                arrays[f'valid_{index}'] = column.valid
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> 'ColumnarSurvey':
+        return cls._load(io.BytesIO(payload))
+
+    @classmethod
+    def sections_from_file(cls, file: BinaryIO, sections: Iterable[str]) -> Dict[str, Any]:
+        """
+        Materialize some sections of the processed survey dict straight from
+        a serialized survey, reading only the arrays they are computed from
+
+        Args:
+            file: Seekable binary file holding to_bytes() output
+            sections: Top-level keys to compute
+        """
+        names = list(sections)
+        inputs = set().union(*(SECTION_INPUTS.get(name, ()) for name in names))
+        return cls._load(file, inputs).to_dict(names)
+
+    @classmethod
+    def _load(cls, file: BinaryIO, inputs: Optional[set] = None) -> 'ColumnarSurvey':
+        # With inputs, columns not needed for them are left unloaded, so the
+        # result is only good for to_dict of the sections they were taken from
+        with np.load(file, allow_pickle=False) as arrays:
+            meta = json.loads(arrays['meta'].tobytes().decode('utf-8'))
+            numeric, text, categorical = {}, {}, {}
+            for index, col in enumerate(meta['columns']):
+                kind = meta['kinds'].get(col)
+                if inputs is not None and kind not in inputs and not (
+                        col in GROUP_COLUMNS and 'groups' in inputs):
+                    continue
+                if f'numeric_{index}' in arrays:
+                    numeric[col] = arrays[f'numeric_{index}']
+                if f'codes_{index}' in arrays:
+                    categorical[col] = (arrays[f'codes_{index}'], meta['categories'][col])
+                if f'text_{index}' in arrays:
+                    text[col] = TextColumn(arrays[f'text_{index}'].tobytes(), arrays[f'offsets_{index}'],
+                                           arrays[f'valid_{index}'])
+        return cls(meta['survey_type'], meta['period'], meta['columns'], meta['kinds'],
+                   numeric, text, categorical, meta['length'])
+
+    def _metadata(self) -> Dict[str, Any]:
+        return {
+            'survey_type': self.survey_type,
+            'period': self.period,
+            'columns': self.columns,
+            'kinds': self.kinds,
+            'length': self.length,
+            'categories': {col: categories for col, (_, categories) in self.categorical.items()}
+        }
+
+    def _columns(self, kind: str) -> List[str]:
+        return [col for col in self.columns if self.kinds.get(col) == kind]
+
+    def _take(self, values: np.ndarray) -> np.ndarray:
+        return values if self.rows is None else values[self.rows]
+
+    def _absolute(self, positions: np.ndarray) -> np.ndarray:
+        return positions if self.rows is None else self.rows[positions]
+
+    def _mean(self, col: str) -> float:
+        values = self._take(self.numeric[col]).astype(np.float64)
+        present = ~np.isnan(values)
+        count = int(present.sum())
+        return float(values[present].sum() / count) if count else np.nan
+
+    def _group_means(self, groups: List[Tuple[Any, np.ndarray]], numeric_cols: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Mean of each numeric column per group, in one pass per column
+        """
+        labels = np.empty(len(self), dtype=np.intp)
+        for index, (_, positions) in enumerate(groups):
+            labels[positions] = index
+        means = {}
+        for col in numeric_cols:
+            values = self._take(self.numeric[col]).astype(np.float64)
+            present = ~np.isnan(values)
+            totals = np.bincount(labels[present], weights=values[present], minlength=len(groups))
+            counts = np.bincount(labels[present], minlength=len(groups))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[col] = totals / counts
+        return means
+
+    def _texts(self, col: str, positions: np.ndarray) -> List[Any]:
+        """
+        Non-missing values of a text column at view positions, in row order
+        """
+        if col in self.categorical:
+            codes, categories = self.categorical[col]
+            codes = self._take(codes)[positions]
+            return [categories[code] for code in codes[codes >= 0].tolist()]
+        if col in self.text:
+            return self.text[col].to_list(self._absolute(positions))
+        return []
+
+    def _groups(self, col: str) -> List[Tuple[Any, np.ndarray]]:
+        """
+        Split the view by a categorical column in order of first appearance
+
+        Missing values form one group keyed by NaN, as DataFrame.unique() reports them.
+        """
+        codes, categories = self.categorical[col]
+        codes = self._take(codes)
+        order = np.argsort(codes, kind='stable')
+        group_codes, starts = np.unique(codes[order], return_index=True)
+        groups = [
+            (code, order[start:end])
+            for code, start, end in zip(group_codes.tolist(), starts.tolist(), starts[1:].tolist() + [len(order)])
+        ]
+        groups.sort(key=lambda group: group[1][0])
+        return [(categories[code] if code >= 0 else np.nan, positions) for code, positions in groups]
+
+    def _employee_survey(self, wanted: Callable[[str], bool]) -> Dict[str, Any]:
+        numeric_cols = self._columns('numeric')
+        total_responses = len(self)
+        data = {'survey_type': 'Employee Survey', 'period': self.period, 'total_responses': total_responses}
+
+        if wanted('departments') or wanted('department_data'):
+            if 'department' in self.categorical:
+                groups = self._groups('department')
+            else:
+                groups = [('Unspecified', np.arange(total_responses))]
+        if wanted('departments'):
+            data['departments'] = [dept for dept, _ in groups]
+        if wanted('overall_averages'):
+            data['overall_averages'] = {col: self._mean(col) for col in numeric_cols}
+        if not wanted('department_data'):
+            return data
+
+        text_cols = [col for col in self._columns('text') if col != 'department']
+        means = self._group_means(groups, numeric_cols)
+        department_data = {}
+        for index, (dept, positions) in enumerate(groups):
+            if isinstance(dept, float) and np.isnan(dept):
+                # Missing department values never match an equality filter
+                positions = np.array([], dtype=np.intp)
+                dept_data = {'responses': 0, 'averages': {col: np.nan for col in numeric_cols}}
+            else:
+                dept_data = {
+                    'responses': len(positions),
+                    'averages': {col: float(means[col][index]) for col in numeric_cols}
+                }
+
+            if text_cols:
+                dept_data['text_responses'] = {col: self._texts(col, positions) for col in text_cols}
+
+            department_data[dept] = dept_data
+
+        data['department_data'] = department_data
+        return data
+
+    def _customer_feedback(self, wanted: Callable[[str], bool]) -> Dict[str, Any]:
+        numeric_cols = self._columns('numeric')
+        total_responses = len(self)
+        data = {'survey_type': 'Customer Feedback', 'period': self.period, 'total_responses': total_responses}
+
+        has_categories = 'category' in self.categorical
+        if has_categories and (wanted('categories') or wanted('category_data')):
+            groups = self._groups('category')
+        if wanted('categories'):
+            data['categories'] = ([cat for cat, _ in groups] if has_categories else []) or ['Unspecified']
+        if wanted('overall_averages') or (wanted('category_data') and not has_categories):
+            avg_ratings = {col: self._mean(col) for col in numeric_cols}
+        if wanted('overall_averages'):
+            data['overall_averages'] = avg_ratings
+
+        if wanted('category_data') and has_categories:
+            means = self._group_means(groups, numeric_cols)
+            category_data = {}
+            for index, (cat, positions) in enumerate(groups):
+                # Missing category values never match an equality filter
+                missing = isinstance(cat, float) and np.isnan(cat)
+                category_data[cat] = {
+                    'responses': 0 if missing else len(positions),
+                    'averages': {col: np.nan if missing else float(means[col][index]) for col in numeric_cols}
+                }
+            data['category_data'] = category_data
+        elif wanted('category_data'):
+            data['category_data'] = {'Unspecified': {'responses': total_responses, 'averages': avg_ratings}}
+
+        if wanted('feedback_data'):
+            everything = np.arange(total_responses)
+            data['feedback_data'] = {col: self._texts(col, everything)
+                                     for col in self._columns('text') if col != 'category'}
+        return data
+
+    def _generic_survey(self, wanted: Callable[[str], bool]) -> Dict[str, Any]:
+        everything = np.arange(len(self))
+        data = {'survey_type': 'Generic Survey', 'period': self.period, 'total_responses': len(self)}
+        if wanted('numeric_averages'):
+            data['numeric_averages'] = {col: self._mean(col) for col in self._columns('numeric')}
+        if wanted('categorical_data'):
+            data['categorical_data'] = {
+                col: pd.Series(self._texts(col, everything), dtype=object).value_counts().to_dict()
+                for col in self._columns('text')
+            }
+        return data
+
+class ColumnarSurveyBuilder:
+    """
+    Builds a ColumnarSurvey from chunks of rows
+
+    Column types are decided from the first chunk in which a column has
+    values. A numeric column that later contains text is coerced to numbers
+    (unparseable values count as missing). Columns that never have a value
+    are numeric, as read_csv makes all-empty columns float.
+    """
+
+    def __init__(self, survey_type: str, period: str):
+        self.survey_type = survey_type
+        self.period = period
+        self.rows_read = 0
+        self.length = 0
+        self.columns = None
+        self.kinds = {}
+
+        self._numeric = {}      # column -> list of (offset, float32 array)
+        self._text = {}         # column -> list of (offset, TextColumn)
+        self._codes = {}        # column -> list of code arrays
+        self._categories = {}   # column -> {value: code}
+
+    def add_chunk(self, df: pd.DataFrame, source: Optional[pd.DataFrame] = None) -> None:
+        """
+        Append a chunk of (filtered, cleaned) rows
+
+        Args:
+            df: Chunk of survey rows
+            source: The same chunk before view-level filtering, used to count
+                rows read and to decide column types (defaults to df)
+        """
+        source = df if source is None else source
+        self.rows_read += len(source)
+        if self.columns is None:
+            self.columns = list(df.columns)
+        self._classify_columns(source)
+
+        for col in self.columns:
+            values = df[col]
+            kind = self.kinds.get(col)
+            if col in CATEGORICAL_COLUMNS:
+                self._add_codes(col, values)
+            if kind == 'numeric':
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = pd.to_numeric(values, errors='coerce')
+                self._numeric.setdefault(col, []).append((self.length, values.to_numpy(dtype=np.float32)))
+            elif kind == 'text' and col not in CATEGORICAL_COLUMNS:
+                self._text.setdefault(col, []).append((self.length, TextColumn.from_values(values.to_numpy(dtype=object))))
+        self.length += len(df)
+
+    def build(self) -> ColumnarSurvey:
+        """
+        Return the assembled survey
+        """
+        if self.rows_read == 0:
+            raise ValueError("CSV file is empty")
+
+        # Columns that never had a value behave like all-NaN numeric columns
+        for col in self.columns:
+            self.kinds.setdefault(col, 'numeric')
+
+        numeric = {}
+        text = {}
+        categorical = {}
+        for col in self.columns:
+            if self.kinds[col] == 'numeric':
+                values = np.full(self.length, np.nan, dtype=np.float32)
+                for offset, chunk in self._numeric.get(col, []):
+                    values[offset:offset + len(chunk)] = chunk
+                numeric[col] = values
+            elif self.kinds[col] == 'text' and col not in CATEGORICAL_COLUMNS:
+                pieces = []
+                filled = 0
+                for offset, chunk in self._text.get(col, []):
+                    # Rows before the column was classified had no values
+                    if offset > filled:
+                        pieces.append(TextColumn.missing(offset - filled))
+                    pieces.append(chunk)
+                    filled = offset + len(chunk)
+                if filled < self.length:
+                    pieces.append(TextColumn.missing(self.length - filled))
+                text[col] = TextColumn.concat(pieces)
+            if col in CATEGORICAL_COLUMNS:
+                codes = self._codes.get(col, [])
+                categorical[col] = (np.concatenate(codes) if codes else np.zeros(0, dtype=np.int32),
+                                    list(self._categories.get(col, {})))
+
+        return ColumnarSurvey(self.survey_type, self.period, list(self.columns), dict(self.kinds),
+                              numeric, text, categorical, self.length)
+
+    def _classify_columns(self, df: pd.DataFrame):
+        numeric = set(df.select_dtypes(include=['number']).columns)
+        text = set(df.select_dtypes(include=['object', 'string']).columns)
+        for col in df.columns:
+            if col in self.kinds or not df[col].notna().any():
+                continue
+            if col in numeric:
+                self.kinds[col] = 'numeric'
+            elif col in text:
+                self.kinds[col] = 'text'
+            else:
+                # Other dtypes (booleans, dates) are not analyzed
+                self.kinds[col] = 'other'
+
+    def _add_codes(self, col: str, values: pd.Series):
+        codes, uniques = pd.factorize(values)
+        lookup = self._categories.setdefault(col, {})
+        remap = np.array([lookup.setdefault(value, len(lookup)) for value in uniques.tolist()], dtype=np.int32)
+        self._codes.setdefault(col, []).append(
+            np.where(codes >= 0, remap[np.maximum(codes, 0)] if len(remap) else -1, -1).astype(np.int32)
+        )
@@ -0,0 +1,536 @@
+import io
+import os
+import json
+import sqlite3
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Iterable, Union
+
+import numpy as np
+
+from result_cache import stable_hash
+from survey_columns import ColumnarSurvey
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Storage configuration from environment variables
+SURVEY_STORE_BACKEND = os.environ.get("SURVEY_STORE_BACKEND", "sqlite")
+SURVEY_STORE_PATH = os.environ.get("SURVEY_STORE_PATH", "survey_data.db")
+
+def _json_default(value: Any) -> Any:
+    """
+    Convert NumPy values that json cannot serialize natively
+    """
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Column order of the survey_kpis table
+KPI_COLUMNS = ("survey_id, company, role, department, responses, participation_rate, average_score, "
+               "participation_change, score_change, previous_survey_id, previous_period")
+
+def _whole(value: Optional[float]) -> Optional[float]:
+    """
+    Return whole-number REAL values as ints, as they were before storage
+    """
+    return int(value) if value is not None and float(value).is_integer() else value
+
+def survey_fingerprint(data: Union[ColumnarSurvey, Dict[str, Any]]) -> str:
+    """
+    Content hash of a survey's rows, or of its processed data for surveys
+    stored without columns
+    """
+    return data.fingerprint() if isinstance(data, ColumnarSurvey) else stable_hash(data)
+
+class _BlobFile(io.RawIOBase):
+    """
+    Seekable read-only file over a SQLite blob, so that np.load reads only
+    the archive members it is asked for
+    """
+
+    def __init__(self, blob: sqlite3.Blob):
+        self._blob = blob
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._blob.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._blob.seek(offset, whence)
+        return self._blob.tell()
+
+    def tell(self) -> int:
+        return self._blob.tell()
+
+class SurveyStore(ABC):
+    """
+    Base interface for survey storage backends
+
+    Each survey is stored as metadata (id, type, period, company) plus its
+    rows in columnar form. Surveys stored as processed data dicts (before
+    columns were kept) are split into top-level sections instead. Either way
+    get_survey returns processed data sections, so callers can load only the
+    sections they need.
+    """
+
+    @abstractmethod
+    def create_survey(self, survey_type: str, period: str, data: Union[ColumnarSurvey, Dict[str, Any]],
+                      company: Optional[str] = None) -> int:
+        """
+        Store a survey and allocate its id
+
+        Args:
+            survey_type: Type of survey (Employee Survey, Customer Feedback, etc.)
+            period: Survey period (Q1 2023, etc.)
+            data: Columnar survey, or processed survey data
+            company: Optional company the survey belongs to
+
+        Returns:
+            Newly allocated survey id
+        """
+
+    @abstractmethod
+    def get_survey(self, survey_id: int, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Load a survey by id
+
+        Args:
+            survey_id: ID of the survey
+            sections: Top-level keys of the processed data to load (all if None)
+
+        Returns:
+            Survey record with 'id', 'type', 'period', 'company' and 'data', or None
+        """
+
+    @abstractmethod
+    def get_columns(self, survey_id: int) -> Optional[ColumnarSurvey]:
+        """
+        Load the columnar rows of a survey
+
+        Returns:
+            ColumnarSurvey, or None if the survey does not exist or was stored
+            as processed data only
+        """
+
+    @abstractmethod
+    def get_fingerprint(self, survey_id: int) -> Optional[str]:
+        """
+        Return the content hash recorded when the survey was stored, without
+        loading its rows
+
+        Returns:
+            Fingerprint (see survey_fingerprint), or None if the survey does not exist
+        """
+
+    @abstractmethod
+    def list_surveys(self, company: Optional[str] = None, period: Optional[str] = None,
+                     survey_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List survey metadata matching the given filters
+
+        Args:
+            company: Company name to filter by
+            period: Survey period to filter by
+            survey_type: Survey type to filter by
+
+        Returns:
+            List of survey records without their data, ordered by id
+        """
+
+    def has_survey(self, survey_id: int) -> bool:
+        """
+        Check whether a survey exists
+        """
+        return self.get_survey(survey_id, sections=[]) is not None
+
+    @abstractmethod
+    def save_kpis(self, survey_id: int, rows: List[Dict[str, Any]]) -> None:
+        """
+        Replace the precomputed KPI rollups of a survey
+
+        Args:
+            survey_id: ID of the survey
+            rows: KPI rows keyed by 'company', 'role' and 'department' ('' for all)
+        """
+
+    @abstractmethod
+    def get_kpis(self, survey_id: int, company: str = '', role: str = '',
+                 department: str = '') -> Optional[Dict[str, Any]]:
+        """
+        Look up one precomputed KPI row
+
+        Args:
+            survey_id: ID of the survey
+            company: Company slice ('' for all companies)
+            role: Role slice ('' for all roles)
+            department: Department slice ('' for all departments)
+
+        Returns:
+            KPI row, or None if the survey has no rollup for the slice
+        """
+
+    @abstractmethod
+    def list_kpis(self, survey_id: int) -> List[Dict[str, Any]]:
+        """
+        Return every precomputed KPI row of a survey
+        """
+
+class InMemorySurveyStore(SurveyStore):
+    """
+    Process-local store, useful for development and tests
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._surveys = {}
+        self._kpis = {}
+        self._fingerprints = {}
+        self._next_id = 1
+
+    def create_survey(self, survey_type: str, period: str, data: Union[ColumnarSurvey, Dict[str, Any]],
+                      company: Optional[str] = None) -> int:
+        fingerprint = survey_fingerprint(data)
+        with self._lock:
+            survey_id = self._next_id
+            self._next_id += 1
+            self._fingerprints[survey_id] = fingerprint
+            self._surveys[survey_id] = {
+                'id': survey_id,
+                'type': survey_type,
+                'period': period,
+                'company': company,
+                'createdAt': time.time(),
+                'data': data
+            }
+        return survey_id
+
+    def get_survey(self, survey_id: int, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        record = self._surveys.get(survey_id)
+        if record is None:
+            return None
+
+        data = record['data']
+        if isinstance(data, ColumnarSurvey):
+            # Materialize only the sections asked for
+            data = data.to_dict(sections)
+        elif sections is not None:
+            data = {key: data[key] for key in sections if key in data}
+        return {**record, 'data': data}
+
+    def get_columns(self, survey_id: int) -> Optional[ColumnarSurvey]:
+        record = self._surveys.get(survey_id)
+        if record is None or not isinstance(record['data'], ColumnarSurvey):
+            return None
+        return record['data']
+
+    def get_fingerprint(self, survey_id: int) -> Optional[str]:
+        return self._fingerprints.get(survey_id)
+
+    def list_surveys(self, company: Optional[str] = None, period: Optional[str] = None,
+                     survey_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._surveys.values())
+        return [
+            {key: value for key, value in record.items() if key != 'data'}
+            for record in records
+            if (company is None or record['company'] == company)
+            and (period is None or record['period'] == period)
+            and (survey_type is None or record['type'] == survey_type)
+        ]
+
+    def save_kpis(self, survey_id: int, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._kpis[survey_id] = {
+                (row['company'], row['role'], row['department']): dict(row)
+                for row in rows
+            }
+
+    def get_kpis(self, survey_id: int, company: str = '', role: str = '',
+                 department: str = '') -> Optional[Dict[str, Any]]:
+        row = self._kpis.get(survey_id, {}).get((company, role, department))
+        return dict(row) if row is not None else None
+
+    def list_kpis(self, survey_id: int) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._kpis.get(survey_id, {}).values()]
+
+class SQLiteSurveyStore(SurveyStore):
+    """
+    On-disk store backed by SQLite
+
+    Ids come from an AUTOINCREMENT primary key inside a write transaction, and
+    the database runs in WAL mode, so several threads and worker processes can
+    share one file safely.
+    """
+
+    def __init__(self, path: str = SURVEY_STORE_PATH, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return a connection owned by the current thread and process
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS surveys (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survey_type TEXT NOT NULL,
+                period TEXT NOT NULL,
+                company TEXT,
+                created_at REAL NOT NULL,
+                fingerprint TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_surveys_company ON surveys (company, period, survey_type);
+            CREATE INDEX IF NOT EXISTS idx_surveys_period ON surveys (period, survey_type);
+            CREATE INDEX IF NOT EXISTS idx_surveys_type ON surveys (survey_type, period);
+            CREATE TABLE IF NOT EXISTS survey_sections (
+                survey_id INTEGER NOT NULL REFERENCES surveys (id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (survey_id, name)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS survey_columns (
+                survey_id INTEGER PRIMARY KEY REFERENCES surveys (id) ON DELETE CASCADE,
+                payload BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS survey_kpis (
+                survey_id INTEGER NOT NULL REFERENCES surveys (id) ON DELETE CASCADE,
+                company TEXT NOT NULL,
+                role TEXT NOT NULL,
+                department TEXT NOT NULL,
+                responses INTEGER NOT NULL,
+                participation_rate REAL NOT NULL,
+                average_score REAL NOT NULL,
+                participation_change REAL,
+                score_change REAL,
+                previous_survey_id INTEGER,
+                previous_period TEXT,
+                PRIMARY KEY (survey_id, company, role, department)
+            ) WITHOUT ROWID;
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(surveys)")}
+        if 'fingerprint' not in columns:
+            # Surveys stored before fingerprints get theirs on first use
+            conn.execute("ALTER TABLE surveys ADD COLUMN fingerprint TEXT")
+
+    def create_survey(self, survey_type: str, period: str, data: Union[ColumnarSurvey, Dict[str, Any]],
+                      company: Optional[str] = None) -> int:
+        # Serialize before taking the write lock to keep the transaction short
+        fingerprint = survey_fingerprint(data)
+        if isinstance(data, ColumnarSurvey):
+            payload = data.to_bytes()
+            sections = []
+        else:
+            payload = None
+            sections = [
+                (name, json.dumps(value, default=_json_default))
+                for name, value in data.items()
+            ]
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT INTO surveys (survey_type, period, company, created_at, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                (survey_type, period, company, time.time(), fingerprint)
+            )
+            survey_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO survey_sections (survey_id, name, payload) VALUES (?, ?, ?)",
+                [(survey_id, name, section) for name, section in sections]
+            )
+            if payload is not None:
+                conn.execute("INSERT INTO survey_columns (survey_id, payload) VALUES (?, ?)", (survey_id, payload))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return survey_id
+
+    def get_survey(self, survey_id: int, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, survey_type, period, company, created_at FROM surveys WHERE id = ?",
+            (survey_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        record = self._row_to_record(row)
+        names = None if sections is None else list(sections)
+        if names is None:
+            columns = self.get_columns(survey_id)
+            if columns is not None:
+                record['data'] = columns.to_dict()
+                return record
+        elif names and conn.execute("SELECT 1 FROM survey_columns WHERE survey_id = ?", (survey_id,)).fetchone():
+            # Read just the arrays the requested sections are computed from
+            with conn.blobopen('survey_columns', 'payload', survey_id, readonly=True) as blob:
+                record['data'] = ColumnarSurvey.sections_from_file(io.BufferedReader(_BlobFile(blob)), names)
+            return record
+
+        if sections is None:
+            section_rows = conn.execute(
+                "SELECT name, payload FROM survey_sections WHERE survey_id = ?",
+                (survey_id,)
+            ).fetchall()
+        else:
+            section_rows = []
+            if names:
+                placeholders = ', '.join('?' * len(names))
+                section_rows = conn.execute(
+                    f"SELECT name, payload FROM survey_sections WHERE survey_id = ? AND name IN ({placeholders})",
+                    (survey_id, *names)
+                ).fetchall()
+
+        record['data'] = {name: json.loads(payload) for name, payload in section_rows}
+        return record
+
+    def get_columns(self, survey_id: int) -> Optional[ColumnarSurvey]:
+        row = self._connect().execute(
+            "SELECT payload FROM survey_columns WHERE survey_id = ?", (survey_id,)
+        ).fetchone()
+        return ColumnarSurvey.from_bytes(row[0]) if row is not None else None
+
+    def get_fingerprint(self, survey_id: int) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute("SELECT fingerprint FROM surveys WHERE id = ?", (survey_id,)).fetchone()
+        if row is None:
+            return None
+        if row[0] is not None:
+            return row[0]
+
+        columns = self.get_columns(survey_id)
+        fingerprint = survey_fingerprint(columns if columns is not None else self.get_survey(survey_id)['data'])
+        conn.execute("UPDATE surveys SET fingerprint = ? WHERE id = ?", (fingerprint, survey_id))
+        return fingerprint
+
+    def list_surveys(self, company: Optional[str] = None, period: Optional[str] = None,
+                     survey_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses = []
+        params = []
+        for column, value in (('company', company), ('period', period), ('survey_type', survey_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        query = "SELECT id, survey_type, period, company, created_at FROM surveys"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+
+        return [self._row_to_record(row) for row in self._connect().execute(query, params)]
+
+    def has_survey(self, survey_id: int) -> bool:
+        row = self._connect().execute("SELECT 1 FROM surveys WHERE id = ?", (survey_id,)).fetchone()
+        return row is not None
+
+    def save_kpis(self, survey_id: int, rows: List[Dict[str, Any]]) -> None:
+        values = [
+            (survey_id, row['company'], row['role'], row['department'], row['responses'],
+             row['participationRate'], row['averageScore'], row['participationChange'],
+             row['scoreChange'], row['previousSurveyId'], row['previousPeriod'])
+            for row in rows
+        ]
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM survey_kpis WHERE survey_id = ?", (survey_id,))
+            conn.executemany(f"INSERT INTO survey_kpis ({KPI_COLUMNS}) VALUES ({', '.join('?' * 11)})", values)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_kpis(self, survey_id: int, company: str = '', role: str = '',
+                 department: str = '') -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT {KPI_COLUMNS} FROM survey_kpis "
+            "WHERE survey_id = ? AND company = ? AND role = ? AND department = ?",
+            (survey_id, company, role, department)
+        ).fetchone()
+        return self._row_to_kpis(row) if row is not None else None
+
+    def list_kpis(self, survey_id: int) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            f"SELECT {KPI_COLUMNS} FROM survey_kpis WHERE survey_id = ?", (survey_id,)
+        )
+        return [self._row_to_kpis(row) for row in rows]
+
+    @staticmethod
+    def _row_to_kpis(row) -> Dict[str, Any]:
+        (_, company, role, department, responses, participation_rate, average_score,
+         participation_change, score_change, previous_survey_id, previous_period) = row
+        return {
+            'company': company,
+            'role': role,
+            'department': department,
+            'responses': responses,
+            'participationRate': _whole(participation_rate),
+            'averageScore': average_score,
+            'participationChange': _whole(participation_change),
+            'scoreChange': score_change,
+            'previousSurveyId': previous_survey_id,
+            'previousPeriod': previous_period
+        }
+
+    @staticmethod
+    def _row_to_record(row) -> Dict[str, Any]:
+        survey_id, survey_type, period, company, created_at = row
+        return {
+            'id': survey_id,
+            'type': survey_type,
+            'period': period,
+            'company': company,
+            'createdAt': created_at
+        }
+
+def get_survey_store(backend: str = SURVEY_STORE_BACKEND, path: str = SURVEY_STORE_PATH) -> SurveyStore:
+    """
+    Create the survey store configured for this deployment
+
+    Args:
+        backend: Storage backend name ('sqlite' or 'memory')
+        path: Database file for the SQLite backend
+
+    Returns:
+        SurveyStore instance
+    """
+    if backend == "memory":
+        return InMemorySurveyStore()
+    if backend == "sqlite":
+        logger.info(f"Using SQLite survey store at {path}")
+        return SQLiteSurveyStore(path)
+    raise ValueError(f"Unknown survey store backend: {backend}")
@@ -0,0 +1,36 @@
+import pytest
+
+import flask_server
+from analysis_pool import AnalysisPool
+from benchmarks import synthetic
+from data_processor import load_csv_survey
+from insight_service import insight_cache_key
+from result_cache import ResultCache
+from survey_store import InMemorySurveyStore
+from topic_model import topic_family
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(flask_server, 'survey_store', InMemorySurveyStore())
+    monkeypatch.setattr(flask_server, 'insight_cache', ResultCache('insights-test'))
+    monkeypatch.setattr(flask_server, 'analysis_pool', AnalysisPool(workers=0))
+    return flask_server.app.test_client()
+
+def test_insights_refresh_replaces_cached_entry(client, monkeypatch):
+    columns = load_csv_survey(synthetic.to_csv(synthetic.employee_survey(40)), 'Employee Survey', 'Q1 2024')
+    survey_id = flask_server.survey_store.create_survey('Employee Survey', 'Q1 2024', columns, company='Acme')
+    key = insight_cache_key(columns.fingerprint(), topic_family('Acme', 'Employee Survey'))
+    flask_server.insight_cache.set(key, {'stale': True})
+    generated = []
+    generate = flask_server.generate_survey_insights
+    monkeypatch.setattr(flask_server, 'generate_survey_insights',
+                        lambda *args: generated.append(args) or generate(*args))
+
+    assert client.get(f'/generate-insights/{survey_id}').get_json() == {'stale': True}
+    assert not generated
+
+    fresh = client.get(f'/generate-insights/{survey_id}?refresh=true').get_json()
+    assert len(generated) == 1 and 'stale' not in fresh
+    assert client.get(f'/generate-insights/{survey_id}').get_json() == fresh
+    assert flask_server.insight_cache.get(key) == fresh
+    assert len(generated) == 1
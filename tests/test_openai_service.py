@@ -0,0 +1,165 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import openai_service
+from benchmarks import synthetic
+from data_processor import load_csv_survey, process_csv_data
+from nlp_models import get_word_tokenizer, get_stop_words, get_lemmatizer, get_spacy_model
+from openai_service import (analyze_sentiment, analyze_sentiment_batch, _polarity_scores, collect_free_text,
+                            update_topic_model, preprocess_text, preprocess_texts, generate_survey_insights,
+                            _default_insights, overall_sentiment, generate_insights,
+                            generate_insights_batch, extract_key_phrases_batched)
+from topic_model import TopicModelStore
+
+def reference_preprocess(text):
+    """
+    The original preprocess_text: two regex passes, Punkt tokenization and a WordNet lookup per token
+    """
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    stop_words = get_stop_words()
+    lemmatizer = get_lemmatizer()
+    return ' '.join(lemmatizer.lemmatize(word) for word in get_word_tokenizer()(text) if word not in stop_words)
+
+PREPROCESS_TEXTS = [
+    "The managers aren't listening to our ideas!!",
+    "Q3 results: 42% of teams missed their OKRs in 2024.",
+    "Café culture, naïve roadmaps & über-long meetings",
+    "Work-life balance\tis great\nbut salaries are low...",
+    "don't won't can't shan't",
+    "",
+    "   ",
+    str({'department_data': {'Sales': {'averages': {'1.01_agreement': 4.2}}}}),
+]
+
+@pytest.mark.parametrize('tokenizer', ['regex', 'nltk'])
+def test_preprocess_text_matches_reference(tokenizer):
+    expected = [reference_preprocess(text) for text in PREPROCESS_TEXTS]
+    assert [preprocess_text(text, tokenizer=tokenizer) for text in PREPROCESS_TEXTS] == expected
+    assert list(preprocess_texts(PREPROCESS_TEXTS, tokenizer=tokenizer)) == expected
+
+COMMENTS = ["Great team and supportive manager", "Too many meetings", "Great team and supportive manager", ""]
+
+def test_sentiment_batch_matches_per_text_scores():
+    scores = analyze_sentiment_batch(COMMENTS)
+    for index, text in enumerate(COMMENTS):
+        expected = analyze_sentiment(text)
+        assert scores['compound'][index] == expected['compound']
+        assert scores['positive'][index] == expected['positive']
+        assert scores['negative'][index] == expected['negative']
+        assert scores['neutral'][index] == expected['neutral']
+
+def test_sentiment_batch_does_not_cache_long_texts(monkeypatch):
+    monkeypatch.setattr(openai_service, 'SENTIMENT_CACHE_MAX_LENGTH', 50)
+    _polarity_scores.cache_clear()
+    long_text = "The onboarding was great but the tooling is slow. " * 20
+    scores = analyze_sentiment_batch(["Great team", long_text])
+    assert _polarity_scores.cache_info().currsize == 1
+    assert np.isclose(scores['compound'][1], analyze_sentiment(long_text)['compound'])
+
+EMPLOYEE_SURVEY = {
+    'survey_type': 'Employee Survey',
+    'department_data': {
+        'Sales': {'responses': 2, 'averages': {'q1': 4.0},
+                  'text_responses': {'company_name': ['Acme', 'Acme'], 'role': ['Manager', 'Executive'],
+                                     'comment_1': ['Career paths are unclear', '  ']}},
+        'Engineering': {'responses': 1, 'averages': {'q1': 3.0},
+                        'text_responses': {'company_name': ['Acme'], 'role': ['Engineer'],
+                                           'comment_1': ['Tools are slow and outdated']}}
+    }
+}
+
+def test_collect_free_text_skips_categorical_columns():
+    assert collect_free_text(EMPLOYEE_SURVEY) == ['Career paths are unclear', 'Tools are slow and outdated']
+    assert collect_free_text({'responses': [{'comments': 'Great team'}, {'comments': ''}, {'score': 3}]}) == \
+        ['Great team']
+    assert collect_free_text({'feedback_data': {'feedback': ['Fast delivery', 'Friendly support']}}) == \
+        ['Fast delivery', 'Friendly support']
+
+def test_update_topic_model_learns_only_free_text(monkeypatch, tmp_path):
+    store = TopicModelStore(str(tmp_path))
+    monkeypatch.setattr(openai_service, 'topic_models', store)
+    learned = []
+    update = store.update
+    monkeypatch.setattr(store, 'update', lambda family, texts: learned.append((family, texts)) or update(family, texts))
+    
+    assert update_topic_model(EMPLOYEE_SURVEY, 'acme-employee') == 1
+    assert learned[0] == ('acme-employee', [preprocess_text('Career paths are unclear'),
+                                            preprocess_text('Tools are slow and outdated')])
+    
+    # A survey without free text leaves the models alone
+    learned.clear()
+    no_text = {'department_data': {'Sales': {'responses': 3, 'averages': {'q1': 4.0}}}}
+    assert update_topic_model(no_text, 'acme-employee') == 1
+    assert learned == []
+
+def test_processed_survey_insights_analyze_each_comment(monkeypatch):
+    survey = load_csv_survey(synthetic.to_csv(synthetic.employee_survey(60)), 'Employee Survey', 'Q1 2024')
+    comments = collect_free_text(survey.to_dict())
+    parsed = []
+    batched = openai_service.extract_key_phrases_batched
+    monkeypatch.setattr(openai_service, 'extract_key_phrases_batched',
+                        lambda texts, n=5: batched(parsed.extend(texts) or parsed, n))
+    monkeypatch.setattr(openai_service, 'extract_key_phrases', lambda *args, **kwargs: pytest.fail("whole-text parse"))
+
+    insights = generate_survey_insights(survey)
+    assert insights != _default_insights()
+    assert parsed == comments
+    assert f"Analysis based on {len(comments)} survey responses" in insights['content']
+
+def test_overall_sentiment_averages_comment_scores():
+    comments = ["Great team and supportive manager", "Too many meetings", "The tools are terrible and slow"]
+    result = overall_sentiment(analyze_sentiment_batch(comments))
+    compound = np.mean([analyze_sentiment(comment)['compound'] for comment in comments])
+    assert np.isclose(result['compound'], compound)
+    assert result['score'] == round((compound + 1) * 5, 1)
+    assert overall_sentiment(analyze_sentiment_batch([]))['sentiment'] == 'neutral'
+
+def test_insight_sentiment_scores_comments_not_survey_structure():
+    data = load_csv_survey(synthetic.to_csv(synthetic.employee_survey(60)), 'Employee Survey', 'Q1 2024').to_dict()
+    expected = overall_sentiment(analyze_sentiment_batch(collect_free_text(data)))
+    assert 'Overall sentiment is {sentiment} with a score of {score}/10'.format(**expected) in \
+        generate_insights(data)['content']
+
+def test_insight_topics_use_preprocessed_comments(monkeypatch):
+    data = load_csv_survey(synthetic.to_csv(synthetic.employee_survey(60)), 'Employee Survey', 'Q1 2024').to_dict()
+    topic_texts = []
+    monkeypatch.setattr(openai_service, 'preprocess_text', lambda *args, **kwargs: pytest.fail("whole-text preprocess"))
+    monkeypatch.setattr(openai_service, 'extract_key_topics',
+                        lambda texts, num_topics=3, family=None: topic_texts.extend(texts) or ['topic'])
+
+    generate_insights(data)
+    assert topic_texts == [text for text in preprocess_texts(collect_free_text(data)) if text]
+
+def test_survey_without_comments_has_no_topics_or_phrases():
+    insights = generate_insights({'department_data': {'Sales': {'responses': 3, 'averages': {'q1': 4.0}}}})
+    assert insights != _default_insights()
+    assert insights['keyPhrases'] == []
+    assert insights['tags'] == ['Survey Analysis']
+
+def test_batch_insights_match_per_survey_on_processed_csv(monkeypatch):
+    surveys = [process_csv_data(synthetic.to_csv(synthetic.employee_survey(60, seed=seed)), 'Employee Survey',
+                                'Q1 2024') for seed in range(2)]
+    surveys.append(process_csv_data(synthetic.to_csv(synthetic.customer_feedback(40)), 'Customer Feedback', 'Q1 2024'))
+    surveys.append({'department_data': {'Sales': {'responses': 3, 'averages': {'q1': 4.0}}}})
+    expected = [generate_insights(data) for data in surveys]
+
+    # A failing batch would silently fall back to per-survey analysis
+    monkeypatch.setattr(openai_service, 'generate_insights', lambda *args, **kwargs: pytest.fail("batch fell back"))
+    insights = generate_insights_batch(surveys)
+    assert insights == expected
+    assert _default_insights() not in insights
+
+def test_batched_key_phrases_count_repeated_comments():
+    comments = ["The new office layout is great", "Career paths are unclear at Contoso",
+                "The new office layout is great", "Meetings with Contoso take time away from focused work"] * 3
+    noun_counter, entity_counter = Counter(), Counter()
+    for doc in get_spacy_model().pipe(comments):
+        noun_counter.update(chunk.text for chunk in doc.noun_chunks)
+        entity_counter.update(ent.text for ent in doc.ents)
+    noun_counter.update(entity_counter)
+    assert extract_key_phrases_batched(iter(comments), n=4) == [phrase for phrase, _ in noun_counter.most_common(4)]
@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import openai_solution_service as service
+from benchmarks.llm_stub_server import start_stub_server, STUB_SOLUTIONS
+from llm_client import LLMClient, CircuitBreaker
+from result_cache import ResultCache
+
+LATENCY = 0.2
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = start_stub_server(latency=LATENCY)
+    client = LLMClient(api_key='stub', base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0,
+                       breaker=CircuitBreaker(failure_threshold=100))
+    monkeypatch.setattr(service, 'llm_client', client)
+    monkeypatch.setattr(service, 'solution_cache', ResultCache('solutions-test'))
+    yield server
+    client.close()
+    server.shutdown()
+
+def test_company_solutions_fan_out_concurrently(stub):
+    start = time.perf_counter()
+    solutions = service.generate_solutions_for_company("Acme", use_cache=False)
+    elapsed = time.perf_counter() - start
+
+    assert solutions == {category: STUB_SOLUTIONS for category in service.CATEGORIES}
+    assert stub.state.requests == len(service.CATEGORIES)
+    assert stub.state.max_in_flight == len(service.CATEGORIES)
+    assert elapsed < LATENCY * len(service.CATEGORIES)
+
+def test_company_solutions_served_from_cache(stub):
+    first = service.generate_solutions_for_company("Acme")
+    requests = stub.state.requests
+    assert service.generate_solutions_for_company("  Acme ") == first
+    assert stub.state.requests == requests == len(service.CATEGORIES)
+
+def test_failing_company_falls_back_without_poisoning_others(stub):
+    stub.state.fail_prompts_containing("Globex")
+    companies = ["Acme", "Globex", "Initech"]
+    with ThreadPoolExecutor(max_workers=len(companies)) as executor:
+        results = dict(zip(companies, executor.map(service.generate_solutions_for_company, companies)))
+
+    assert results["Globex"] == {category: service.DEFAULT_SOLUTIONS[category] for category in service.CATEGORIES}
+    for company in ("Acme", "Initech"):
+        assert results[company] == {category: STUB_SOLUTIONS for category in service.CATEGORIES}
+
+    # Fallback solutions are not cached, so the failing company is retried next time
+    requests = stub.state.requests
+    service.generate_solutions_for_company("Globex")
+    service.generate_solutions_for_company("Acme")
+    assert stub.state.requests == requests + len(service.CATEGORIES)
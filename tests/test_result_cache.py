@@ -0,0 +1,128 @@
+import sqlite3
+
+import result_cache
+from result_cache import ResultCache
+
+def disk_rows(path: str, name: str):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT key, size FROM cache_entries WHERE cache = ? ORDER BY stored_at",
+                            (name,)).fetchall()
+
+def test_disk_store_keeps_byte_budget(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache('test', max_bytes=100, persist_path=path)
+    for index in range(10):
+        cache.set(f'key-{index}', 'x' * 28)
+
+    rows = disk_rows(path, 'test')
+    assert [key for key, _ in rows] == ['key-7', 'key-8', 'key-9']
+    assert sum(size for _, size in rows) <= 100
+    assert cache.stats()['diskEvictions'] == 7
+
+    # Evicted rows are gone for a fresh process too
+    reopened = ResultCache('test', max_bytes=100, persist_path=path)
+    assert reopened.get('key-0') is None
+    assert reopened.get('key-9') == 'x' * 28
+
+def test_disk_store_keeps_entry_budget(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache('test', max_entries=2, persist_path=path)
+    other = ResultCache('other', max_entries=2, persist_path=path)
+    for index in range(4):
+        cache.set(f'key-{index}', index)
+    other.set('key-0', 'kept')
+
+    assert [key for key, _ in disk_rows(path, 'test')] == ['key-2', 'key-3']
+    assert [key for key, _ in disk_rows(path, 'other')] == ['key-0']
+
+def test_disk_store_prunes_expired_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache('test', ttl_seconds=60, persist_path=path)
+    cache.set('old', 1)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE cache_entries SET expires_at = 0")
+
+    # Sweeps run on write once the prune interval has passed
+    monkeypatch.setattr(result_cache, 'CACHE_PRUNE_INTERVAL', 0)
+    cache._next_prune = 0.0
+    cache.set('new', 2)
+    assert [key for key, _ in disk_rows(path, 'test')] == ['new']
+    assert cache.stats()['diskExpirations'] == 1
+
+def test_disk_store_migrates_rows_without_sizes(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE cache_entries (
+                cache TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL,
+                PRIMARY KEY (cache, key)
+            ) WITHOUT ROWID
+        """)
+        conn.executemany("INSERT INTO cache_entries VALUES ('test', ?, ?, NULL)",
+                         [(f'key-{index}', '"' + 'x' * 48 + '"') for index in range(4)])
+
+    cache = ResultCache('test', max_bytes=120, persist_path=path)
+    assert [size for _, size in disk_rows(path, 'test')] == [50, 50]
+    cache.set('new', 'y' * 48)
+    assert len(disk_rows(path, 'test')) == 2
+    assert cache.get('new') == 'y' * 48
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = ResultCache('test', max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_memory_cache_keeps_byte_budget():
+    cache = ResultCache('test', max_bytes=25)
+    cache.set('a', 'x' * 8)
+    cache.set('b', 'y' * 8)
+    cache.set('c', 'z' * 8)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 20
+
+    # Values larger than the whole budget are not cached at all
+    cache.set('big', 'x' * 30)
+    assert cache.get('big') is None
+    assert cache.get('b') == 'y' * 8
+    assert cache.stats()['oversized'] == 1
+
+def test_memory_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    cache = ResultCache('test', ttl_seconds=60)
+    cache.set('a', 1)
+
+    now[0] += 60
+    assert cache.get('a') == 1
+    now[0] += 1
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0 and stats['bytes'] == 0
+
+def test_expired_disk_entries_are_not_served(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    path = str(tmp_path / 'cache.db')
+    ResultCache('test', ttl_seconds=60, persist_path=path).set('a', 1)
+
+    assert ResultCache('test', ttl_seconds=60, persist_path=path).get('a') == 1
+    now[0] += 61
+    assert ResultCache('test', ttl_seconds=60, persist_path=path).get('a') is None
+
+def test_delete_drops_entry_from_memory_and_disk(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache('test', persist_path=path)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    cache.delete('a')
+    cache.delete('missing')
+    assert cache.get('a') is None and cache.get('b') == 2
+    assert [key for key, _ in disk_rows(path, 'test')] == ['b']
+    assert cache.stats()['entries'] == 1
@@ -0,0 +1,84 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from data_processor import (process_csv_data, process_employee_survey, load_csv_survey, clean_column_names,
+                            view_filters)
+from survey_columns import ColumnarSurvey
+
+EMPLOYEE_CSV = synthetic.to_csv(synthetic.employee_survey(300))
+FEEDBACK_CSV = synthetic.to_csv(synthetic.customer_feedback(200))
+COMPANY, ROLE = synthetic.employee_survey(300)[['Company name', 'Role']].iloc[0]
+
+VIEWS = [('holding', None, None), ('company', COMPANY, None), ('team', COMPANY, ROLE)]
+
+# Scores are stored as float32, so averages of non-integer scores only match
+# the float64 results of process_csv_data to about seven significant digits
+FLOAT32_RTOL = 1e-6
+
+def fractional_scores(df, seed=7):
+    """
+    Replace the integer scores of a synthetic survey with non-integer ones
+    """
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    for col in df.select_dtypes(include=['number']).columns:
+        df[col] = df[col] * rng.uniform(0.5, 1.5, len(df)) + rng.uniform(0, 1, len(df)) / 3
+    return df
+
+def assert_close(actual, expected, rtol):
+    """
+    Compare processed survey dicts, floats within rtol and everything else exactly
+    """
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            assert_close(actual[key], expected[key], rtol)
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for actual_item, expected_item in zip(actual, expected):
+            assert_close(actual_item, expected_item, rtol)
+    elif isinstance(expected, (float, np.floating)):
+        np.testing.assert_allclose(actual, expected, rtol=rtol)
+    else:
+        np.testing.assert_equal(actual, expected)
+
+def test_columnar_survey_matches_process_employee_survey():
+    df = pd.read_csv(io.StringIO(EMPLOYEE_CSV))
+    df.columns = clean_column_names(df.columns)
+    np.testing.assert_equal(load_csv_survey(EMPLOYEE_CSV, 'Employee Survey', 'Q1 2024').to_dict(),
+                            process_employee_survey(df, 'Q1 2024'))
+
+@pytest.mark.parametrize('survey_type, csv', [('Employee Survey', EMPLOYEE_CSV),
+                                              ('Customer Feedback', FEEDBACK_CSV),
+                                              ('Pulse Survey', EMPLOYEE_CSV)], ids=['employee', 'feedback', 'generic'])
+@pytest.mark.parametrize('view', VIEWS, ids=[view[0] for view in VIEWS])
+def test_columnar_views_match_processed_csv(survey_type, csv, view):
+    survey = load_csv_survey(csv, survey_type, 'Q1 2024')
+    np.testing.assert_equal(survey.select(view_filters(*view)).to_dict(),
+                            process_csv_data(csv, survey_type, 'Q1 2024', *view))
+
+@pytest.mark.parametrize('survey_type, df', [('Employee Survey', synthetic.employee_survey(300)),
+                                             ('Customer Feedback', synthetic.customer_feedback(200)),
+                                             ('Pulse Survey', synthetic.employee_survey(300))],
+                         ids=['employee', 'feedback', 'generic'])
+@pytest.mark.parametrize('view', VIEWS, ids=[view[0] for view in VIEWS])
+def test_columnar_views_match_processed_csv_with_fractional_scores(survey_type, df, view):
+    csv = synthetic.to_csv(fractional_scores(df))
+    survey = load_csv_survey(csv, survey_type, 'Q1 2024')
+    assert_close(survey.select(view_filters(*view)).to_dict(),
+                 process_csv_data(csv, survey_type, 'Q1 2024', *view), rtol=FLOAT32_RTOL)
+
+def test_columnar_survey_round_trips_through_bytes():
+    survey = load_csv_survey(EMPLOYEE_CSV, 'Employee Survey', 'Q1 2024')
+    restored = ColumnarSurvey.from_bytes(survey.to_bytes())
+    assert restored.fingerprint() == survey.fingerprint()
+    np.testing.assert_equal(restored.to_dict(), survey.to_dict())
+
+def test_view_fingerprint_depends_on_rows():
+    survey = load_csv_survey(EMPLOYEE_CSV, 'Employee Survey', 'Q1 2024')
+    assert survey.select({}).fingerprint() == survey.fingerprint()
+    assert survey.select(view_filters('company', COMPANY)).fingerprint() != survey.fingerprint()
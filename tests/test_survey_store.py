@@ -0,0 +1,84 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from benchmarks import synthetic
+from data_processor import load_csv_survey
+from insight_service import generate_batch_insights
+from analysis_pool import AnalysisPool
+from result_cache import ResultCache
+from survey_columns import ColumnarSurvey
+from survey_store import SurveyStore, InMemorySurveyStore, SQLiteSurveyStore, survey_fingerprint
+
+@pytest.fixture(scope='module')
+def columns():
+    return load_csv_survey(synthetic.to_csv(synthetic.employee_survey(40)), 'Employee Survey', 'Q1 2024')
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return InMemorySurveyStore()
+    return SQLiteSurveyStore(str(tmp_path / 'surveys.db'))
+
+def test_fingerprint_recorded_at_insert(store, columns, monkeypatch):
+    survey_id = store.create_survey('Employee Survey', 'Q1 2024', columns, company='Acme')
+    data_id = store.create_survey('Employee Survey', 'Q2 2024', {'responses': [{'comments': 'Great team'}]})
+
+    monkeypatch.setattr(store, 'get_columns', lambda survey_id: pytest.fail("columns loaded"))
+    monkeypatch.setattr(store, 'get_survey', lambda *args, **kwargs: pytest.fail("survey loaded"))
+    assert store.get_fingerprint(survey_id) == columns.fingerprint()
+    assert store.get_fingerprint(data_id) == survey_fingerprint({'responses': [{'comments': 'Great team'}]})
+    assert store.get_fingerprint(999) is None
+
+def test_fingerprint_backfilled_for_existing_databases(tmp_path, columns):
+    path = str(tmp_path / 'surveys.db')
+    survey_id = SQLiteSurveyStore(path).create_survey('Employee Survey', 'Q1 2024', columns)
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE surveys DROP COLUMN fingerprint")
+
+    store = SQLiteSurveyStore(path)
+    assert store.get_fingerprint(survey_id) == columns.fingerprint()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT fingerprint FROM surveys").fetchone() == (columns.fingerprint(),)
+
+def test_cached_batch_insights_do_not_load_surveys(store, columns, monkeypatch):
+    store.create_survey('Employee Survey', 'Q1 2024', columns, company='Acme')
+    store.create_survey('Employee Survey', 'Q1 2024', {'responses': [{'comments': 'Great team'}]}, company='Globex')
+    cache = ResultCache('insights-test')
+    pool = AnalysisPool(workers=0)
+
+    first = generate_batch_insights(store, companies=['Acme', 'Globex'], pool=pool, cache=cache)
+    assert first['stats']['analyzed'] == 2
+
+    monkeypatch.setattr(store, 'get_columns', lambda survey_id: pytest.fail("columns loaded"))
+    second = generate_batch_insights(store, companies=['Acme', 'Globex'], pool=pool, cache=cache)
+    assert second['stats']['cached'] == 2
+    assert [entry['insights'] for entry in second['surveys']] == [entry['insights'] for entry in first['surveys']]
+
+def test_incomplete_store_fails_at_construction():
+    class PartialStore(SurveyStore):
+        def get_survey(self, survey_id, sections=None):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+SECTION_SURVEYS = [('Employee Survey', synthetic.employee_survey(40)),
+                   ('Customer Feedback', synthetic.customer_feedback(40)),
+                   ('Pulse Survey', synthetic.employee_survey(40))]
+SECTIONS = [['survey_type', 'total_responses'], ['departments'], ['overall_averages', 'department_data'],
+            ['categories', 'category_data'], ['feedback_data'], ['numeric_averages', 'categorical_data']]
+
+@pytest.mark.parametrize('survey_type, df', SECTION_SURVEYS, ids=['employee', 'feedback', 'generic'])
+def test_requested_sections_match_full_survey(store, survey_type, df, monkeypatch):
+    survey = load_csv_survey(synthetic.to_csv(df), survey_type, 'Q1 2024')
+    survey_id = store.create_survey(survey_type, 'Q1 2024', survey)
+    full = store.get_survey(survey_id)['data']
+
+    # Only the requested sections are materialized, without loading the whole survey
+    monkeypatch.setattr(store, 'get_columns', lambda survey_id: pytest.fail("columns loaded"))
+    monkeypatch.setattr(ColumnarSurvey, 'from_bytes', lambda payload: pytest.fail("survey deserialized"))
+    for sections in SECTIONS:
+        np.testing.assert_equal(store.get_survey(survey_id, sections=sections)['data'],
+                                {name: full[name] for name in sections if name in full})
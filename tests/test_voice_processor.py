@@ -0,0 +1,85 @@
+import pytest
+
+from nlp_models import registry
+from voice_processor import IntentGrammar, INTENT_TERMS, parse_intent, process_voice_command
+
+# Commands and the action and parameters the substring matcher they replace
+# resolved them to
+BASELINE_INTENTS = [
+    ('show me quarterly results', 'filter', {'type': 'data_filter', 'timePeriod': 'Last 90 days'}),
+    ('display monthly sales', 'filter', {'type': 'data_filter', 'department': 'Sales', 'timePeriod': 'Last 30 days'}),
+    ('show weekly engineering data', 'filter',
+     {'type': 'data_filter', 'department': 'Engineering', 'timePeriod': 'Last 7 days'}),
+    ('show yearly numbers', 'filter', {'type': 'data_filter', 'timePeriod': 'Last 12 months'}),
+    ('show engineering data for last week', 'filter',
+     {'type': 'data_filter', 'department': 'Engineering', 'timePeriod': 'Last 7 days'}),
+    ('filter marketing by month', 'filter',
+     {'type': 'data_filter', 'department': 'Marketing', 'timePeriod': 'Last 30 days'}),
+    ('display sales for this quarter', 'filter',
+     {'type': 'data_filter', 'department': 'Sales', 'timePeriod': 'Last 90 days'}),
+    ('show hr data for the year', 'filter', {'type': 'data_filter', 'department': 'Hr', 'timePeriod': 'Last 12 months'}),
+    ('view product results', 'filter', {'type': 'data_filter', 'department': 'Product'}),
+    ('show individual results', 'filter', {'type': 'data_filter', 'level': 'Individual'}),
+    ('show company data', 'filter', {'type': 'data_filter', 'level': 'Company'}),
+    ('filter all company data', 'filter', {'type': 'data_filter', 'level': 'All Companies'}),
+    ('show only engineering', 'filter', {'type': 'data_filter', 'department': 'Engineering'}),
+    ('see marketing for the week', 'filter',
+     {'type': 'data_filter', 'department': 'Marketing', 'timePeriod': 'Last 7 days'}),
+    ('display weekly and monthly data', 'filter', {'type': 'data_filter', 'timePeriod': 'Last 7 days'}),
+    ('filter by quarterly data for sales', 'filter',
+     {'type': 'data_filter', 'department': 'Sales', 'timePeriod': 'Last 90 days'}),
+    ('show sales weekly', 'filter', {'type': 'data_filter', 'department': 'Sales', 'timePeriod': 'Last 7 days'}),
+    ('show me the timeline', 'filter', {'type': 'data_filter'}),
+    ('show me data', 'filter', {'type': 'data_filter'}),
+    ('compare q1 and q2 insights', 'insight', {'type': 'comparison', 'period1': 'q1', 'period2': 'q2'}),
+    ('analyze q3 versus q4', 'insight', {'type': 'comparison', 'period1': 'q3', 'period2': 'q4'}),
+    ('give me a summary comparing this month against last year', 'insight',
+     {'type': 'comparison', 'period1': 'month', 'period2': 'year'}),
+    ('summarize quarterly versus yearly results', 'insight',
+     {'type': 'comparison', 'period1': 'quarter', 'period2': 'year'}),
+    ('compare monthly and quarterly analysis', 'insight',
+     {'type': 'comparison', 'period1': 'month', 'period2': 'quarter'}),
+    ('analyze the survey results', 'insight', {'type': 'general'}),
+    ('go to dashboard', 'navigate', {'destination': 'dashboard'}),
+    ('navigate to history', 'navigate', {'destination': 'history'}),
+    ('take me to upload', 'navigate', {'destination': 'upload'}),
+    ('go to the home page', 'navigate', {'destination': 'dashboard'}),
+    ('navigate to import', 'navigate', {'destination': 'upload'}),
+    ('take me somewhere', 'navigate', {'destination': 'dashboard'}),
+    ('what is the weather', 'unknown', {}),
+]
+
+# Commands the substring matcher got wrong
+FIXED_INTENTS = [
+    ('show me human resources', 'filter', {'type': 'data_filter', 'department': 'Hr'}),
+    ('show all companies', 'filter', {'type': 'data_filter', 'level': 'All Companies'}),
+    ('show the three teams from today', 'filter', {'type': 'data_filter'}),
+]
+
+@pytest.mark.parametrize('transcript, action, parameters', BASELINE_INTENTS + FIXED_INTENTS)
+def test_parse_intent(transcript, action, parameters):
+    intent = parse_intent(transcript)
+    assert intent['action'] == action
+    assert intent['parameters'] == parameters
+
+def test_filter_response_describes_parameters():
+    intent = parse_intent('display monthly sales')
+    assert intent['response'] == "Filtering data to show Sales department for Last 30 days data"
+
+def test_grammar_matches_whole_words_with_endings():
+    grammar = IntentGrammar(INTENT_TERMS)
+    assert set(grammar.match('Filtering QUARTERLY reports')) == {'filter', 'quarter'}
+    assert 'hr' not in grammar.match('three')
+    assert 'day' not in grammar.match('today')
+
+def test_grammar_reports_first_mention():
+    found = IntentGrammar(INTENT_TERMS).match('compare last year against this month and next year')
+    assert found['year'] < found['month']
+    assert found['compare'] == 0
+
+def test_process_voice_command_skips_spacy(monkeypatch):
+    requested = []
+    get = registry.get
+    monkeypatch.setattr(registry, 'get', lambda name: requested.append(name) or get(name))
+    assert process_voice_command('show weekly engineering data') == parse_intent('show weekly engineering data')
+    assert 'spacy' not in requested
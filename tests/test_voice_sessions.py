@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from voice_processor import process_voice_command
+from voice_sessions import VoiceSessionStore, VoiceSessionNotFoundError, VoiceSessionClosedError
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return VoiceSessionStore(store_path=None)
+    return VoiceSessionStore(store_path=str(tmp_path / 'voice.db'))
+
+def test_partials_resolve_provisional_and_final_events(store):
+    session_id = store.create({'currentView': 'dashboard'})
+    for transcript in ['show me', 'show me eng', 'show me engineering', 'show me engineering data']:
+        store.add_transcript(session_id, transcript)
+    store.add_transcript(session_id, 'show me engineering data weekly', final=True)
+
+    events, finished = store.events(session_id)
+    assert finished
+    assert [kind for kind, _ in events] == ['provisional', 'provisional', 'final']
+    assert events[1][1]['parameters'] == {'type': 'data_filter', 'department': 'Engineering'}
+    assert events[-1][1] == {'success': True, 'transcript': 'show me engineering data weekly',
+                             **process_voice_command('show me engineering data weekly')}
+
+def test_final_without_transcript_keeps_last_partial(store):
+    session_id = store.create()
+    store.add_transcript(session_id, 'go to history')
+    store.add_transcript(session_id, None)
+    store.add_transcript(session_id, final=True)
+
+    events, _ = store.events(session_id, after=1)
+    assert events == [('final', {'success': True, 'transcript': 'go to history',
+                                 **process_voice_command('go to history')})]
+
+def test_final_without_any_transcript_is_an_error(store):
+    session_id = store.create()
+    store.add_transcript(session_id, final=True)
+    assert store.events(session_id) == ([('error', {'error': 'No voice transcript provided'})], True)
+
+def test_finished_and_unknown_sessions_are_rejected(store):
+    session_id = store.create()
+    store.add_transcript(session_id, 'go to upload', final=True)
+    with pytest.raises(VoiceSessionClosedError):
+        store.add_transcript(session_id, 'go to history')
+    with pytest.raises(VoiceSessionNotFoundError):
+        store.add_transcript('missing', 'go to history')
+    with pytest.raises(VoiceSessionNotFoundError):
+        store.events('missing')
+
+def test_expired_sessions_are_not_found(store):
+    store.ttl_seconds = 0
+    session_id = store.create()
+    with pytest.raises(VoiceSessionNotFoundError):
+        store.events(session_id)
+
+def test_reader_waits_for_events_from_another_store(tmp_path):
+    path = str(tmp_path / 'voice.db')
+    reader, writer = VoiceSessionStore(store_path=path), VoiceSessionStore(store_path=path)
+    session_id = writer.create()
+
+    timer = threading.Timer(0.1, writer.add_transcript, (session_id, 'go to upload', True))
+    timer.start()
+    events, finished = reader.events(session_id, timeout=5)
+    timer.join()
+    assert finished and [kind for kind, _ in events] == ['final']
+
+def test_flask_routes_stream_session_events(monkeypatch):
+    import flask_server
+    monkeypatch.setattr(flask_server, 'voice_sessions', VoiceSessionStore(store_path=None))
+    client = flask_server.app.test_client()
+
+    session_id = client.post('/process-voice/sessions', json={'context': {}}).get_json()['sessionId']
+    assert client.post(f'/process-voice/sessions/{session_id}/partials',
+                       json={'transcript': 'go to history'}).status_code == 200
+    assert client.post(f'/process-voice/sessions/{session_id}/partials', json={'final': True}).status_code == 200
+    assert client.post(f'/process-voice/sessions/{session_id}/partials', json={'final': True}).status_code == 409
+    assert client.get('/process-voice/sessions/missing/events').status_code == 404
+
+    body = client.get(f'/process-voice/sessions/{session_id}/events').get_data(as_text=True)
+    assert body.startswith('id: 1\nevent: provisional\n')
+    assert 'id: 2\nevent: final\n' in body
+
+    # A reconnecting EventSource only receives what it has not seen
+    resumed = client.get(f'/process-voice/sessions/{session_id}/events', headers={'Last-Event-ID': '1'})
+    assert resumed.get_data(as_text=True).startswith('id: 2\nevent: final\n')
@@ -0,0 +1,294 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Topic model configuration from environment variables
+TOPIC_MODEL_DIR = os.environ.get("TOPIC_MODEL_DIR", "topic_models")
+TOPIC_MODEL_KEEP_VERSIONS = int(os.environ.get("TOPIC_MODEL_KEEP_VERSIONS", 5))
+TOPIC_MODEL_NUM_TOPICS = int(os.environ.get("TOPIC_MODEL_NUM_TOPICS", 10))
+TOPIC_MODEL_FEATURES = int(os.environ.get("TOPIC_MODEL_FEATURES", 2 ** 14))
+
+# Family used when a caller has no company/survey context
+DEFAULT_TOPIC_FAMILY = "default"
+
+def topic_family(company: Optional[str] = None, survey_type: Optional[str] = None) -> str:
+    """
+    Build the topic model family name for a company and survey type
+
+    Args:
+        company: Company name (all companies if None)
+        survey_type: Survey type (Employee Survey, Customer Feedback, etc.)
+
+    Returns:
+        Filesystem-safe family name
+    """
+    parts = [company or "all", survey_type or "any"]
+    return "--".join(re.sub(r'[^a-z0-9]+', '-', part.lower()).strip('-') or "none" for part in parts)
+
+class OnlineTopicModel:
+    """
+    LDA topic model that is updated incrementally with partial_fit
+
+    Documents are vectorized with a stateless HashingVectorizer, so new
+    vocabulary never requires a refit. The most frequent term seen in each
+    hash bucket is tracked to label topics.
+    """
+
+    def __init__(self, family: str, num_topics: int = TOPIC_MODEL_NUM_TOPICS,
+                 n_features: int = TOPIC_MODEL_FEATURES):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.decomposition import LatentDirichletAllocation
+
+        self.family = family
+        self.num_topics = num_topics
+        self.version = 0
+        self.documents_seen = 0
+        self.updated_at = None
+
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False,
+                                            norm=None, stop_words='english')
+        self.lda = LatentDirichletAllocation(n_components=num_topics, learning_method='online',
+                                             random_state=42)
+        self.bucket_terms = defaultdict(Counter)
+        self._labels = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.version > 0
+
+    def partial_fit(self, texts: List[str]) -> None:
+        """
+        Update the model with a new batch of documents
+
+        Args:
+            texts: New documents (e.g. comments from an upload)
+        """
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            return
+
+        X = self.vectorizer.transform(texts)
+        if X.nnz == 0:
+            return
+        self.lda.partial_fit(X)
+
+        # Hash every distinct term once to learn which word each bucket holds
+        analyzer = self.vectorizer.build_analyzer()
+        term_counts = Counter(term for text in texts for term in analyzer(text))
+        terms = list(term_counts)
+        term_buckets = self.vectorizer.transform(terms)
+        for row, term in enumerate(terms):
+            start, end = term_buckets.indptr[row], term_buckets.indptr[row + 1]
+            if end > start:
+                self.bucket_terms[int(term_buckets.indices[start])][term] += term_counts[term]
+
+        self.version += 1
+        self.documents_seen += len(texts)
+        self.updated_at = time.time()
+        self._labels = None
+
+    def topic_labels(self, top_words: int = 4) -> List[str]:
+        """
+        Return a label for every topic made of its highest-weighted words
+        """
+        if self._labels is None:
+            labels = []
+            for topic in self.lda.components_:
+                words = []
+                for index in topic.argsort()[::-1]:
+                    terms = self.bucket_terms.get(index)
+                    if terms:
+                        words.append(terms.most_common(1)[0][0])
+                        if len(words) == top_words:
+                            break
+                labels.append(' '.join(words))
+            self._labels = labels
+        return self._labels
+
+    def extract_topics(self, texts: List[str], num_topics: int = 3) -> List[str]:
+        """
+        Rank the fitted topics by their weight in the given documents
+
+        Args:
+            texts: Documents to analyze
+            num_topics: Number of topics to return
+
+        Returns:
+            Labels of the most prominent topics
+        """
+        X = self.vectorizer.transform(texts)
+        weights = self.lda.transform(X).sum(axis=0)
+        labels = self.topic_labels()
+        order = np.argsort(-weights, kind='stable')
+        return [labels[i] for i in order[:num_topics] if labels[i]]
+
+    def extract_topics_batch(self, groups: List[List[str]], num_topics: int = 3) -> List[List[str]]:
+        """
+        Rank the fitted topics for several document groups (e.g. surveys) with
+        one vectorization and one transform over all of their documents
+
+        Args:
+            groups: Documents of each group
+            num_topics: Number of topics to return per group
+
+        Returns:
+            Labels of the most prominent topics of each group
+        """
+        offsets = np.cumsum([0] + [len(texts) for texts in groups])
+        X = self.vectorizer.transform([text for texts in groups for text in texts])
+        doc_topics = self.lda.transform(X)
+        labels = self.topic_labels()
+        topics = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            order = np.argsort(-doc_topics[start:end].sum(axis=0), kind='stable')
+            topics.append([labels[i] for i in order[:num_topics] if labels[i]])
+        return topics
+
+class TopicModelStore:
+    """
+    Keeps one OnlineTopicModel per family in memory, versioned on disk
+
+    Every update writes <dir>/<family>/v<version>.joblib atomically and
+    points LATEST at it. Other processes pick up newer versions on their
+    next lookup, and updates across processes are serialized with a lock
+    file where fcntl is available.
+    """
+
+    def __init__(self, directory: str = TOPIC_MODEL_DIR, keep_versions: int = TOPIC_MODEL_KEEP_VERSIONS):
+        self.directory = directory
+        self.keep_versions = keep_versions
+        self._models = {}
+        self._locks = defaultdict(threading.Lock)
+
+    def get(self, family: str) -> OnlineTopicModel:
+        """
+        Return the latest model for a family, creating an empty one if needed
+        """
+        with self._locks[family]:
+            return self._latest(family)
+
+    def update(self, family: str, texts: List[str]) -> OnlineTopicModel:
+        """
+        Fold a new batch of documents into a family's model and persist it
+
+        Args:
+            family: Topic model family
+            texts: New documents
+
+        Returns:
+            The updated model
+        """
+        with self._locks[family]:
+            family_dir = self._family_dir(family)
+            os.makedirs(family_dir, exist_ok=True)
+            with open(os.path.join(family_dir, 'LOCK'), 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    model = self._latest(family)
+                    previous_version = model.version
+                    model.partial_fit(texts)
+                    if model.version != previous_version:
+                        self._save(model)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return model
+
+    def extract_topics(self, family: str, texts: List[str], num_topics: int = 3) -> Optional[List[str]]:
+        """
+        Extract topics with a family's fitted model
+
+        Returns:
+            Topic labels, or None if the family has no fitted model yet
+        """
+        model = self.get(family)
+        if not model.is_fitted:
+            return None
+        return model.extract_topics(texts, num_topics)
+
+    def extract_topics_batch(self, family: str, groups: List[List[str]],
+                             num_topics: int = 3) -> Optional[List[List[str]]]:
+        """
+        Extract topics for several document groups with a family's fitted model
+
+        Returns:
+            Topic labels of each group, or None if the family has no fitted model yet
+        """
+        model = self.get(family)
+        if not model.is_fitted:
+            return None
+        return model.extract_topics_batch(groups, num_topics)
+
+    def version(self, family: str) -> int:
+        """
+        Return the latest persisted version for a family (0 if none)
+        """
+        return max(self._disk_version(family), self._models[family].version if family in self._models else 0)
+
+    def _family_dir(self, family: str) -> str:
+        return os.path.join(self.directory, family)
+
+    def _disk_version(self, family: str) -> int:
+        try:
+            with open(os.path.join(self._family_dir(family), 'LATEST')) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _latest(self, family: str) -> OnlineTopicModel:
+        # Caller must hold the family lock
+        model = self._models.get(family)
+        disk_version = self._disk_version(family)
+        if model is None or disk_version > model.version:
+            if disk_version:
+                import joblib
+                path = os.path.join(self._family_dir(family), f"v{disk_version:06d}.joblib")
+                try:
+                    model = joblib.load(path)
+                except Exception as e:
+                    logger.error(f"Error loading topic model {path}: {str(e)}")
+            if model is None:
+                model = OnlineTopicModel(family)
+            self._models[family] = model
+        return model
+
+    def _save(self, model: OnlineTopicModel):
+        import joblib
+        family_dir = self._family_dir(model.family)
+        path = os.path.join(family_dir, f"v{model.version:06d}.joblib")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+
+        tmp_latest = os.path.join(family_dir, f"LATEST.{os.getpid()}.tmp")
+        with open(tmp_latest, 'w') as f:
+            f.write(str(model.version))
+        os.replace(tmp_latest, os.path.join(family_dir, 'LATEST'))
+
+        # Prune old versions
+        versions = sorted(name for name in os.listdir(family_dir) if re.fullmatch(r'v\d{6}\.joblib', name))
+        for name in versions[:-self.keep_versions]:
+            try:
+                os.remove(os.path.join(family_dir, name))
+            except OSError:
+                pass
+
+# Shared topic model store
+topic_models = TopicModelStore()
@@ -1,27 +1,38 @@
 import json
 import logging
 import re
-import nltk
-import spacy
-from typing import Dict, Any, List
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+from typing import Dict, Any, List, Optional
 from collections import Counter
+from nlp_models import get_stop_words
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize NLP components
-try:
-    nlp = spacy.load("en_core_web_sm")
-    stop_words = set(stopwords.words('english'))
-except (OSError, LookupError) as e:
-    logger.error(f"NLP initialization error: {str(e)}")
-    logger.warning("Using fallback NLP components")
-    nlp = None
-    stop_words = set(["a", "an", "the", "and", "or", "but", "is", "are", "was", "were"])
+# Fallback stop words used when the NLTK corpus is unavailable
+FALLBACK_STOP_WORDS = set(["a", "an", "the", "and", "or", "but", "is", "are", "was", "were"])
+
+# Stop words come from nlp_models and are loaded on the first voice
+# command rather than at import time
+_stop_words = None
+
+def get_voice_stop_words():
+    """
+    Return the stop word set used for voice commands
+    
+    Returns:
+        NLTK English stop words, or FALLBACK_STOP_WORDS if they cannot be loaded
+    """
+    global _stop_words
+    if _stop_words is None:
+        try:
+            _stop_words = get_stop_words()
+        except Exception as e:
+            logger.error(f"NLP initialization error: {str(e)}")
+            logger.warning("Using fallback stop words")
+            _stop_words = FALLBACK_STOP_WORDS
+    return _stop_words
 
 def process_voice_command(transcript: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
     """
@@ -45,115 +56,13 @@ def process_voice_command(transcript: str, context: Dict[str, Any] = None) -> Di
                 }
             }
         
-        # Extract keywords and entities from the transcript
-        keywords = extract_intent_keywords(transcript)
-        
-        # Process with spaCy for better entity recognition if available
-        entities = {}
-        if nlp:
-            doc = nlp(transcript)
-            
-            # Extract named entities
-            for ent in doc.ents:
-                if ent.label_ in ["DATE", "TIME"]:
-                    entities["time"] = ent.text
-                elif ent.label_ in ["ORG", "PRODUCT"]:
-                    entities["department"] = ent.text
-        
-        # Determine action based on keywords
-        action = "unknown"
-        parameters = {}
-        response = "I'm not sure what you want. Could you rephrase that?"
-        
-        # Handle filter action
-        if "filter" in keywords:
-            action = "filter"
-            parameters["type"] = "data_filter"
-            
-            # Extract department if mentioned
-            department_keywords = ["engineering", "marketing", "sales", "hr", "product"]
-            for dept in department_keywords:
-                if dept in keywords:
-                    parameters["department"] = dept.capitalize()
-                    break
-            
-            # Extract time period if mentioned
-            if "week" in keywords:
-                parameters["timePeriod"] = "Last 7 days"
-            elif "month" in keywords:
-                parameters["timePeriod"] = "Last 30 days"
-            elif "quarter" in keywords:
-                parameters["timePeriod"] = "Last 90 days"
-            elif "year" in keywords:
-                parameters["timePeriod"] = "Last 12 months"
-            
-            # Extract level if mentioned
-            if "individual" in transcript.lower():
-                parameters["level"] = "Individual"
-            elif "company" in transcript.lower() and "all" not in transcript.lower():
-                parameters["level"] = "Company"
-            elif "all" in transcript.lower() and "company" in transcript.lower():
-                parameters["level"] = "All Companies"
-            
-            response = f"Filtering data to show "
-            if "department" in parameters:
-                response += f"{parameters['department']} department "
-            
-            if "timePeriod" in parameters:
-                response += f"for {parameters['timePeriod']} "
-            
-            if "level" in parameters:
-                response += f"at {parameters['level']} level"
-            
-            if response.endswith(" "):
-                response = response.strip() + " data"
-        
-        # Handle insight action
-        elif "insight" in keywords or "summary" in keywords or "analyze" in keywords:
-            action = "insight"
-            
-            if "compare" in keywords:
-                parameters["type"] = "comparison"
-                time_periods = ["q1", "q2", "q3", "q4", "quarter", "month", "year"]
-                periods_found = [kw for kw in keywords if kw in time_periods]
-                
-                if len(periods_found) >= 2:
-                    parameters["period1"] = periods_found[0]
-                    parameters["period2"] = periods_found[1]
-                    response = f"Comparing {parameters['period1']} and {parameters['period2']} data"
-                else:
-                    response = "Generating insights for the current data"
-            else:
-                parameters["type"] = "general"
-                response = "Generating insights for the current survey data"
-        
-        # Handle navigation action
-        elif any(kw in transcript.lower() for kw in ["go to", "navigate", "show me", "take me"]):
-            action = "navigate"
-            
-            destinations = {
-                "dashboard": ["dashboard", "home", "main"],
-                "history": ["history", "activities", "timeline"],
-                "upload": ["upload", "import", "new survey"]
-            }
-            
-            for dest, keywords in destinations.items():
-                if any(kw in transcript.lower() for kw in keywords):
-                    parameters["destination"] = dest
-                    response = f"Navigating to the {dest} page"
-                    break
-            
-            if "destination" not in parameters:
-                parameters["destination"] = "dashboard"
-                response = "Returning to the main dashboard"
+        # Determine action, parameters and response from the intent grammar
+        intent = parse_intent(transcript)
+        action = intent["action"]
         
         logger.info(f"Processed voice command: '{transcript}' -> {action}")
         
-        return {
-            "action": action,
-            "parameters": parameters,
-            "response": response
-        }
+        return intent
     
     except Exception as e:
         logger.error(f"Error processing voice command: {str(e)}")
@@ -165,61 +74,282 @@ def process_voice_command(transcript: str, context: Dict[str, Any] = None) -> Di
             "response": "I'm sorry, I couldn't understand that command. Please try again."
         }
 
-def extract_intent_keywords(transcript: str) -> List[str]:
+# Intent grammar: canonical term -> phrases that express it. Phrases match
+# whole words (optionally with a plural or verb ending), so "hr" no longer
+# fires inside "three" nor "day" inside "today".
+INTENT_TERMS = {
+    # Actions
+    'filter': ['filter', 'show', 'display', 'view', 'only', 'see'],
+    'compare': ['compare', 'compared', 'comparing', 'comparison', 'versus', 'vs', 'against'],
+    'insight': ['insight', 'analyze', 'analyzed', 'analyzing', 'analysis', 'analyses',
+                'summary', 'summaries', 'summarize', 'summarized', 'summarizing'],
+    'navigate': ['go to', 'navigate', 'navigating', 'show me', 'take me'],
+    # Departments
+    'engineering': ['engineering'],
+    'marketing': ['marketing'],
+    'sales': ['sales'],
+    'hr': ['hr', 'human resources'],
+    'product': ['product'],
+    # Time periods
+    'day': ['day'],
+    'week': ['week'],
+    'month': ['month'],
+    'quarter': ['quarter'],
+    'year': ['year'],
+    'q1': ['q1'],
+    'q2': ['q2'],
+    'q3': ['q3'],
+    'q4': ['q4'],
+    # View levels
+    'individual': ['individual'],
+    'company': ['company', 'companies'],
+    'all': ['all'],
+    # Navigation destinations
+    'dashboard': ['dashboard', 'home', 'main'],
+    'history': ['history', 'activities', 'timeline'],
+    'upload': ['upload', 'import', 'new survey'],
+}
+
+# Terms reported by extract_intent_keywords, in this order
+KEYWORD_TERMS = ['filter', 'engineering', 'marketing', 'sales', 'hr', 'product',
+                 'day', 'week', 'month', 'quarter', 'year', 'q1', 'q2', 'q3', 'q4',
+                 'compare', 'insight']
+
+# Slots filled from matched terms; the first listed term present wins
+DEPARTMENT_SLOTS = ['engineering', 'marketing', 'sales', 'hr', 'product']
+TIME_PERIOD_SLOTS = {'week': 'Last 7 days', 'month': 'Last 30 days',
+                     'quarter': 'Last 90 days', 'year': 'Last 12 months'}
+COMPARISON_PERIODS = ['month', 'quarter', 'year', 'q1', 'q2', 'q3', 'q4']
+DESTINATIONS = ['dashboard', 'history', 'upload']
+
+class IntentGrammar:
     """
-    Extract key intent words from the transcript
+    Finds the terms of an intent table in one pass of a compiled regex
+    
+    Every phrase is one alternative of a single case-insensitive pattern,
+    longest first. Since the pattern reports one match per position, a
+    phrase that contains another phrase ("show me" and "show") counts for
+    the terms of both.
+    """
+    
+    # Endings accepted after a phrase ("filters", "showing", "filtered",
+    # "quarterly")
+    SUFFIX = r'(?:s|es|ed|ing|ly)?'
+    
+    def __init__(self, terms: Dict[str, List[str]]):
+        phrases = {}
+        for term, term_phrases in terms.items():
+            for phrase in term_phrases:
+                phrases.setdefault(phrase.lower(), set()).add(term)
+        for phrase, phrase_terms in phrases.items():
+            for other, other_terms in phrases.items():
+                if other != phrase and re.search(r'\b' + re.escape(other) + r'\b', phrase):
+                    phrase_terms |= other_terms
+        
+        ordered = sorted(phrases, key=len, reverse=True)
+        self._terms = [frozenset(phrases[phrase]) for phrase in ordered]
+        alternatives = '|'.join(
+            '(' + r'\s+'.join(re.escape(word) for word in phrase.split()) + ')'
+            for phrase in ordered
+        )
+        self.pattern = re.compile(r'\b(?:' + alternatives + ')' + self.SUFFIX + r'\b', re.IGNORECASE)
+    
+    def match(self, text: str) -> Dict[str, int]:
+        """
+        Find the terms mentioned in a text
+        
+        Args:
+            text: Text to scan (any case)
+            
+        Returns:
+            Mapping of each term found to the position of its first mention
+        """
+        found = {}
+        for match in self.pattern.finditer(text):
+            # Each alternative is one group, so lastindex identifies the phrase
+            for term in self._terms[match.lastindex - 1]:
+                found.setdefault(term, match.start())
+        return found
+
+# Compiled once at import and shared by every command
+intent_grammar = IntentGrammar(INTENT_TERMS)
+
+# Characters dropped before counting frequent words
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
+def parse_intent(transcript: str) -> Dict[str, Any]:
+    """
+    Resolve the action, parameters and response of a voice command
     
     Args:
         transcript: Text transcript of the voice command
         
     Returns:
-        List of keywords
+        Dictionary with recognized action, parameters, and response
     """
-    # Convert to lowercase
-    text = transcript.lower()
+    found = intent_grammar.match(transcript)
+    action = "unknown"
+    parameters = {}
+    response = "I'm not sure what you want. Could you rephrase that?"
     
-    # Tokenize and remove punctuation
-    text = re.sub(r'[^\w\s]', '', text)
-    tokens = word_tokenize(text)
+    # Handle filter action
+    if 'filter' in found:
+        action = "filter"
+        parameters["type"] = "data_filter"
+        
+        # Extract department if mentioned
+        department = next((dept for dept in DEPARTMENT_SLOTS if dept in found), None)
+        if department:
+            parameters["department"] = department.capitalize()
+        
+        # Extract time period if mentioned
+        period = next((period for period in TIME_PERIOD_SLOTS if period in found), None)
+        if period:
+            parameters["timePeriod"] = TIME_PERIOD_SLOTS[period]
+        
+        # Extract level if mentioned
+        if 'individual' in found:
+            parameters["level"] = "Individual"
+        elif 'company' in found and 'all' not in found:
+            parameters["level"] = "Company"
+        elif 'all' in found and 'company' in found:
+            parameters["level"] = "All Companies"
+        
+        response = f"Filtering data to show "
+        if "department" in parameters:
+            response += f"{parameters['department']} department "
+        
+        if "timePeriod" in parameters:
+            response += f"for {parameters['timePeriod']} "
+        
+        if "level" in parameters:
+            response += f"at {parameters['level']} level"
+        
+        if response.endswith(" "):
+            response = response.strip() + " data"
     
-    # Remove stop words
-    filtered_tokens = [word for word in tokens if word not in stop_words]
+    # Handle insight action
+    elif 'insight' in found:
+        action = "insight"
+        
+        if 'compare' in found:
+            parameters["type"] = "comparison"
+            # Periods in the order they were mentioned
+            periods_found = sorted((period for period in COMPARISON_PERIODS if period in found), key=found.get)
+            
+            if len(periods_found) >= 2:
+                parameters["period1"] = periods_found[0]
+                parameters["period2"] = periods_found[1]
+                response = f"Comparing {parameters['period1']} and {parameters['period2']} data"
+            else:
+                response = "Generating insights for the current data"
+        else:
+            parameters["type"] = "general"
+            response = "Generating insights for the current survey data"
     
-    # Look for specific command keywords
-    keywords = []
+    # Handle navigation action
+    elif 'navigate' in found:
+        action = "navigate"
+        
+        destination = next((dest for dest in DESTINATIONS if dest in found), None)
+        if destination:
+            parameters["destination"] = destination
+            response = f"Navigating to the {destination} page"
+        else:
+            parameters["destination"] = "dashboard"
+            response = "Returning to the main dashboard"
     
-    # Filter commands
-    filter_words = ["filter", "show", "display", "view", "only", "see"]
-    for word in filter_words:
-        if word in text:
-            keywords.append("filter")
-            break
+    return {
+        "action": action,
+        "parameters": parameters,
+        "response": response
+    }
+
+class VoiceSession:
+    """
+    Resolves one spoken command incrementally from partial transcripts
     
-    # Department focus
-    departments = ["engineering", "marketing", "sales", "hr", "human resources", "product"]
-    for dept in departments:
-        if dept in text:
-            keywords.append(dept)
+    Speech recognizers report interim results while the user is still
+    talking, each holding the utterance so far. Partials are resolved with
+    the intent grammar, which is cheap enough to run on every one; the
+    final transcript goes through process_voice_command.
+    """
     
-    # Time periods
-    time_periods = ["day", "week", "month", "quarter", "year", "q1", "q2", "q3", "q4"]
-    for period in time_periods:
-        if period in text:
-            keywords.append(period)
-    
-    # Compare commands
-    compare_words = ["compare", "comparison", "versus", "vs", "against"]
-    for word in compare_words:
-        if word in text:
-            keywords.append("compare")
-            break
-    
-    # Insight commands
-    insight_words = ["insight", "analyze", "analysis", "summary", "summarize"]
-    for word in insight_words:
-        if word in text:
-            keywords.append("insight")
-            break
+    def __init__(self, context: Dict[str, Any] = None):
+        self.context = context
+        self.transcript = ""
+        self._last = None
+    
+    def update(self, transcript: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a partial transcript
+        
+        Args:
+            transcript: Utterance recognized so far
+            
+        Returns:
+            Provisional result if it resolves to a known action that differs
+            from the last one returned, otherwise None
+        """
+        self.transcript = transcript
+        intent = parse_intent(transcript)
+        if intent["action"] == "unknown":
+            return None
+        key = (intent["action"], intent["parameters"])
+        if key == self._last:
+            return None
+        self._last = key
+        return intent
+    
+    def finish(self, transcript: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resolve the complete command
+        
+        Args:
+            transcript: Final transcript (defaults to the last partial)
+            
+        Returns:
+            Dictionary with recognized action, parameters, and response
+        """
+        if transcript is not None:
+            self.transcript = transcript
+        return process_voice_command(self.transcript, self.context)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the session state as a JSON-serializable dictionary
+        """
+        return {"context": self.context, "transcript": self.transcript,
+                "last": list(self._last) if self._last is not None else None}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'VoiceSession':
+        """
+        Restore a session saved with to_dict
+        """
+        session = cls(state.get("context"))
+        session.transcript = state.get("transcript", "")
+        session._last = tuple(state["last"]) if state.get("last") is not None else None
+        return session
+
+def extract_intent_keywords(transcript: str) -> List[str]:
+    """
+    Extract key intent words from the transcript
+    
+    Args:
+        transcript: Text transcript of the voice command
+        
+    Returns:
+        List of keywords
+    """
+    # Look for specific command keywords
+    found = intent_grammar.match(transcript)
+    keywords = [term for term in KEYWORD_TERMS if term in found]
+    
+    # Remove punctuation and stop words
+    tokens = PUNCTUATION_PATTERN.sub('', transcript.lower()).split()
+    stop_words = get_voice_stop_words()
+    filtered_tokens = [word for word in tokens if word not in stop_words]
     
     # Add most frequent non-stop words
     word_freq = Counter(filtered_tokens)
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from voice_processor import VoiceSession
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Voice session configuration from environment variables
+VOICE_SESSION_TTL = float(os.environ.get("VOICE_SESSION_TTL", 300))
+VOICE_SESSION_STORE_PATH = os.environ.get("VOICE_SESSION_STORE_PATH") or None
+# How often a reader checks the SQLite store for events written by another process
+VOICE_SESSION_POLL_INTERVAL = float(os.environ.get("VOICE_SESSION_POLL_INTERVAL", 0.05))
+
+class VoiceSessionNotFoundError(Exception):
+    """
+    Raised for a voice session that does not exist or has expired
+    """
+    pass
+
+class VoiceSessionClosedError(Exception):
+    """
+    Raised when a transcript is sent to a voice session that has already finished
+    """
+    pass
+
+class VoiceSessionStore:
+    """
+    Voice commands resolved from partial transcripts sent one request at a time
+
+    Browsers cannot stream a request body, so the client sends each interim
+    transcript as its own POST and reads the results from a separate event
+    stream. Every session keeps its VoiceSession state and an append-only
+    event log: a 'provisional' event whenever the resolved action changes,
+    then a single 'final' or 'error' event that closes the session.
+    Sessions expire ttl_seconds after their last update.
+
+    With a store_path, sessions are kept in SQLite so that the partials and
+    the event stream may be served by different server processes.
+    """
+
+    def __init__(self, store_path: Optional[str] = VOICE_SESSION_STORE_PATH,
+                 ttl_seconds: float = VOICE_SESSION_TTL):
+        self.store_path = store_path
+        self.ttl_seconds = ttl_seconds
+
+        # Guards the in-memory sessions and wakes readers of this process
+        self._changed = threading.Condition()
+        self._sessions = {}
+
+        self._local = threading.local()
+        if store_path:
+            self._initialize_store()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return a SQLite connection owned by the current thread and process
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.store_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize_store(self):
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS voice_sessions (
+                id TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+
+    def create(self, context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Start a voice session
+
+        Args:
+            context: Context passed to process_voice_command for the final transcript
+
+        Returns:
+            ID of the new session
+        """
+        session_id = uuid.uuid4().hex
+        record = {'session': VoiceSession(context or {}).to_dict(), 'events': [], 'closed': False}
+        now = time.time()
+
+        if self.store_path:
+            conn = self._connect()
+            conn.execute("DELETE FROM voice_sessions WHERE expires_at <= ?", (now,))
+            conn.execute("INSERT INTO voice_sessions (id, expires_at, payload) VALUES (?, ?, ?)",
+                         (session_id, now + self.ttl_seconds, json.dumps(record)))
+        else:
+            with self._changed:
+                for expired in [key for key, (expires_at, _) in self._sessions.items() if expires_at <= now]:
+                    del self._sessions[expired]
+                self._sessions[session_id] = (now + self.ttl_seconds, record)
+        return session_id
+
+    def add_transcript(self, session_id: str, transcript: Optional[str] = None, final: bool = False) -> None:
+        """
+        Resolve the next transcript of a session and record the resulting events
+
+        Args:
+            session_id: ID returned by create
+            transcript: Utterance recognized so far; None leaves the last one in place
+            final: Whether the user has finished speaking
+
+        Raises:
+            VoiceSessionNotFoundError: If the session does not exist or has expired
+            VoiceSessionClosedError: If the session has already finished
+        """
+        def resolve(record):
+            if record['closed']:
+                raise VoiceSessionClosedError(f"Voice session {session_id} has already finished")
+            session = VoiceSession.from_dict(record['session'])
+
+            if not final:
+                if transcript is not None:
+                    provisional = session.update(transcript)
+                    if provisional is not None:
+                        record['events'].append(('provisional', {"transcript": transcript, **provisional}))
+            elif not (transcript if transcript is not None else session.transcript):
+                record['events'].append(('error', {"error": "No voice transcript provided"}))
+            else:
+                try:
+                    result = session.finish(transcript)
+                    record['events'].append(('final', {"success": True, "transcript": session.transcript,
+                                                       **result}))
+                except Exception as e:
+                    logger.error(f"Error processing voice session {session_id}: {str(e)}")
+                    record['events'].append(('error', {"error": f"Failed to process voice command: {str(e)}"}))
+
+            record['closed'] = final
+            record['session'] = session.to_dict()
+
+        self._modify(session_id, resolve)
+
+    def events(self, session_id: str, after: int = 0,
+               timeout: float = 0.0) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """
+        Return the events of a session after the first `after`, waiting for new ones
+
+        Args:
+            session_id: ID returned by create
+            after: Number of events the caller has already seen
+            timeout: Seconds to wait when there are no new events
+
+        Returns:
+            Tuple of the new (event, payload) pairs and whether the session has finished
+
+        Raises:
+            VoiceSessionNotFoundError: If the session does not exist or has expired
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._changed:
+                record = self._load(session_id)
+                remaining = deadline - time.monotonic()
+                if len(record['events']) > after or record['closed'] or remaining <= 0:
+                    return [tuple(event) for event in record['events'][after:]], record['closed']
+                # Writes from this process wake the reader at once; other processes are polled
+                self._changed.wait(min(remaining, VOICE_SESSION_POLL_INTERVAL) if self.store_path else remaining)
+
+    def _load(self, session_id: str) -> Dict[str, Any]:
+        now = time.time()
+        if self.store_path:
+            row = self._connect().execute("SELECT payload FROM voice_sessions WHERE id = ? AND expires_at > ?",
+                                          (session_id, now)).fetchone()
+            record = json.loads(row[0]) if row else None
+        else:
+            expires_at, record = self._sessions.get(session_id, (0.0, None))
+            if expires_at <= now:
+                record = None
+        if record is None:
+            raise VoiceSessionNotFoundError(f"Voice session {session_id} not found")
+        return record
+
+    def _modify(self, session_id: str, change) -> None:
+        # Read, change and write the session record back as one step
+        with self._changed:
+            if self.store_path:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    record = self._load(session_id)
+                    change(record)
+                    conn.execute("UPDATE voice_sessions SET expires_at = ?, payload = ? WHERE id = ?",
+                                 (time.time() + self.ttl_seconds, json.dumps(record), session_id))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            else:
+                record = self._load(session_id)
+                change(record)
+                self._sessions[session_id] = (time.time() + self.ttl_seconds, record)
+            self._changed.notify_all()
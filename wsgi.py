@@ -0,0 +1,34 @@
+"""
+Production entry point for the Flask API
+
+Run under gunicorn with the settings in gunicorn.conf.py:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app, this module is imported once in the master process, so the
+NLP models loaded here are shared copy-on-write by every forked worker. With
+the analysis pool enabled (ANALYSIS_WORKERS > 0, the default) that is only
+the models request threads use: insights run in the pool's own processes,
+which load spaCy and the rest themselves.
+"""
+import os
+import logging
+
+import nlp_models
+from analysis_pool import server_preload_models
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Load models before the app (and before workers fork) unless disabled
+if os.environ.get("NLP_WARMUP", "true").lower() in ("1", "true", "yes"):
+    names = server_preload_models()
+    stats = nlp_models.warm_up(names)
+    for name in names or stats:
+        if not stats[name]['loaded']:
+            logger.warning(f"NLP model '{name}' failed to load; it will be retried on first use")
+
+from flask_server import app  # noqa: E402
+
+application = app